@@ -0,0 +1,73 @@
+"""
+Measure checklist JSON Lines import and export on a large synthetic catalog.
+
+Imports a generated catalog into an in-memory database, re-imports it
+(every record is an upsert of an existing row) and exports it, reporting
+the time of each step; with --memory, peak Python memory instead (tracing
+slows everything down several times). Usage:
+
+    python benchmarks/checklist_io.py [--items 100000] [--memory]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from src.database.checklist_io import export_jsonl, import_jsonl
+from src.database.models import Base
+
+def catalog_lines(items: int, categories: int = 10, items_per_section: int = 100):
+    sections = max(items // (categories * items_per_section), 1)
+    for c in range(categories):
+        category = f"Category {c}"
+        yield json.dumps({"type": "category", "name": category}) + "\n"
+        for s in range(sections):
+            section = f"Section {s}"
+            yield json.dumps({"type": "section", "category": category, "name": section, "order": s}) + "\n"
+            for i in range(items_per_section):
+                yield json.dumps({
+                    "type": "item", "category": category, "section": section,
+                    "description": f"Item {s}.{i}", "order": i
+                }) + "\n"
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<12} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    return result
+
+def traced(label: str, fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    print(f"{label:<12} peak {peak / 1024 / 1024:6.2f} MiB")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--memory", action="store_true", help="report peak memory instead of time")
+    args = parser.parse_args()
+    measured = traced if args.memory else timed
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    print(measured("import", lambda: import_jsonl(db, catalog_lines(args.items))))
+    measured("re-import", lambda: import_jsonl(db, catalog_lines(args.items)))
+    measured("export", lambda: sum(1 for _ in export_jsonl(db)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure /api/fleet/progress aggregation over a synthetic fleet.
+
+Builds an in-memory database with the given number of inspection runs and
+times a cold aggregate, a cached one, and one after a single run changes,
+then reports the peak resident memory of the process. Usage:
+
+    python benchmarks/fleet_progress.py [--runs 10000] [--items 120]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from src.database.inspection_runs import bitset_from_ids, update_run_item
+from src.database.models import Base, ChecklistCategory, ChecklistSection, ChecklistItem, InspectionRun
+from src.database.templates import publish_template
+from src.services.fleet_progress import FleetProgress
+
+def build(runs: int, items: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    categories = [ChecklistCategory(name=name) for name in ("Catamaran", "Powerboat", "Jet Ski", "Sailing")]
+    db.add_all(categories)
+    item_ids = {}
+    for category in categories:
+        sections = [ChecklistSection(name=f"Section {s}", order=s, category=category) for s in range(7)]
+        rows = [ChecklistItem(description=f"Item {i}", order=i, section=sections[i % 7]) for i in range(items // 4)]
+        db.add_all(sections + rows)
+        db.flush()
+        item_ids[category.id] = [row.id for row in rows]
+    db.commit()
+    versions = {category.id: publish_template(db, category.id).id for category in categories}
+    rng = random.Random(1)
+    mappings = []
+    for i in range(runs):
+        category = categories[i % 4].id
+        # Bits are positions in the run's template
+        done = rng.sample(range(len(item_ids[category])), rng.randint(0, len(item_ids[category])))
+        mappings.append({
+            "vessel": f"Vessel {i // 4}",
+            "category_id": category,
+            "template_version_id": versions[category],
+            "completed_bits": bitset_from_ids(done),
+            "version": 1
+        })
+    db.bulk_insert_mappings(InspectionRun, mappings)
+    db.commit()
+    return db, item_ids
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<24} {(time.perf_counter() - started) * 1000:8.1f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=120)
+    args = parser.parse_args()
+
+    db, item_ids = build(args.runs, args.items)
+    progress = FleetProgress()
+    timed("cold", lambda: progress.get(db))
+    timed("cached", lambda: progress.get(db))
+
+    run = db.query(InspectionRun).first()
+    update_run_item(db, run, item_ids[run.category_id][0], True)
+    timed("after one run changed", lambda: progress.get(db))
+    print(f"{'peak RSS':<24} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:8.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure how long a worker takes to import and construct the checklist agent.
+
+Each measurement runs in a fresh interpreter so module caches from a previous
+run do not hide import cost. Usage:
+
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    # What a worker pays at boot for the chat path
+    "chat agent": (
+        "from src.agents.checklist_agent import ChecklistAgent\n"
+        "ChecklistAgent('sk-benchmark')\n"
+    ),
+    # What the previous eager construction cost: chat agent plus the crew
+    "chat agent + crew": (
+        "from src.agents.checklist_agent import ChecklistAgent\n"
+        "ChecklistAgent('sk-benchmark').checklist_crew\n"
+    ),
+}
+
+def time_scenario(code: str) -> float:
+    timed = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{code}"
+        "print(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", timed],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        samples = [time_scenario(code) for _ in range(args.runs)]
+        print(f"{name:<20} median {statistics.median(samples) * 1000:8.1f} ms  "
+              f"min {min(samples) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
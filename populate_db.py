@@ -1,44 +1,30 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 import os
-import logging
+import sys
 from dotenv import load_dotenv
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Load environment variables
+# Load environment variables before the database path is resolved
 load_dotenv()
 
-# Get environment
-ENV = os.getenv("ENV", "development")
-logger.info(f"Running in {ENV} environment")
-
-# SQLite database URL with absolute path
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# In production (cPanel), we need to use a path relative to the home directory
-if ENV == "production":
-    # Get user's home directory (usually something like /home/username in cPanel)
-    HOME_DIR = os.path.expanduser("~")
-    DATABASE_PATH = os.path.join(HOME_DIR, "checklist.db")
-else:
-    # In development, use the project directory
-    DATABASE_PATH = os.path.join(BASE_DIR, "checklist.db")
-
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
-logger.info(f"Creating database at: {DATABASE_PATH}")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.database.connection import get_engine
+from src.database.triggers import data_version_ddl, search_index_ddl
 
-# Create SQLAlchemy engine with SQLite
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = get_engine()
 
 # Create tables
 with engine.connect() as conn:
     # Drop existing tables if they exist
+    conn.execute(text("DROP TABLE IF EXISTS search_index"))
+    conn.execute(text("DROP TABLE IF EXISTS checklist_data_version"))
+    conn.execute(text("DROP TABLE IF EXISTS completion_analytics_cursor"))
+    conn.execute(text("DROP TABLE IF EXISTS completion_sketches"))
+    conn.execute(text("DROP TABLE IF EXISTS checklist_item_event_rollups"))
+    conn.execute(text("DROP TABLE IF EXISTS checklist_item_events"))
+    conn.execute(text("DROP TABLE IF EXISTS inspection_run_items"))
+    conn.execute(text("DROP TABLE IF EXISTS inspection_runs"))
+    conn.execute(text("DROP TABLE IF EXISTS checklist_template_versions"))
+    conn.execute(text("DROP TABLE IF EXISTS conversation_messages"))
     conn.execute(text("DROP TABLE IF EXISTS checklist_items"))
     conn.execute(text("DROP TABLE IF EXISTS checklist_sections"))
     conn.execute(text("DROP TABLE IF EXISTS checklist_categories"))
@@ -78,10 +64,150 @@ with engine.connect() as conn:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             last_checked TIMESTAMP,
             checked_by VARCHAR,
+            version INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY(section_id) REFERENCES checklist_sections(id) ON DELETE CASCADE
         )
     """))
     
+    # Create conversation_messages table
+    conn.execute(text("""
+        CREATE TABLE conversation_messages (
+            id INTEGER PRIMARY KEY,
+            session_id VARCHAR NOT NULL,
+            role VARCHAR NOT NULL,
+            content VARCHAR NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX ix_conversation_messages_session_created
+        ON conversation_messages (session_id, created_at)
+    """))
+    
+    # Create checklist_template_versions table
+    conn.execute(text("""
+        CREATE TABLE checklist_template_versions (
+            id INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            content_hash VARCHAR NOT NULL,
+            snapshot VARCHAR NOT NULL,
+            note VARCHAR,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(category_id) REFERENCES checklist_categories(id) ON DELETE CASCADE
+        )
+    """))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX ux_checklist_template_versions_category_version
+        ON checklist_template_versions (category_id, version)
+    """))
+    
+    # Create inspection_runs table
+    conn.execute(text("""
+        CREATE TABLE inspection_runs (
+            id INTEGER PRIMARY KEY,
+            vessel VARCHAR NOT NULL,
+            category_id INTEGER NOT NULL,
+            template_version_id INTEGER NOT NULL,
+            started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP,
+            completed_bits BLOB NOT NULL,
+            version INTEGER NOT NULL,
+            FOREIGN KEY(category_id) REFERENCES checklist_categories(id) ON DELETE CASCADE,
+            FOREIGN KEY(template_version_id) REFERENCES checklist_template_versions(id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX ix_inspection_runs_vessel_started
+        ON inspection_runs (vessel, started_at)
+    """))
+    
+    # Create inspection_run_items table
+    conn.execute(text("""
+        CREATE TABLE inspection_run_items (
+            run_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            notes VARCHAR,
+            checked_by VARCHAR,
+            checked_at TIMESTAMP,
+            PRIMARY KEY (run_id, item_id),
+            FOREIGN KEY(run_id) REFERENCES inspection_runs(id) ON DELETE CASCADE,
+            FOREIGN KEY(item_id) REFERENCES checklist_items(id) ON DELETE CASCADE
+        )
+    """))
+    
+    # Create checklist_item_events table (append-only audit log)
+    conn.execute(text("""
+        CREATE TABLE checklist_item_events (
+            id INTEGER PRIMARY KEY,
+            item_id INTEGER NOT NULL,
+            run_id INTEGER,
+            event VARCHAR NOT NULL,
+            actor VARCHAR,
+            source VARCHAR,
+            created_at TIMESTAMP NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX ix_checklist_item_events_item_created
+        ON checklist_item_events (item_id, created_at)
+    """))
+    conn.execute(text("""
+        CREATE INDEX ix_checklist_item_events_created
+        ON checklist_item_events (created_at)
+    """))
+    conn.execute(text("""
+        CREATE INDEX ix_checklist_item_events_run
+        ON checklist_item_events (run_id, id)
+    """))
+    
+    # Create checklist_item_event_rollups table
+    conn.execute(text("""
+        CREATE TABLE checklist_item_event_rollups (
+            day DATE NOT NULL,
+            item_id INTEGER NOT NULL,
+            event VARCHAR NOT NULL,
+            count INTEGER NOT NULL,
+            first_at TIMESTAMP NOT NULL,
+            last_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (day, item_id, event)
+        )
+    """))
+    
+    # Create completion-time sketches, folded in as item events are written
+    conn.execute(text("""
+        CREATE TABLE completion_sketches (
+            item_id INTEGER PRIMARY KEY,
+            sketch VARCHAR NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE completion_analytics_cursor (
+            id INTEGER PRIMARY KEY,
+            last_event_id INTEGER NOT NULL
+        )
+    """))
+    
+    # Unique natural keys, used by checklist import/export
+    conn.execute(text("CREATE UNIQUE INDEX ux_checklist_categories_name ON checklist_categories (name)"))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX ux_checklist_sections_category_name
+        ON checklist_sections (category_id, name)
+    """))
+    conn.execute(text("""
+        CREATE UNIQUE INDEX ux_checklist_items_section_description
+        ON checklist_items (section_id, description)
+    """))
+    
+    # Create the search_index FTS5 table, kept in sync by triggers
+    if conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        for statement in search_index_ddl():
+            conn.execute(text(statement))
+    
+    # Counter bumped by triggers on every checklist write, polled by the read replica
+    for statement in data_version_ddl():
+        conn.execute(text(statement))
+    
     # Insert categories
     conn.execute(text("""
         INSERT INTO checklist_categories (id, name, description) 
@@ -1,78 +1,53 @@
 from datetime import datetime, timedelta
 import json
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Callable
+import threading
+from typing import Dict, List, Optional, TYPE_CHECKING
 from openai import AsyncOpenAI
-import httpx
-from crewai import Agent, Task, Crew
-from langchain.tools import BaseTool, StructuredTool
-from langchain.memory import ConversationBufferMemory
-from langchain_community.chat_models import ChatOpenAI
-from openai import OpenAI
+
+from ..database.conversation_store import ConversationStore
+from ..services.http_clients import HTTPClientRegistry, N8N_IMAGE_WEBHOOK_URL, create_default_registry
+from ..services.image_service import ImageService
+
+if TYPE_CHECKING:
+    from .checklist_crew import ChecklistCrew
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_chat_openai(api_key):
-    # Create ChatOpenAI instance with minimal configuration
-    return ChatOpenAI(
-        model_name="gpt-4",
-        openai_api_key=api_key,
-        temperature=0.0
-    )
-
-# Define tool functions
-def format_checklist(items: List[Dict[str, Any]]) -> str:
-    """Format checklist items in a structured way"""
-    return json.dumps(items, indent=2)
-
-def validate_checklist(checklist: Dict[str, Any]) -> bool:
-    """Validate checklist structure and required fields"""
-    return all(
-        required in checklist for required in ["title", "description", "items"]
-    )
-
-def analyze_complexity(items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    """Analyze the complexity of checklist items"""
-    return {
-        "simple": [i for i in items if len(i.get("steps", [])) <= 3],
-        "complex": [i for i in items if len(i.get("steps", [])) > 3]
-    }
-
-def suggest_improvements(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Suggest improvements for checklist items"""
-    return [
-        {
-            "item": item,
-            "suggestions": ["Make more specific", "Add time estimates", "Break down into subtasks"]
-        }
-        for item in items
-    ]
-
 class ConversationMemory:
-    def __init__(self, max_history_age: int = 24):
+    def __init__(self, max_history_age: int = 24, store: Optional[ConversationStore] = None):
         self.conversation_history = {}  # session_id -> list of messages
         self.current_items = {}  # session_id -> dict of current items being discussed
         self.verification_state = {}  # session_id -> dict of items needing verification
         self.max_history_age = max_history_age  # hours
+        self.store = store  # optional durable backing store
     
     def add_message(self, session_id: str, role: str, content: str):
         """Add a message to the conversation history."""
         if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
+            self.conversation_history[session_id] = self._hydrate(session_id)
         
+        timestamp = datetime.now()
         self.conversation_history[session_id].append({
             "role": role,
             "content": content,
-            "timestamp": datetime.now()
+            "timestamp": timestamp
         })
         
+        # Persist in the background; never blocks the caller
+        if self.store is not None:
+            self.store.enqueue(session_id, role, content, timestamp)
+        
         # Clean up old messages
         self._cleanup_old_messages(session_id)
     
     def get_messages(self, session_id: str) -> List[Dict]:
         """Get all messages for a session."""
+        if session_id not in self.conversation_history and self.store is not None:
+            self.conversation_history[session_id] = self._hydrate(session_id)
         return self.conversation_history.get(session_id, [])
     
     def get_recent_context(self, session_id: str, max_messages: int = 10) -> List[Dict]:
@@ -114,6 +89,30 @@ class ConversationMemory:
                 if msg["timestamp"] > cutoff_time
             ]
     
+    async def load(self, session_id: str):
+        """Hydrate a cold session from the backing store off the event loop.
+
+        Async callers await this before touching a session, so the
+        database read never blocks other requests; the synchronous
+        accessors only fall back to reading inline when it was skipped.
+        """
+        if session_id in self.conversation_history or self.store is None:
+            return
+        messages = await asyncio.to_thread(self._hydrate, session_id)
+        # Another request may have loaded or started the session meanwhile
+        self.conversation_history.setdefault(session_id, messages)
+
+    def _hydrate(self, session_id: str) -> List[Dict]:
+        """Load a cold session's recent history from the backing store."""
+        if self.store is None:
+            return []
+        cutoff_time = datetime.now() - timedelta(hours=self.max_history_age)
+        try:
+            return self.store.load_session(session_id, since=cutoff_time)
+        except Exception as e:
+            logger.error(f"Error loading conversation history for {session_id}: {str(e)}")
+            return []
+    
     def clear(self):
         """Clear all conversation history."""
         self.conversation_history.clear()
@@ -121,168 +120,60 @@ class ConversationMemory:
         self.verification_state.clear()
 
 class ChecklistAgent:
-    def __init__(self, api_key: str):
-        # Initialize HTTP client
-        http_client = httpx.AsyncClient(
-            timeout=60.0,
-            follow_redirects=True
-        )
+    def __init__(
+        self,
+        api_key: str,
+        conversation_store: Optional[ConversationStore] = None,
+        http_clients: Optional[HTTPClientRegistry] = None,
+        image_service: Optional[ImageService] = None
+    ):
+        # Use the shared, pooled HTTP clients
+        self.http_clients = http_clients or create_default_registry()
         self.client = AsyncOpenAI(
             api_key=api_key,
-            http_client=http_client
+            http_client=self.http_clients.get("openai")
         )
-        
-        # Initialize conversation memory
-        self.memory = ConversationMemory()
-        
-        # Configure LLM
-        llm = create_chat_openai(api_key)
-        
-        # Initialize tools
-        checklist_tools = [
-            StructuredTool.from_function(
-                func=format_checklist,
-                name="format_checklist",
-                description="Format checklist items in a structured way"
-            ),
-            StructuredTool.from_function(
-                func=validate_checklist,
-                name="validate_checklist",
-                description="Validate checklist structure and required fields"
-            )
-        ]
-        
-        analysis_tools = [
-            StructuredTool.from_function(
-                func=analyze_complexity,
-                name="analyze_complexity",
-                description="Analyze the complexity of checklist items"
-            ),
-            StructuredTool.from_function(
-                func=suggest_improvements,
-                name="suggest_improvements",
-                description="Suggest improvements for checklist items"
-            )
-        ]
-        
-        # Initialize the main checklist agent
-        self.checklist_manager = Agent(
-            role="Checklist Manager",
-            goal="Manage and maintain checklists effectively",
-            backstory="""You are an expert checklist manager who helps users create, 
-            update, and maintain their checklists. You understand the importance of 
-            organization and can help break down complex tasks into manageable steps.""",
-            tools=checklist_tools,
-            llm=llm,
-            verbose=True
+        self.image_service = image_service or ImageService(
+            lambda: self.http_clients.get("n8n"),
+            N8N_IMAGE_WEBHOOK_URL
         )
         
-        # Initialize the task analyzer agent
-        self.task_analyzer = Agent(
-            role="Task Analyzer",
-            goal="Analyze and optimize checklist items",
-            backstory="""You are an expert at analyzing tasks and suggesting 
-            improvements. You help ensure checklist items are clear, actionable, 
-            and properly organized.""",
-            tools=analysis_tools,
-            llm=llm,
-            verbose=True
-        )
+        # Initialize conversation memory
+        self.memory = ConversationMemory(store=conversation_store)
         
-        # Create the crew
-        self.crew = Crew(
-            agents=[self.checklist_manager, self.task_analyzer],
-            tasks=[],
-            verbose=True
-        )
+        # CrewAI agents are only needed for checklist authoring, not chat;
+        # they are built on first use (see checklist_crew)
+        self.api_key = api_key
+        self._checklist_crew: Optional["ChecklistCrew"] = None
+        self._checklist_crew_lock = threading.Lock()
+
+    @property
+    def checklist_crew(self) -> "ChecklistCrew":
+        """The CrewAI component, imported and constructed on first access."""
+        if self._checklist_crew is None:
+            with self._checklist_crew_lock:
+                if self._checklist_crew is None:
+                    self._checklist_crew = self.new_checklist_crew()
+        return self._checklist_crew
+
+    def new_checklist_crew(self) -> "ChecklistCrew":
+        """Build a separate CrewAI component, e.g. one per background job."""
+        from .checklist_crew import ChecklistCrew
+        return ChecklistCrew(self.api_key)
+
+    # Crew runs block for a long time, so they are moved off the event loop
 
     async def create_checklist(self, title: str, description: str, items: List[Dict]) -> Dict:
         """Create a new checklist with the given title, description, and items."""
-        task = Task(
-            description=f"""Create a new checklist with the following details:
-            Title: {title}
-            Description: {description}
-            Items: {json.dumps(items, indent=2)}
-            
-            Ensure all items are properly formatted and organized.""",
-            agent=self.checklist_manager,
-            context=[{
-                "title": title,
-                "description": "Create a new checklist with the provided details",
-                "items": items,
-                "expected_output": "A formatted and validated checklist"
-            }],
-            expected_output="A formatted and validated checklist"
-        )
-        
-        analyze_task = Task(
-            description=f"""Analyze the checklist items and suggest any improvements:
-            Items: {json.dumps(items, indent=2)}""",
-            agent=self.task_analyzer,
-            context=[{
-                "items": items,
-                "description": "Analyze checklist items for potential improvements",
-                "expected_output": "Analysis and suggestions for improvement"
-            }],
-            expected_output="Analysis and suggestions for improvement"
-        )
-        
-        self.crew.tasks = [analyze_task, task]
-        result = await self.crew.kickoff()
-        
-        return {
-            "title": title,
-            "description": description,
-            "items": items,
-            "analysis": result
-        }
+        return await asyncio.to_thread(self.checklist_crew.create_checklist, title, description, items)
 
     async def update_checklist(self, checklist_id: str, updates: Dict) -> Dict:
         """Update an existing checklist with the given updates."""
-        task = Task(
-            description=f"""Update the checklist with ID {checklist_id} with the following changes:
-            {json.dumps(updates, indent=2)}
-            
-            Ensure all updates are properly applied and maintain checklist integrity.""",
-            agent=self.checklist_manager,
-            context=[{
-                "checklist_id": checklist_id,
-                "updates": updates,
-                "description": "Update an existing checklist with the provided changes",
-                "expected_output": "Updated checklist with applied changes"
-            }],
-            expected_output="Updated checklist with applied changes"
-        )
-        
-        self.crew.tasks = [task]
-        result = await self.crew.kickoff()
-        
-        return {
-            "checklist_id": checklist_id,
-            "updates": updates,
-            "result": result
-        }
+        return await asyncio.to_thread(self.checklist_crew.update_checklist, checklist_id, updates)
 
     async def get_checklist_suggestions(self, context: str) -> List[Dict]:
         """Get suggestions for checklist items based on the given context."""
-        task = Task(
-            description=f"""Analyze the following context and suggest relevant checklist items:
-            Context: {context}
-            
-            Provide detailed and actionable checklist items that would be helpful in this context.""",
-            agent=self.task_analyzer,
-            context=[{
-                "input_context": context,
-                "description": "Generate checklist suggestions based on the provided context",
-                "expected_output": "List of suggested checklist items"
-            }],
-            expected_output="List of suggested checklist items"
-        )
-        
-        self.crew.tasks = [task]
-        result = await self.crew.kickoff()
-        
-        return result
+        return await asyncio.to_thread(self.checklist_crew.get_checklist_suggestions, context)
 
     def get_conversation_history(self) -> Dict[str, List[Dict]]:
         """Retrieve the conversation history from memory."""
@@ -303,6 +194,7 @@ class ChecklistAgent:
         
         # Store the current items for context
         self.memory.set_current_items(session_id, item_map)
+        await self.memory.load(session_id)
         
         # Add user message to history
         self.memory.add_message(session_id, "user", message)
@@ -432,20 +324,10 @@ DO NOT INCLUDE CHECKLIST IDS IN YOUR RESPONSE.
                     # Handle get_relevant_image tool call
                     if tool_call.function.name == "get_relevant_image":
                         try:
-                            # Make request to image endpoint
-                            async with httpx.AsyncClient() as client:
-                                response = await client.post(
-                                    'https://blopit.app.n8n.cloud/webhook/red_image',
-                                    json={"message": function_args["message"]}
-                                )
-                                if response.status_code == 200:
-                                    image_data = response.json()
-                                    # Only add image_url if we got a valid image response
-                                    if image_data and image_data.get("image"):
-                                        result["image_url"] = {
-                                            "image": image_data["image"],
-                                            "type": image_data.get("type", "Safety Related")
-                                        }
+                            # Cached, deduplicated lookup against the image webhook
+                            image = await self.image_service.get_relevant_image(function_args["message"])
+                            if image:
+                                result["image_url"] = image
                             # Return the result whether we got an image or not
                             return result
                         except Exception as e:
@@ -487,4 +369,6 @@ DO NOT INCLUDE CHECKLIST IDS IN YOUR RESPONSE.
         if session_id in self.memory.current_items:
             del self.memory.current_items[session_id]
         if session_id in self.memory.verification_state:
-            del self.memory.verification_state[session_id] 
\ No newline at end of file
+            del self.memory.verification_state[session_id]
+        if self.memory.store is not None:
+            self.memory.store.delete_session(session_id) 
\ No newline at end of file
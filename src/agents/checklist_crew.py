@@ -0,0 +1,234 @@
+"""
+CrewAI-backed checklist authoring and analysis
+
+This module pulls in crewai and langchain, which are slow to import, so the
+chat path never imports it directly. ``ChecklistAgent`` loads it on first use
+of one of the crew capabilities.
+"""
+import json
+import logging
+from typing import Dict, List, Any
+from crewai import Agent, Task, Crew
+from langchain.tools import StructuredTool
+from langchain_community.chat_models import ChatOpenAI
+
+from .task_graph import TaskGraph
+
+logger = logging.getLogger(__name__)
+
+def create_chat_openai(api_key):
+    # Create ChatOpenAI instance with minimal configuration
+    return ChatOpenAI(
+        model_name="gpt-4",
+        openai_api_key=api_key,
+        temperature=0.0
+    )
+
+# Define tool functions
+def format_checklist(items: List[Dict[str, Any]]) -> str:
+    """Format checklist items in a structured way"""
+    return json.dumps(items, indent=2)
+
+def validate_checklist(checklist: Dict[str, Any]) -> bool:
+    """Validate checklist structure and required fields"""
+    return all(
+        required in checklist for required in ["title", "description", "items"]
+    )
+
+def analyze_complexity(items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Analyze the complexity of checklist items"""
+    return {
+        "simple": [i for i in items if len(i.get("steps", [])) <= 3],
+        "complex": [i for i in items if len(i.get("steps", [])) > 3]
+    }
+
+def suggest_improvements(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Suggest improvements for checklist items"""
+    return [
+        {
+            "item": item,
+            "suggestions": ["Make more specific", "Add time estimates", "Break down into subtasks"]
+        }
+        for item in items
+    ]
+
+class ChecklistCrew:
+    """Checklist manager and task analyzer agents working as one crew.
+
+    Only the LLM and the tools are kept on the instance. The agents are
+    built again for every task, because crewai agents hold per-run state
+    and tasks of one crew run in parallel threads.
+    """
+
+    def __init__(self, api_key: str):
+        # Configure LLM
+        self.llm = create_chat_openai(api_key)
+        
+        # Initialize tools
+        self.checklist_tools = [
+            StructuredTool.from_function(
+                func=format_checklist,
+                name="format_checklist",
+                description="Format checklist items in a structured way"
+            ),
+            StructuredTool.from_function(
+                func=validate_checklist,
+                name="validate_checklist",
+                description="Validate checklist structure and required fields"
+            )
+        ]
+        
+        self.analysis_tools = [
+            StructuredTool.from_function(
+                func=analyze_complexity,
+                name="analyze_complexity",
+                description="Analyze the complexity of checklist items"
+            ),
+            StructuredTool.from_function(
+                func=suggest_improvements,
+                name="suggest_improvements",
+                description="Suggest improvements for checklist items"
+            )
+        ]
+
+    def new_checklist_manager(self) -> Agent:
+        """The main checklist agent, for one task."""
+        return Agent(
+            role="Checklist Manager",
+            goal="Manage and maintain checklists effectively",
+            backstory="""You are an expert checklist manager who helps users create, 
+            update, and maintain their checklists. You understand the importance of 
+            organization and can help break down complex tasks into manageable steps.""",
+            tools=self.checklist_tools,
+            llm=self.llm,
+            verbose=True
+        )
+
+    def new_task_analyzer(self) -> Agent:
+        """The task analyzer agent, for one task."""
+        return Agent(
+            role="Task Analyzer",
+            goal="Analyze and optimize checklist items",
+            backstory="""You are an expert at analyzing tasks and suggesting 
+            improvements. You help ensure checklist items are clear, actionable, 
+            and properly organized.""",
+            tools=self.analysis_tools,
+            llm=self.llm,
+            verbose=True
+        )
+
+    def kickoff(self, tasks: List[Task]) -> Any:
+        """Run the given tasks in a new crew and block until it finishes.
+
+        Every run gets its own ``Crew`` made of the tasks' own agents, so
+        concurrent runs share neither a task list nor an agent. Call this
+        from a worker thread, not from the event loop.
+        """
+        agents = []
+        for task in tasks:
+            if all(agent is not task.agent for agent in agents):
+                agents.append(task.agent)
+        crew = Crew(
+            agents=agents,
+            tasks=tasks,
+            verbose=True
+        )
+        return crew.kickoff()
+
+    def run_graph(self, graph: TaskGraph) -> Dict[str, Any]:
+        """Run each task of the graph in its own crew, independent branches
+        concurrently, and return the result of every task by name."""
+        return graph.run(lambda task: self.kickoff([task]))
+
+    def create_checklist(self, title: str, description: str, items: List[Dict]) -> Dict:
+        """Create a new checklist with the given title, description, and items."""
+        def build_checklist_task(_: Dict[str, Any]) -> Task:
+            return Task(
+                description=f"""Create a new checklist with the following details:
+                Title: {title}
+                Description: {description}
+                Items: {json.dumps(items, indent=2)}
+                
+                Ensure all items are properly formatted and organized.""",
+                agent=self.new_checklist_manager(),
+                context=[{
+                    "title": title,
+                    "description": "Create a new checklist with the provided details",
+                    "items": items,
+                    "expected_output": "A formatted and validated checklist"
+                }],
+                expected_output="A formatted and validated checklist"
+            )
+        
+        def build_analyze_task(_: Dict[str, Any]) -> Task:
+            return Task(
+                description=f"""Analyze the checklist items and suggest any improvements:
+                Items: {json.dumps(items, indent=2)}""",
+                agent=self.new_task_analyzer(),
+                context=[{
+                    "items": items,
+                    "description": "Analyze checklist items for potential improvements",
+                    "expected_output": "Analysis and suggestions for improvement"
+                }],
+                expected_output="Analysis and suggestions for improvement"
+            )
+        
+        # Formatting and analysis both work from the raw items, so they run
+        # as independent branches
+        graph = TaskGraph()
+        graph.add("analysis", build_analyze_task)
+        graph.add("checklist", build_checklist_task)
+        results = self.run_graph(graph)
+        
+        return {
+            "title": title,
+            "description": description,
+            "items": items,
+            "checklist": results["checklist"],
+            "analysis": results["analysis"]
+        }
+
+    def update_checklist(self, checklist_id: str, updates: Dict) -> Dict:
+        """Update an existing checklist with the given updates."""
+        task = Task(
+            description=f"""Update the checklist with ID {checklist_id} with the following changes:
+            {json.dumps(updates, indent=2)}
+            
+            Ensure all updates are properly applied and maintain checklist integrity.""",
+            agent=self.new_checklist_manager(),
+            context=[{
+                "checklist_id": checklist_id,
+                "updates": updates,
+                "description": "Update an existing checklist with the provided changes",
+                "expected_output": "Updated checklist with applied changes"
+            }],
+            expected_output="Updated checklist with applied changes"
+        )
+        
+        result = self.kickoff([task])
+        
+        return {
+            "checklist_id": checklist_id,
+            "updates": updates,
+            "result": result
+        }
+
+    def get_checklist_suggestions(self, context: str) -> List[Dict]:
+        """Get suggestions for checklist items based on the given context."""
+        task = Task(
+            description=f"""Analyze the following context and suggest relevant checklist items:
+            Context: {context}
+            
+            Provide detailed and actionable checklist items that would be helpful in this context.""",
+            agent=self.new_task_analyzer(),
+            context=[{
+                "input_context": context,
+                "description": "Generate checklist suggestions based on the provided context",
+                "expected_output": "List of suggested checklist items"
+            }],
+            expected_output="List of suggested checklist items"
+        )
+        
+        result = self.kickoff([task])
+        
+        return result
@@ -0,0 +1,298 @@
+"""
+Background jobs for long-running CrewAI checklist operations
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+logger = logging.getLogger(__name__)
+
+CREW_JOB_WORKERS = int(os.getenv("CREW_JOB_WORKERS", "2"))
+CREW_JOB_CACHE_SIZE = int(os.getenv("CREW_JOB_CACHE_SIZE", "128"))
+CREW_JOB_CACHE_TTL = int(os.getenv("CREW_JOB_CACHE_TTL", "3600"))  # seconds
+CREW_JOB_RETENTION = int(os.getenv("CREW_JOB_RETENTION", "1000"))  # finished jobs kept for polling
+
+class CreateChecklistParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    title: str
+    description: str = ""
+    items: List[Dict[str, Any]] = []
+
+class UpdateChecklistParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    checklist_id: str
+    updates: Dict[str, Any]
+
+class ChecklistSuggestionParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    context: str
+
+# Job kind (the ChecklistCrew method run for it) -> its parameters
+JOB_KINDS = {
+    "create_checklist": CreateChecklistParams,
+    "update_checklist": UpdateChecklistParams,
+    "get_checklist_suggestions": ChecklistSuggestionParams,
+}
+
+def validate_params(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a job's parameters against its kind and return them with defaults filled in."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    try:
+        return JOB_KINDS[kind].model_validate(params).model_dump()
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'params'}: {error['msg']}"
+            for error in e.errors()
+        )
+        raise ValueError(f"Invalid parameters for '{kind}': {problems}")
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+@dataclass
+class CrewJob:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    cache_key: str
+    status: JobStatus = JobStatus.PENDING
+    result: Any = None
+    error: Optional[str] = None
+    cached: bool = False
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "result": self.result,
+            "error": self.error,
+            "cached": self.cached,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class CrewJobQueue:
+    """Runs crew operations in a bounded thread pool and tracks their status.
+
+    Each job builds its own crew through ``crew_factory`` so concurrent jobs
+    never share task lists. Identical requests (same kind and parameters)
+    are answered from a TTL-bounded LRU of results, and a request identical
+    to one still in flight is attached to that job instead of starting
+    another crew run.
+    """
+
+    def __init__(
+        self,
+        crew_factory: Callable[[], Any],
+        max_workers: int = CREW_JOB_WORKERS,
+        cache_size: int = CREW_JOB_CACHE_SIZE,
+        cache_ttl: float = CREW_JOB_CACHE_TTL,
+        retention: int = CREW_JOB_RETENTION
+    ):
+        self.crew_factory = crew_factory
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.retention = retention
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: "OrderedDict[str, CrewJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._in_flight: Dict[str, str] = {}  # cache_key -> job id
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()  # cache_key -> (stored_at, result)
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> CrewJob:
+        """Queue a crew operation and return its job immediately."""
+        params = validate_params(kind, params)
+        cache_key = self._cache_key(kind, params)
+
+        in_flight_id = self._in_flight.get(cache_key)
+        if in_flight_id is not None and in_flight_id in self._jobs:
+            return self._jobs[in_flight_id]
+
+        job = CrewJob(id=uuid.uuid4().hex, kind=kind, params=params, cache_key=cache_key)
+        self._remember(job)
+
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            job.status = JobStatus.SUCCEEDED
+            job.result = cached
+            job.cached = True
+            job.started_at = job.finished_at = datetime.utcnow()
+            return job
+
+        self._in_flight[cache_key] = job.id
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[CrewJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[CrewJob]:
+        """Cancel a job. A crew already running in a thread cannot be
+        interrupted; its result is discarded when it finishes."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[CrewJob]:
+        """Wait until a job finishes (or the timeout elapses) and return it."""
+        job = self._jobs.get(job_id)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while job is not None and not job.finished:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            await self._wait_for_change(job_id, remaining)
+        return job
+
+    async def stream(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Dict]:
+        """Yield the job's state on every status change until it finishes."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        last_status = None
+        while True:
+            if job.status != last_status:
+                last_status = job.status
+                yield job.to_dict()
+            if job.finished:
+                return
+            if not await self._wait_for_change(job_id, heartbeat):
+                # Re-send the state so proxies keep the connection open
+                yield job.to_dict()
+
+    def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, job: CrewJob):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="crew-job"
+            )
+        try:
+            async with self._semaphore:
+                if job.finished:
+                    return
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.utcnow()
+                self._notify(job.id)
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._execute, job.kind, job.params
+                )
+            job.result = result
+            self._store_result(job.cache_key, result)
+            self._finish(job, JobStatus.SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, JobStatus.CANCELLED)
+        except Exception as e:
+            logger.error(f"Crew job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            self._finish(job, JobStatus.FAILED)
+        finally:
+            self._tasks.pop(job.id, None)
+
+    def _execute(self, kind: str, params: Dict[str, Any]) -> Any:
+        # Runs in a worker thread with a crew that belongs to this job only;
+        # params were validated against the kind in submit
+        crew = self.crew_factory()
+        return getattr(crew, kind)(**params)
+
+    def _finish(self, job: CrewJob, status: JobStatus):
+        if job.finished:
+            return
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        if self._in_flight.get(job.cache_key) == job.id:
+            del self._in_flight[job.cache_key]
+        self._notify(job.id)
+
+    def _notify(self, job_id: str):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _wait_for_change(self, job_id: str, timeout: Optional[float]) -> bool:
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _remember(self, job: CrewJob):
+        self._jobs[job.id] = job
+        # Forget the oldest finished jobs once past the retention limit
+        while len(self._jobs) > self.retention:
+            oldest_id = next((jid for jid, j in self._jobs.items() if j.finished), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+
+    def _cached_result(self, cache_key: str) -> Any:
+        entry = self._results.get(cache_key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.cache_ttl:
+            del self._results[cache_key]
+            return None
+        self._results.move_to_end(cache_key)
+        return result
+
+    def _store_result(self, cache_key: str, result: Any):
+        if result is None:
+            return
+        self._results[cache_key] = (time.monotonic(), result)
+        self._results.move_to_end(cache_key)
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(kind: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
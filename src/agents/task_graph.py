@@ -0,0 +1,77 @@
+"""
+Dependency graph of crew tasks, run with independent branches in parallel
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+@dataclass
+class TaskNode:
+    name: str
+    # Builds the crew task from the results of the nodes it depends on
+    build: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+class TaskGraph:
+    """A small DAG of crew tasks for one checklist operation.
+
+    ``run`` starts every node as soon as its dependencies have finished, so
+    branches that do not depend on each other execute concurrently and the
+    operation takes as long as its longest path rather than the sum of all
+    tasks.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, TaskNode] = {}
+
+    def add(self, name: str, build: Callable[[Dict[str, Any]], Any], depends_on: Tuple[str, ...] = ()) -> "TaskGraph":
+        if name in self.nodes:
+            raise ValueError(f"Duplicate task '{name}'")
+        self.nodes[name] = TaskNode(name=name, build=build, depends_on=tuple(depends_on))
+        return self
+
+    def levels(self) -> List[List[str]]:
+        """Group nodes into layers that can run concurrently (topological order)."""
+        for node in self.nodes.values():
+            missing = [dep for dep in node.depends_on if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Task '{node.name}' depends on unknown tasks {missing}")
+
+        remaining = dict(self.nodes)
+        done: set = set()
+        levels = []
+        while remaining:
+            ready = [name for name, node in remaining.items() if set(node.depends_on) <= done]
+            if not ready:
+                raise ValueError(f"Task graph has a cycle among {sorted(remaining)}")
+            levels.append(ready)
+            done.update(ready)
+            for name in ready:
+                del remaining[name]
+        return levels
+
+    def run(self, execute: Callable[[Any], Any], max_parallel: Optional[int] = None) -> Dict[str, Any]:
+        """Run every node and return ``{name: result}``.
+
+        ``execute`` receives the task built by a node and must block until
+        it has a result; it is called from worker threads.
+        """
+        levels = self.levels()  # validates the graph before anything runs
+        workers = max_parallel or max(len(level) for level in levels)
+        results: Dict[str, Any] = {}
+        pending = dict(self.nodes)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-task") as executor:
+            while pending or running:
+                for name in [n for n, node in pending.items() if all(d in results for d in node.depends_on)]:
+                    node = pending.pop(name)
+                    task = node.build({dep: results[dep] for dep in node.depends_on})
+                    running[executor.submit(execute, task)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    # Re-raises the first failure; nodes not yet started are skipped
+                    results[name] = future.result()
+        return results
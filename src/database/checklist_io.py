@@ -0,0 +1,217 @@
+"""
+Streaming JSON Lines import and export of checklist templates
+
+One record per line, parents before children:
+
+    {"type": "category", "name": "Catamaran", "description": "..."}
+    {"type": "section", "category": "Catamaran", "name": "Safety Equipment", "description": "...", "order": 3}
+    {"type": "item", "category": "Catamaran", "section": "Safety Equipment", "description": "...", "order": 1}
+
+Records are matched on natural keys (category name; category and section
+name; section and item description), so importing the same file twice
+changes nothing. Only the template is exchanged, not completion state.
+
+Usage:
+
+    python -m src.database.checklist_io export [checklists.jsonl]
+    python -m src.database.checklist_io import checklists.jsonl
+"""
+import sys
+import json
+import logging
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .templates import current_templates
+from .models import ChecklistCategory, ChecklistItem, ChecklistSection
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+# Parents are resolved by name inside the INSERT, so no id lookups are held in memory
+UPSERTS = {
+    "category": text("""
+        INSERT INTO checklist_categories (name, description)
+        VALUES (:name, :description)
+        ON CONFLICT (name) DO UPDATE SET description = excluded.description
+    """),
+    "section": text("""
+        INSERT INTO checklist_sections (category_id, name, description, "order")
+        SELECT c.id, :name, :description, :order
+        FROM checklist_categories c
+        WHERE c.name = :category
+        ON CONFLICT (category_id, name) DO UPDATE SET
+            description = excluded.description,
+            "order" = excluded."order"
+    """),
+    "item": text("""
+        INSERT INTO checklist_items (section_id, description, "order")
+        SELECT s.id, :description, :order
+        FROM checklist_sections s JOIN checklist_categories c ON c.id = s.category_id
+        WHERE c.name = :category AND s.name = :section
+        ON CONFLICT (section_id, description) DO UPDATE SET "order" = excluded."order"
+    """)
+}
+
+REQUIRED_FIELDS = {
+    "category": ("name",),
+    "section": ("category", "name", "order"),
+    "item": ("category", "section", "description", "order")
+}
+
+class ChecklistImportError(ValueError):
+    pass
+
+def parse_record(line: str, line_number: int) -> Dict:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ChecklistImportError(f"Line {line_number}: invalid JSON ({e.msg})")
+    if not isinstance(record, dict):
+        raise ChecklistImportError(f"Line {line_number}: expected an object")
+    kind = record.get("type")
+    if kind not in REQUIRED_FIELDS:
+        raise ChecklistImportError(f"Line {line_number}: unknown record type {kind!r}")
+    missing = [field for field in REQUIRED_FIELDS[kind] if record.get(field) in (None, "")]
+    if missing:
+        raise ChecklistImportError(f"Line {line_number}: {kind} is missing {', '.join(missing)}")
+
+    if kind == "category":
+        return {"type": kind, "name": record["name"], "description": record.get("description")}
+    try:
+        order = int(record["order"])
+    except (TypeError, ValueError):
+        raise ChecklistImportError(f"Line {line_number}: order must be an integer")
+    if kind == "section":
+        return {
+            "type": kind, "category": record["category"], "name": record["name"],
+            "description": record.get("description"), "order": order
+        }
+    return {
+        "type": kind, "category": record["category"], "section": record["section"],
+        "description": record["description"], "order": order
+    }
+
+def import_jsonl(db: Session, lines: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+    """Upsert checklist records from JSON Lines, all in one transaction.
+
+    Records are buffered per type and written with one executemany per
+    type whenever ``batch_size`` records are waiting, so memory stays
+    constant however large the input. Buffers are always flushed
+    categories first, so a record's parent is written before it. Records
+    whose parent does not exist are counted as skipped. On any error
+    nothing is imported.
+    """
+    stats = {"lines": 0, "category": 0, "section": 0, "item": 0, "skipped": 0}
+    pending: Dict[str, List[Dict]] = {kind: [] for kind in UPSERTS}
+
+    def flush():
+        for kind, rows in pending.items():
+            if rows:
+                written = db.execute(UPSERTS[kind], rows).rowcount
+                stats[kind] += written
+                stats["skipped"] += len(rows) - written
+                rows.clear()
+
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            record = parse_record(line, line_number)
+            pending[record.pop("type")].append(record)
+            stats["lines"] += 1
+            if sum(len(rows) for rows in pending.values()) >= batch_size:
+                flush()
+        flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Runs cache the current template version of each category
+    current_templates.invalidate()
+    return {
+        "lines": stats["lines"],
+        "categories": stats["category"],
+        "sections": stats["section"],
+        "items": stats["item"],
+        "skipped": stats["skipped"]
+    }
+
+def export_jsonl(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Yield the checklist templates as JSON Lines, category by category.
+
+    Items are streamed from the database ``batch_size`` rows at a time.
+    """
+    def line(record: Dict) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    categories = db.query(ChecklistCategory.id, ChecklistCategory.name, ChecklistCategory.description)
+    for category in categories.order_by(ChecklistCategory.id).all():
+        yield line({"type": "category", "name": category.name, "description": category.description})
+        sections = (
+            db.query(ChecklistSection.name, ChecklistSection.description, ChecklistSection.order)
+            .filter(ChecklistSection.category_id == category.id)
+            .order_by(ChecklistSection.order, ChecklistSection.id)
+            .all()
+        )
+        for section in sections:
+            yield line({
+                "type": "section", "category": category.name, "name": section.name,
+                "description": section.description, "order": section.order
+            })
+        items = (
+            db.query(ChecklistSection.name, ChecklistItem.description, ChecklistItem.order)
+            .select_from(ChecklistItem)
+            .join(ChecklistItem.section)
+            .filter(ChecklistSection.category_id == category.id)
+            .order_by(ChecklistSection.order, ChecklistSection.id, ChecklistItem.order, ChecklistItem.id)
+            .yield_per(batch_size)
+        )
+        for item in items:
+            yield line({
+                "type": "item", "category": category.name, "section": item.name,
+                "description": item.description, "order": item.order
+            })
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import or export checklist templates as JSON Lines")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export_parser = subcommands.add_parser("export", help="write every checklist template")
+    export_parser.add_argument("path", nargs="?", help="output file (default: stdout)")
+    import_parser = subcommands.add_parser("import", help="upsert checklist templates")
+    import_parser.add_argument("path", help="input file, or - for stdin")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from .connection import SessionLocal
+    load_dotenv()
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            out: TextIO = open(args.path, "w", encoding="utf-8") if args.path else sys.stdout
+            try:
+                out.writelines(export_jsonl(db))
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+        else:
+            source: TextIO = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+            try:
+                stats = import_jsonl(db, source)
+            except ChecklistImportError as e:
+                parser.exit(1, f"Import failed: {e}\n")
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+            print(json.dumps(stats))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
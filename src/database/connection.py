@@ -1,56 +1,69 @@
 import os
+import time
 import logging
+import threading
+from typing import Optional
+
 from sqlalchemy import create_engine, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# Get environment
-ENV = os.getenv("ENV", "development")
-logger.info(f"Running in {ENV} environment")
-
 # SQLite database URL with absolute path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# In production (cPanel), we need to use a path relative to the home directory
-if ENV == "production":
-    # Get user's home directory (usually something like /home/username in cPanel)
-    HOME_DIR = os.path.expanduser("~")
-    DATABASE_PATH = os.path.join(HOME_DIR, "checklist.db")
-else:
+# Nothing below touches the database or the environment at import time;
+# the engine is created on first use, after the application (or script)
+# has loaded its .env file.
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def database_path() -> str:
+    # In production (cPanel), we need to use a path relative to the home directory
+    if os.getenv("ENV", "development") == "production":
+        # Get user's home directory (usually something like /home/username in cPanel)
+        return os.path.join(os.path.expanduser("~"), "checklist.db")
     # In development, use the project directory
-    DATABASE_PATH = os.path.join(BASE_DIR, "checklist.db")
-
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
-logger.info(f"Using database at: {DATABASE_PATH}")
-
-# Create SQLAlchemy engine with SQLite
-try:
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}  # Needed for SQLite
-    )
-    
-    # Test the connection
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-        logger.info("Successfully connected to the database")
-except Exception as e:
-    logger.error(f"Error connecting to database: {str(e)}")
-    raise
+    return os.path.join(BASE_DIR, "checklist.db")
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine() -> Engine:
+    """The application's engine, created on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                path = database_path()
+                logger.info(f"Running in {os.getenv('ENV', 'development')} environment")
+                logger.info(f"Using database at: {path}")
+                _engine = create_engine(
+                    f"sqlite:///{path}",
+                    connect_args={"check_same_thread": False}  # Needed for SQLite
+                )
+    return _engine
 
-# Create base class for declarative models
-Base = declarative_base()
+def ping_database(db: Optional[Session] = None) -> float:
+    """Run ``SELECT 1`` and return how long it took, in milliseconds."""
+    started = time.perf_counter()
+    if db is not None:
+        db.execute(text("SELECT 1"))
+    else:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    return (time.perf_counter() - started) * 1000
+
+class _LazySessionmaker(sessionmaker):
+    """A sessionmaker that binds to ``get_engine()`` when a session is made."""
+
+    def __call__(self, **local_kw) -> Session:
+        if "bind" not in local_kw and self.kw.get("bind") is None:
+            local_kw["bind"] = get_engine()
+        return super().__call__(**local_kw)
+
+# Create session factory
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 
 # Dependency to get database session
 def get_db():
@@ -58,4 +71,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -0,0 +1,198 @@
+"""
+Durable conversation history storage with write-behind batching
+"""
+import os
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from .models import ConversationMessage
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_MS = int(os.getenv("CONVERSATION_FLUSH_INTERVAL_MS", "250"))
+MAX_PENDING_WRITES = int(os.getenv("CONVERSATION_MAX_PENDING_WRITES", "10000"))
+
+class ConversationStore:
+    """Persists conversation messages to the database behind a write queue.
+
+    ``enqueue`` only appends to an in-memory queue, so saving a message never
+    adds latency to a chat response. A background thread flushes the queue
+    every ``flush_interval_ms`` as one batched insert per transaction.
+    ``load_session`` is used to hydrate sessions that are not in memory,
+    e.g. after a worker restart.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+        max_pending: int = MAX_PENDING_WRITES
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._pending = deque()  # ("insert", row) or ("delete", session_id)
+        self._in_flight: List = []  # operations taken by a flush that has not finished
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, session_id: str, role: str, content: str, created_at: datetime):
+        """Queue a message for the next batched write."""
+        self._push(("insert", {
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "created_at": created_at
+        }))
+
+    def delete_session(self, session_id: str):
+        """Queue removal of every persisted message of a session."""
+        self._push(("delete", session_id))
+
+    def load_session(self, session_id: str, since: Optional[datetime] = None) -> List[Dict]:
+        """Read a session's messages, including writes that are still queued.
+
+        Neither lock is held during the database read. Operations queued or
+        being flushed when the read starts are snapshotted first: anything
+        not in the snapshot was committed before it, so the read sees it,
+        and snapshot inserts a flush committed in the meantime are merged
+        rather than repeated.
+        """
+        with self._lock:
+            queued = self._in_flight + list(self._pending)
+
+        session = self.session_factory()
+        try:
+            query = session.query(ConversationMessage).filter(
+                ConversationMessage.session_id == session_id
+            )
+            if since is not None:
+                query = query.filter(ConversationMessage.created_at > since)
+            messages = [
+                {
+                    "role": row.role,
+                    "content": row.content,
+                    "timestamp": row.created_at
+                }
+                for row in query.order_by(ConversationMessage.created_at, ConversationMessage.id)
+            ]
+        finally:
+            session.close()
+
+        seen = {(m["role"], m["content"], m["timestamp"]) for m in messages}
+        for kind, payload in queued:
+            if kind == "delete" and payload == session_id:
+                messages = []
+                seen = set()
+            elif kind == "insert" and payload["session_id"] == session_id:
+                message = (payload["role"], payload["content"], payload["created_at"])
+                if (since is None or payload["created_at"] > since) and message not in seen:
+                    seen.add(message)
+                    messages.append({
+                        "role": payload["role"],
+                        "content": payload["content"],
+                        "timestamp": payload["created_at"]
+                    })
+        return messages
+
+    def flush(self) -> int:
+        """Write all queued operations in a single transaction.
+
+        Returns the number of operations written. On failure the operations
+        are put back at the head of the queue and retried on the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                ops = list(self._pending)
+                self._pending.clear()
+                # Stay visible to load_session until committed or requeued
+                self._in_flight = ops
+            if not ops:
+                return 0
+
+            session = self.session_factory()
+            try:
+                batch = []
+                for kind, payload in ops:
+                    if kind == "insert":
+                        batch.append(payload)
+                        continue
+                    if batch:
+                        session.execute(insert(ConversationMessage.__table__), batch)
+                        batch = []
+                    session.execute(
+                        delete(ConversationMessage.__table__).where(
+                            ConversationMessage.session_id == payload
+                        )
+                    )
+                if batch:
+                    session.execute(insert(ConversationMessage.__table__), batch)
+                session.commit()
+                with self._lock:
+                    self._in_flight = []
+                return len(ops)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error flushing conversation messages: {str(e)}")
+                with self._lock:
+                    self._in_flight = []
+                    self._pending.extendleft(reversed(ops))
+                    self._trim()
+                return 0
+            finally:
+                session.close()
+
+    def start(self):
+        """Start the background flush thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="conversation-store-writer",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flush thread and write whatever is still queued."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _push(self, op):
+        with self._lock:
+            self._pending.append(op)
+            self._trim()
+
+    def _trim(self):
+        # Called with self._lock held. Drops the oldest writes rather than
+        # growing without bound while the database is unavailable.
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            for _ in range(overflow):
+                self._pending.popleft()
+            logger.warning(f"Conversation write queue full, dropped {overflow} oldest writes")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,198 @@
+"""
+Inspection runs: per-vessel checklist completion stored as bitsets
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .item_events import record_item_event
+from .models import InspectionRun, InspectionRunItem
+from .templates import TemplateSnapshot, current_templates, template_snapshots
+
+logger = logging.getLogger(__name__)
+
+RUN_UPDATE_RETRIES = 5
+
+# Bit n of a bitset is bit (n % 8) of byte (n // 8). In a run, bit n is
+# the n-th item of the template version the run was started from, so a
+# run needs at most one bit per item of its own checklist and stores
+# nothing per item until something is checked.
+
+def bitset_to_int(bits: bytes) -> int:
+    return int.from_bytes(bits, "little")
+
+def int_to_bitset(value: int) -> bytes:
+    return value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+def bitset_from_ids(ids: Iterable[int]) -> bytes:
+    value = 0
+    for item_id in ids:
+        value |= 1 << item_id
+    return int_to_bitset(value)
+
+def ids_from_bitset(bits: bytes) -> List[int]:
+    value = bitset_to_int(bits)
+    ids = []
+    while value:
+        low = value & -value
+        ids.append(low.bit_length() - 1)
+        value ^= low
+    return ids
+
+def with_bit(bits: bytes, index: int, set_bit: bool) -> bytes:
+    value = bitset_to_int(bits)
+    value = value | (1 << index) if set_bit else value & ~(1 << index)
+    return int_to_bitset(value)
+
+def has_bit(bits: bytes, index: int) -> bool:
+    byte = index // 8
+    return byte < len(bits) and bool(bits[byte] >> (index % 8) & 1)
+
+def popcount(bits: bytes, mask: Optional[int] = None) -> int:
+    """Number of set bits, optionally only those also set in ``mask``."""
+    value = bitset_to_int(bits)
+    return (value & mask if mask is not None else value).bit_count()
+
+class RunConflictError(RuntimeError):
+    pass
+
+def create_run(db: Session, vessel: str, category_id: int) -> InspectionRun:
+    """Start a run from the category's current template version.
+
+    A new template version is published first if the template changed
+    since the last one; the current version is cached until the catalog
+    changes. Nothing is copied per item, so the run itself is a single
+    insert.
+    """
+    run = InspectionRun(
+        vessel=vessel, category_id=category_id, template_version_id=current_templates.get(db, category_id),
+        completed_bits=b"", version=0
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+def get_run(db: Session, run_id: int) -> Optional[InspectionRun]:
+    return db.query(InspectionRun).filter(InspectionRun.id == run_id).first()
+
+def run_template(db: Session, run: InspectionRun) -> TemplateSnapshot:
+    """The template version a run was started from."""
+    return template_snapshots.get(db, run.template_version_id)
+
+def run_progress(db: Session, run: InspectionRun) -> Dict:
+    template = run_template(db, run)
+    completed = popcount(run.completed_bits, template.mask)
+    total = template.total
+    return {
+        "completed": completed,
+        "total": total,
+        "percent": round(100 * completed / total, 1) if total else 0.0
+    }
+
+def update_run_item(
+    db: Session,
+    run: InspectionRun,
+    item_id: int,
+    is_completed: bool,
+    notes: Optional[str] = None,
+    checked_by: Optional[str] = None
+) -> InspectionRun:
+    """Set one item's completion in a run.
+
+    The bitset is replaced with a compare-and-set on ``version`` and
+    retried if another request changed the run in between, so concurrent
+    updates to different items of the same run never overwrite each other.
+    """
+    position = run_template(db, run).position(item_id)
+    if position is None:
+        raise ValueError(f"Item {item_id} is not part of the checklist of run {run.id}")
+
+    for _ in range(RUN_UPDATE_RETRIES):
+        version = run.version
+        bits = with_bit(run.completed_bits, position, is_completed)
+        updated = (
+            db.query(InspectionRun)
+            .filter(InspectionRun.id == run.id, InspectionRun.version == version)
+            .update({"completed_bits": bits, "version": version + 1}, synchronize_session=False)
+        )
+        if updated:
+            break
+        db.rollback()
+        db.refresh(run)
+    else:
+        raise RunConflictError(f"Run {run.id} is being updated too often; try again")
+
+    if notes is not None or checked_by is not None:
+        detail = db.query(InspectionRunItem).filter(
+            InspectionRunItem.run_id == run.id, InspectionRunItem.item_id == item_id
+        ).first()
+        if detail is None:
+            detail = InspectionRunItem(run_id=run.id, item_id=item_id)
+            db.add(detail)
+        if notes is not None:
+            detail.notes = notes
+        if checked_by is not None:
+            detail.checked_by = checked_by
+        detail.checked_at = datetime.utcnow()
+
+    record_item_event(
+        db, item_id, "completed" if is_completed else "uncompleted",
+        actor=checked_by, source="run", run_id=run.id
+    )
+    db.commit()
+    db.refresh(run)
+    return run
+
+def finish_run(db: Session, run: InspectionRun) -> InspectionRun:
+    db.query(InspectionRun).filter(
+        InspectionRun.id == run.id, InspectionRun.finished_at.is_(None)
+    ).update(
+        {"finished_at": datetime.utcnow(), "version": InspectionRun.version + 1},
+        synchronize_session=False
+    )
+    db.commit()
+    db.refresh(run)
+    return run
+
+def run_items(db: Session, run: InspectionRun) -> List[Dict]:
+    """The run's items: its template merged with the run's own state.
+
+    The template comes from the cached snapshot of the run's version; the
+    overlay is the run's bitset plus detail rows for the few items that
+    have notes. Nothing about the template is stored per run.
+    """
+    snapshot = run_template(db, run)
+    details = {detail.item_id: detail for detail in run.item_details}
+    items = []
+    for section in snapshot.content["sections"]:
+        for item in section["items"]:
+            detail = details.get(item["id"])
+            items.append({
+                "id": item["id"],
+                "section_id": section["id"],
+                "description": item["description"],
+                "is_completed": has_bit(run.completed_bits, snapshot.positions[item["id"]]),
+                "notes": detail.notes if detail else None,
+                "checked_by": detail.checked_by if detail else None,
+                "checked_at": detail.checked_at.isoformat() if detail and detail.checked_at else None
+            })
+    return items
+
+def run_to_dict(db: Session, run: InspectionRun, include_items: bool = False) -> Dict:
+    snapshot = run_template(db, run)
+    result = {
+        "id": run.id,
+        "vessel": run.vessel,
+        "category_id": run.category_id,
+        "template_version": snapshot.version,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "version": run.version,
+        "progress": run_progress(db, run)
+    }
+    if include_items:
+        result["items"] = run_items(db, run)
+    return result
@@ -0,0 +1,203 @@
+"""
+Append-only audit log of checklist item changes, with daily compaction
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import ChecklistItemEvent, ChecklistItemEventRollup
+
+logger = logging.getLogger(__name__)
+
+ITEM_EVENT_RETENTION_DAYS = int(os.getenv("ITEM_EVENT_RETENTION_DAYS", "90"))
+ITEM_EVENT_COMPACTION_INTERVAL = float(os.getenv("ITEM_EVENT_COMPACTION_INTERVAL", str(6 * 3600)))  # seconds
+
+_PENDING_KEY = "checklist_item_events"
+# Rows inserted by the commit in progress, for listeners that fold them into aggregates
+WRITTEN_KEY = "checklist_item_events_written"
+
+def record_item_event(
+    db: Session,
+    item_id: int,
+    name: str,
+    actor: Optional[str] = None,
+    source: Optional[str] = None,
+    run_id: Optional[int] = None,
+    created_at: Optional[datetime] = None
+):
+    """Queue an event to be written by the session's next commit.
+
+    Events are buffered on the session and inserted with one executemany
+    just before it commits, inside the same transaction as the state
+    change they describe: both are saved or neither is.
+    """
+    db.info.setdefault(_PENDING_KEY, []).append({
+        "item_id": item_id,
+        "run_id": run_id,
+        "event": name,
+        "actor": actor,
+        "source": source,
+        "created_at": created_at or datetime.utcnow()
+    })
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_events(session: Session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        session.execute(ChecklistItemEvent.__table__.insert(), rows)
+        session.info[WRITTEN_KEY] = rows
+
+@event.listens_for(Session, "after_commit")
+def _forget_written_events(session: Session):
+    session.info.pop(WRITTEN_KEY, None)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(WRITTEN_KEY, None)
+
+def compact_item_events(db: Session, before: datetime) -> int:
+    """Fold events from whole days before ``before`` into daily rollups.
+
+    Runs in one ``BEGIN IMMEDIATE`` transaction: the write lock is taken
+    before anything is read, so compactors in several workers never fold
+    the same events twice. Rollups are upserted straight from an
+    aggregate over the events (counts add up if a day is compacted in
+    two passes) and exactly those events are deleted. Returns the number
+    of events compacted.
+    """
+    cutoff = datetime.combine(before.date(), time.min)
+    db.execute(text("BEGIN IMMEDIATE"))
+    try:
+        last_id = db.query(func.max(ChecklistItemEvent.id)).filter(ChecklistItemEvent.created_at < cutoff).scalar()
+        if last_id is None:
+            db.rollback()
+            return 0
+        compactable = (ChecklistItemEvent.created_at < cutoff, ChecklistItemEvent.id <= last_id)
+
+        day = func.date(ChecklistItemEvent.created_at)
+        groups = (
+            select(
+                day, ChecklistItemEvent.item_id, ChecklistItemEvent.event, func.count(ChecklistItemEvent.id),
+                func.min(ChecklistItemEvent.created_at), func.max(ChecklistItemEvent.created_at)
+            )
+            .where(*compactable)
+            .group_by(day, ChecklistItemEvent.item_id, ChecklistItemEvent.event)
+        )
+        upsert = sqlite_insert(ChecklistItemEventRollup).from_select(
+            ["day", "item_id", "event", "count", "first_at", "last_at"], groups
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["day", "item_id", "event"],
+            set_={
+                "count": ChecklistItemEventRollup.count + upsert.excluded["count"],
+                "first_at": func.min(ChecklistItemEventRollup.first_at, upsert.excluded.first_at),
+                "last_at": func.max(ChecklistItemEventRollup.last_at, upsert.excluded.last_at)
+            }
+        )
+        db.execute(upsert)
+        compacted = (
+            db.query(ChecklistItemEvent)
+            .filter(*compactable)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return compacted
+
+def item_history(
+    db: Session,
+    item_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 200
+) -> Dict:
+    """Recent events for an item (newest first) plus daily rollups of older ones."""
+    events = db.query(ChecklistItemEvent).filter(ChecklistItemEvent.item_id == item_id)
+    rollups = db.query(ChecklistItemEventRollup).filter(ChecklistItemEventRollup.item_id == item_id)
+    if since is not None:
+        events = events.filter(ChecklistItemEvent.created_at >= since)
+        rollups = rollups.filter(ChecklistItemEventRollup.day >= since.date())
+    if until is not None:
+        events = events.filter(ChecklistItemEvent.created_at < until)
+        rollups = rollups.filter(ChecklistItemEventRollup.day <= until.date())
+
+    events = events.order_by(ChecklistItemEvent.created_at.desc(), ChecklistItemEvent.id.desc()).limit(limit)
+    rollups = rollups.order_by(ChecklistItemEventRollup.day.desc(), ChecklistItemEventRollup.event)
+    return {
+        "item_id": item_id,
+        "events": [
+            {
+                "id": row.id,
+                "event": row.event,
+                "actor": row.actor,
+                "source": row.source,
+                "run_id": row.run_id,
+                "created_at": row.created_at.isoformat()
+            }
+            for row in events
+        ],
+        "daily": [
+            {
+                "day": row.day.isoformat(),
+                "event": row.event,
+                "count": row.count,
+                "first_at": row.first_at.isoformat(),
+                "last_at": row.last_at.isoformat()
+            }
+            for row in rollups
+        ]
+    }
+
+class ItemEventCompactor:
+    """Periodically compacts events older than ``retention_days``."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        retention_days: int = ITEM_EVENT_RETENTION_DAYS,
+        interval: float = ITEM_EVENT_COMPACTION_INTERVAL
+    ):
+        self.session_factory = session_factory
+        self.retention_days = retention_days
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def compact(self) -> int:
+        db = self.session_factory()
+        try:
+            compacted = compact_item_events(db, datetime.utcnow() - timedelta(days=self.retention_days))
+            if compacted:
+                logger.info(f"Compacted {compacted} checklist item events into daily rollups")
+            return compacted
+        finally:
+            db.close()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                logger.error(f"Error compacting checklist item events: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
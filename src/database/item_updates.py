@@ -0,0 +1,116 @@
+"""
+Compare-and-set updates of checklist item state
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .item_events import record_item_event
+from .models import ChecklistItem
+
+logger = logging.getLogger(__name__)
+
+ITEM_UPDATE_RETRIES = 5
+UPDATABLE_FIELDS = ("is_completed", "notes")
+
+class ItemConflictError(RuntimeError):
+    """The item was changed by someone else in a way that clashes with the update."""
+
+    def __init__(self, item: ChecklistItem, fields: List[str]):
+        self.item = item_to_dict(item)
+        self.fields = fields
+        super().__init__(f"Item {item.id} was changed concurrently ({', '.join(fields) or 'too often'})")
+
+def item_to_dict(item: ChecklistItem) -> Dict:
+    return {
+        "id": item.id,
+        "description": item.description,
+        "is_completed": item.is_completed,
+        "notes": item.notes,
+        "last_checked": item.last_checked.isoformat() if item.last_checked else None,
+        "checked_by": item.checked_by,
+        "version": item.version
+    }
+
+def _load(db: Session, item_id: int) -> Optional[ChecklistItem]:
+    return db.query(ChecklistItem).populate_existing().filter(ChecklistItem.id == item_id).first()
+
+def update_item(
+    db: Session,
+    item_id: int,
+    changes: Dict,
+    expected_version: Optional[int] = None,
+    checked_by: Optional[str] = None,
+    source: Optional[str] = None,
+    commit: bool = True
+) -> Optional[ChecklistItem]:
+    """Apply ``changes`` (a subset of is_completed and notes) to an item.
+
+    The row is written with ``UPDATE ... WHERE id = ? AND version = ?``,
+    so no lock is held between reading and writing. If another writer got
+    in first, the update is retried against the fresh row as long as that
+    writer changed other fields; if it changed one of ours to something
+    else, ``ItemConflictError`` is raised.
+
+    ``expected_version`` is the version the client last saw. When it is
+    stale, the update only goes through for fields that already hold the
+    requested value; anything else is a conflict the client must resolve.
+    ``checked_by`` is saved even when nothing else changes.
+
+    With ``commit=False`` the update and its event are left in the
+    session's transaction, so several items can be saved with one commit.
+    Returns None if the item does not exist.
+    """
+    changes = {field: value for field, value in changes.items() if field in UPDATABLE_FIELDS}
+    item = _load(db, item_id)
+    if item is None:
+        return None
+
+    if expected_version is not None and item.version != expected_version:
+        stale = [field for field, value in changes.items() if getattr(item, field) != value]
+        if stale:
+            raise ItemConflictError(item, stale)
+    seen = {field: getattr(item, field) for field in changes}
+
+    for _ in range(ITEM_UPDATE_RETRIES):
+        # Fields another writer changed since we first read the item
+        clashing = [
+            field for field, value in changes.items()
+            if getattr(item, field) != seen[field] and getattr(item, field) != value
+        ]
+        if clashing:
+            raise ItemConflictError(item, clashing)
+
+        values = {field: value for field, value in changes.items() if getattr(item, field) != value}
+        if values.get("is_completed"):
+            values["last_checked"] = datetime.utcnow()
+        if checked_by is not None and (values or item.checked_by != checked_by):
+            values["checked_by"] = checked_by
+        if not values:
+            return item
+
+        version = item.version
+        updated = (
+            db.query(ChecklistItem)
+            .filter(ChecklistItem.id == item_id, ChecklistItem.version == version)
+            .update({**values, "version": version + 1}, synchronize_session=False)
+        )
+        if updated:
+            if "is_completed" in values:
+                record_item_event(
+                    db, item_id, "completed" if values["is_completed"] else "uncompleted",
+                    actor=checked_by, source=source
+                )
+            if commit:
+                db.commit()
+            return _load(db, item_id)
+
+        # Without commit, rolling back would also drop the caller's earlier writes
+        if commit:
+            db.rollback()
+        item = _load(db, item_id)
+        if item is None:
+            return None
+    raise ItemConflictError(item, [])
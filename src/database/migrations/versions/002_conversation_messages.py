@@ -0,0 +1,35 @@
+"""conversation messages
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-03-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create conversation_messages table for persisted chat history
+    op.create_table(
+        'conversation_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('content', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_conversation_messages_session_created',
+        'conversation_messages',
+        ['session_id', 'created_at']
+    )
+
+def downgrade():
+    op.drop_index('ix_conversation_messages_session_created', table_name='conversation_messages')
+    op.drop_table('conversation_messages')
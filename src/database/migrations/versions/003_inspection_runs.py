@@ -0,0 +1,52 @@
+"""inspection runs
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-03-11 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create inspection_runs table; item completion is a bitset per run
+    op.create_table(
+        'inspection_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vessel', sa.String(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_bits', sa.LargeBinary(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['checklist_categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_inspection_runs_vessel_started',
+        'inspection_runs',
+        ['vessel', 'started_at']
+    )
+
+    # Create inspection_run_items table for per-run notes and checkers
+    op.create_table(
+        'inspection_run_items',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('checked_by', sa.String(), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['inspection_runs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['item_id'], ['checklist_items.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id', 'item_id')
+    )
+
+def downgrade():
+    op.drop_table('inspection_run_items')
+    op.drop_index('ix_inspection_runs_vessel_started', table_name='inspection_runs')
+    op.drop_table('inspection_runs')
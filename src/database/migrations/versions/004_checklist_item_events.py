@@ -0,0 +1,56 @@
+"""checklist item events
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-03-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create the append-only checklist_item_events table
+    op.create_table(
+        'checklist_item_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=True),
+        sa.Column('event', sa.String(), nullable=False),
+        sa.Column('actor', sa.String(), nullable=True),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_checklist_item_events_item_created',
+        'checklist_item_events',
+        ['item_id', 'created_at']
+    )
+    op.create_index(
+        'ix_checklist_item_events_created',
+        'checklist_item_events',
+        ['created_at']
+    )
+
+    # Create checklist_item_event_rollups for compacted daily counts
+    op.create_table(
+        'checklist_item_event_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'item_id', 'event')
+    )
+
+def downgrade():
+    op.drop_table('checklist_item_event_rollups')
+    op.drop_index('ix_checklist_item_events_created', table_name='checklist_item_events')
+    op.drop_index('ix_checklist_item_events_item_created', table_name='checklist_item_events')
+    op.drop_table('checklist_item_events')
@@ -0,0 +1,38 @@
+"""search index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-03-25 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from triggers import drop_search_index_ddl, search_index_backfill_ddl, search_index_ddl
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def fts5_available(bind) -> bool:
+    if bind.dialect.name != 'sqlite':
+        return False
+    return bool(bind.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+def upgrade():
+    bind = op.get_bind()
+    if not fts5_available(bind):
+        # /api/search falls back to LIKE queries without the index
+        return
+
+    # Create the search_index FTS5 table, kept in sync with triggers on each source table
+    for statement in search_index_ddl():
+        op.execute(statement)
+    # Index existing rows
+    for statement in search_index_backfill_ddl():
+        op.execute(statement)
+
+def downgrade():
+    for statement in drop_search_index_ddl():
+        op.execute(statement)
@@ -0,0 +1,35 @@
+"""checklist natural keys
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-04-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Unique natural keys so checklist imports can upsert
+    op.create_index('ux_checklist_categories_name', 'checklist_categories', ['name'], unique=True)
+    op.create_index(
+        'ux_checklist_sections_category_name',
+        'checklist_sections',
+        ['category_id', 'name'],
+        unique=True
+    )
+    op.create_index(
+        'ux_checklist_items_section_description',
+        'checklist_items',
+        ['section_id', 'description'],
+        unique=True
+    )
+
+def downgrade():
+    op.drop_index('ux_checklist_items_section_description', table_name='checklist_items')
+    op.drop_index('ux_checklist_sections_category_name', table_name='checklist_sections')
+    op.drop_index('ux_checklist_categories_name', table_name='checklist_categories')
@@ -0,0 +1,52 @@
+"""template versions
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-04-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create checklist_template_versions for immutable template snapshots
+    op.create_table(
+        'checklist_template_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('snapshot', sa.String(), nullable=False),
+        sa.Column('note', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['checklist_categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ux_checklist_template_versions_category_version',
+        'checklist_template_versions',
+        ['category_id', 'version'],
+        unique=True
+    )
+
+    # Runs reference the template version they were started from
+    with op.batch_alter_table('inspection_runs') as batch_op:
+        batch_op.add_column(sa.Column('template_version_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_inspection_runs_template_version',
+            'checklist_template_versions',
+            ['template_version_id'],
+            ['id']
+        )
+
+def downgrade():
+    with op.batch_alter_table('inspection_runs') as batch_op:
+        batch_op.drop_constraint('fk_inspection_runs_template_version', type_='foreignkey')
+        batch_op.drop_column('template_version_id')
+    op.drop_index('ux_checklist_template_versions_category_version', table_name='checklist_template_versions')
+    op.drop_table('checklist_template_versions')
@@ -0,0 +1,25 @@
+"""checklist item version
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-04-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Version counter for compare-and-set item updates
+    op.add_column(
+        'checklist_items',
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False)
+    )
+
+def downgrade():
+    with op.batch_alter_table('checklist_items') as batch_op:
+        batch_op.drop_column('version')
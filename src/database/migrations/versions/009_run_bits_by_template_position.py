@@ -0,0 +1,119 @@
+"""run bits by template position
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-04-22 10:00:00.000000
+
+"""
+import json
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+def _template_content(conn, category_id):
+    # Same shape as src.database.templates.template_content at this revision
+    category = conn.execute(
+        sa.text("SELECT id, name, description FROM checklist_categories WHERE id = :id"), {"id": category_id}
+    ).first()
+    sections = conn.execute(sa.text(
+        'SELECT id, name, description, "order" FROM checklist_sections '
+        'WHERE category_id = :id ORDER BY "order", id'
+    ), {"id": category_id}).all()
+    content = {
+        "category": {"id": category.id, "name": category.name, "description": category.description},
+        "sections": []
+    }
+    for section in sections:
+        items = conn.execute(sa.text(
+            'SELECT id, description, "order" FROM checklist_items WHERE section_id = :id ORDER BY "order", id'
+        ), {"id": section.id}).all()
+        content["sections"].append({
+            "id": section.id,
+            "name": section.name,
+            "description": section.description,
+            "order": section.order,
+            "items": [{"id": item.id, "description": item.description, "order": item.order} for item in items]
+        })
+    return content
+
+def _pin_version(conn, category_id):
+    """Id of a template version matching the category's live template, publishing one if needed."""
+    content = _template_content(conn, category_id)
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+    latest = conn.execute(sa.text(
+        "SELECT id, version, content_hash FROM checklist_template_versions "
+        "WHERE category_id = :id ORDER BY version DESC LIMIT 1"
+    ), {"id": category_id}).first()
+    if latest is not None and latest.content_hash == digest:
+        return latest.id
+    conn.execute(sa.text(
+        "INSERT INTO checklist_template_versions (category_id, version, content_hash, snapshot, note) "
+        "VALUES (:category_id, :version, :hash, :snapshot, 'Pinned runs started before versioning')"
+    ), {
+        "category_id": category_id,
+        "version": (latest.version + 1) if latest else 1,
+        "hash": digest,
+        "snapshot": json.dumps(content)
+    })
+    return conn.execute(sa.text(
+        "SELECT id FROM checklist_template_versions WHERE category_id = :id ORDER BY version DESC LIMIT 1"
+    ), {"id": category_id}).scalar()
+
+def _template_item_ids(conn, version_id):
+    snapshot = json.loads(conn.execute(
+        sa.text("SELECT snapshot FROM checklist_template_versions WHERE id = :id"), {"id": version_id}
+    ).scalar())
+    return [item["id"] for section in snapshot["sections"] for item in section["items"]]
+
+def _reencode(bits, moves):
+    value = int.from_bytes(bits or b"", "little")
+    result = 0
+    for source, target in moves:
+        if value >> source & 1:
+            result |= 1 << target
+    return result.to_bytes((result.bit_length() + 7) // 8, "little")
+
+def _rewrite_bits(conn, to_positions):
+    item_ids = {}
+    runs = conn.execute(sa.text("SELECT id, template_version_id, completed_bits FROM inspection_runs")).all()
+    for run in runs:
+        if run.template_version_id not in item_ids:
+            item_ids[run.template_version_id] = _template_item_ids(conn, run.template_version_id)
+        ids = item_ids[run.template_version_id]
+        moves = [(item_id, position) if to_positions else (position, item_id) for position, item_id in enumerate(ids)]
+        conn.execute(
+            sa.text("UPDATE inspection_runs SET completed_bits = :bits WHERE id = :id"),
+            {"bits": _reencode(run.completed_bits, moves), "id": run.id}
+        )
+
+def upgrade():
+    conn = op.get_bind()
+    # Pin runs started before template versioning to the live template
+    categories = conn.execute(sa.text(
+        "SELECT DISTINCT category_id FROM inspection_runs WHERE template_version_id IS NULL"
+    )).scalars().all()
+    for category_id in categories:
+        conn.execute(
+            sa.text(
+                "UPDATE inspection_runs SET template_version_id = :version_id "
+                "WHERE category_id = :category_id AND template_version_id IS NULL"
+            ),
+            {"version_id": _pin_version(conn, category_id), "category_id": category_id}
+        )
+
+    # Bit n now means the n-th item of the run's template instead of item id n
+    _rewrite_bits(conn, to_positions=True)
+
+    with op.batch_alter_table('inspection_runs') as batch_op:
+        batch_op.alter_column('template_version_id', existing_type=sa.Integer(), nullable=False)
+
+def downgrade():
+    with op.batch_alter_table('inspection_runs') as batch_op:
+        batch_op.alter_column('template_version_id', existing_type=sa.Integer(), nullable=True)
+    _rewrite_bits(op.get_bind(), to_positions=False)
@@ -0,0 +1,24 @@
+"""checklist data version
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-04-29 10:00:00.000000
+
+"""
+from alembic import op
+
+from triggers import data_version_ddl, drop_data_version_ddl
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Counter the read replica polls to tell whether checklist data changed
+    for statement in data_version_ddl():
+        op.execute(statement)
+
+def downgrade():
+    for statement in drop_data_version_ddl():
+        op.execute(statement)
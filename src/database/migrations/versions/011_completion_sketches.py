@@ -0,0 +1,40 @@
+"""completion sketches
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-05-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Completion-time sketches per item, folded in as item events are written
+    op.create_table(
+        'completion_sketches',
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('sketch', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('item_id')
+    )
+    op.create_table(
+        'completion_analytics_cursor',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Previous completion in a run, looked up for each new one
+    op.create_index(
+        'ix_checklist_item_events_run',
+        'checklist_item_events',
+        ['run_id', 'id']
+    )
+
+def downgrade():
+    op.drop_index('ix_checklist_item_events_run', table_name='checklist_item_events')
+    op.drop_table('completion_analytics_cursor')
+    op.drop_table('completion_sketches')
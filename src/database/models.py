@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,10 @@ Base = declarative_base()
 
 class ChecklistCategory(Base):
     __tablename__ = 'checklist_categories'
+    __table_args__ = (
+        # Natural keys used by checklist import/export
+        Index('ux_checklist_categories_name', 'name', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
@@ -17,6 +21,9 @@ class ChecklistCategory(Base):
 
 class ChecklistSection(Base):
     __tablename__ = 'checklist_sections'
+    __table_args__ = (
+        Index('ux_checklist_sections_category_name', 'category_id', 'name', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     category_id = Column(Integer, ForeignKey('checklist_categories.id', ondelete='CASCADE'), nullable=False)
@@ -30,6 +37,9 @@ class ChecklistSection(Base):
 
 class ChecklistItem(Base):
     __tablename__ = 'checklist_items'
+    __table_args__ = (
+        Index('ux_checklist_items_section_description', 'section_id', 'description', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     section_id = Column(Integer, ForeignKey('checklist_sections.id', ondelete='CASCADE'), nullable=False)
@@ -40,5 +50,110 @@ class ChecklistItem(Base):
     created_at = Column(DateTime, server_default=func.now())
     last_checked = Column(DateTime)
     checked_by = Column(String)
+    # Incremented on every state change; guards compare-and-set updates
+    version = Column(Integer, nullable=False, default=0, server_default='0')
     
-    section = relationship("ChecklistSection", back_populates="items") 
\ No newline at end of file
+    section = relationship("ChecklistSection", back_populates="items")
+
+class ConversationMessage(Base):
+    __tablename__ = 'conversation_messages'
+    __table_args__ = (
+        Index('ix_conversation_messages_session_created', 'session_id', 'created_at'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False)
+    role = Column(String, nullable=False)
+    content = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class ChecklistTemplateVersion(Base):
+    __tablename__ = 'checklist_template_versions'
+    __table_args__ = (
+        Index('ux_checklist_template_versions_category_version', 'category_id', 'version', unique=True),
+    )
+    
+    # Rows are never updated: a published version is immutable
+    id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, ForeignKey('checklist_categories.id', ondelete='CASCADE'), nullable=False)
+    version = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=False)
+    # JSON of the category's sections and items at publish time
+    snapshot = Column(String, nullable=False)
+    note = Column(String)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+class InspectionRun(Base):
+    __tablename__ = 'inspection_runs'
+    __table_args__ = (
+        Index('ix_inspection_runs_vessel_started', 'vessel', 'started_at'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    vessel = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey('checklist_categories.id', ondelete='CASCADE'), nullable=False)
+    # Template the run was started from
+    template_version_id = Column(Integer, ForeignKey('checklist_template_versions.id'), nullable=False)
+    started_at = Column(DateTime, nullable=False, server_default=func.now())
+    finished_at = Column(DateTime)
+    # Bit n is set when the n-th item of the run's template is completed
+    completed_bits = Column(LargeBinary, nullable=False, default=b"")
+    # Incremented on every change; guards concurrent bitset updates
+    version = Column(Integer, nullable=False, default=0)
+    
+    category = relationship("ChecklistCategory")
+    template_version = relationship("ChecklistTemplateVersion")
+    item_details = relationship("InspectionRunItem", back_populates="run", cascade="all, delete-orphan")
+
+class InspectionRunItem(Base):
+    __tablename__ = 'inspection_run_items'
+    
+    # Only items with notes or a checker get a row; completion lives in the bitset
+    run_id = Column(Integer, ForeignKey('inspection_runs.id', ondelete='CASCADE'), primary_key=True)
+    item_id = Column(Integer, ForeignKey('checklist_items.id', ondelete='CASCADE'), primary_key=True)
+    notes = Column(String)
+    checked_by = Column(String)
+    checked_at = Column(DateTime)
+    
+    run = relationship("InspectionRun", back_populates="item_details")
+
+class ChecklistItemEvent(Base):
+    __tablename__ = 'checklist_item_events'
+    __table_args__ = (
+        Index('ix_checklist_item_events_item_created', 'item_id', 'created_at'),
+        Index('ix_checklist_item_events_created', 'created_at'),
+        Index('ix_checklist_item_events_run', 'run_id', 'id'),
+    )
+    
+    # Append-only: rows are never updated, only compacted into daily rollups
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, nullable=False)
+    run_id = Column(Integer)
+    event = Column(String, nullable=False)
+    actor = Column(String)
+    source = Column(String)
+    created_at = Column(DateTime, nullable=False)
+
+class ChecklistItemEventRollup(Base):
+    __tablename__ = 'checklist_item_event_rollups'
+    
+    day = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    event = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+
+class CompletionSketch(Base):
+    __tablename__ = 'completion_sketches'
+    
+    # Serialized DurationSketch of one item's completion times within runs
+    item_id = Column(Integer, primary_key=True)
+    sketch = Column(String, nullable=False)
+
+class CompletionAnalyticsCursor(Base):
+    __tablename__ = 'completion_analytics_cursor'
+    
+    # Single row: the last item event folded into completion_sketches
+    id = Column(Integer, primary_key=True)
+    last_event_id = Column(Integer, nullable=False)
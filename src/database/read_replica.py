@@ -0,0 +1,98 @@
+"""
+In-memory read replica of the SQLite database, one per worker process
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from .connection import get_engine
+
+logger = logging.getLogger(__name__)
+
+READ_REPLICA_ENABLED = os.getenv("READ_REPLICA_ENABLED", "false").lower() == "true"
+
+class ReadReplica:
+    """An in-memory copy of the database file for read-only endpoints.
+
+    The copy is made with SQLite's online backup API in a single step, so
+    it is a consistent snapshot. Before each read, the counter kept by the
+    ``checklist_data_version`` triggers (migration 010) tells whether any
+    checklist table was written since the last copy; only then is the copy
+    refreshed, so a worker always reads its own checklist writes. Chat
+    messages and item events do not bump the counter.
+
+    The copy is made outside the lock: reads keep using the previous copy
+    until the new one is swapped in, and only one copy runs at a time.
+    The copy is ``query_only``, so an accidental write fails instead of
+    being lost.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._source: Optional[sqlite3.Connection] = None
+        self._engine: Optional[Engine] = None
+        self._version: Optional[int] = None
+        self._sessions = sessionmaker(autocommit=False, autoflush=False)
+        self._lock = threading.Lock()
+        self._copy_lock = threading.Lock()
+        self.stats = {"reads": 0, "refreshes": 0}
+
+    def _path(self) -> str:
+        return self.path or get_engine().url.database
+
+    def _checklist_version(self) -> int:
+        # Called with self._lock held
+        if self._source is None:
+            self._source = sqlite3.connect(self._path(), check_same_thread=False)
+        return self._source.execute("SELECT version FROM checklist_data_version").fetchone()[0]
+
+    def _copy(self) -> Engine:
+        replica = sqlite3.connect(":memory:", check_same_thread=False)
+        source = sqlite3.connect(self._path())
+        try:
+            source.backup(replica, pages=-1)
+        finally:
+            source.close()
+        replica.execute("PRAGMA query_only = ON")
+        return create_engine("sqlite://", creator=lambda: replica, poolclass=StaticPool)
+
+    def refresh(self) -> Engine:
+        """The replica's engine, copied again first if checklist data changed."""
+        with self._lock:
+            self.stats["reads"] += 1
+            version = self._checklist_version()
+            if self._engine is not None and version == self._version:
+                return self._engine
+
+        with self._copy_lock:
+            with self._lock:
+                # Another thread may have copied it while this one waited
+                if self._engine is not None and self._version >= version:
+                    return self._engine
+            started = time.perf_counter()
+            engine = self._copy()
+            with self._lock:
+                self._engine = engine
+                self._version = version
+                self.stats["refreshes"] += 1
+            logger.info(f"Refreshed read replica in {(time.perf_counter() - started) * 1000:.1f} ms")
+            return engine
+
+    def session(self) -> Session:
+        return self._sessions(bind=self.refresh())
+
+    def close(self):
+        with self._lock:
+            if self._source is not None:
+                self._source.close()
+            self._source = None
+            self._engine = None
+            self._version = None
@@ -0,0 +1,166 @@
+"""
+Full-text search over checklist items, sections and chat messages
+"""
+import re
+import html
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from .models import ChecklistItem, ChecklistSection, ConversationMessage
+
+logger = logging.getLogger(__name__)
+
+SEARCH_KINDS = ("item", "section", "message")
+HIGHLIGHT = ("<mark>", "</mark>")
+# Stand-ins for the highlight tags until the snippet has been escaped
+MARKERS = ("\x02", "\x03")
+SNIPPET_WORDS = 12
+# bm25 column weights: kind, ref_id, title, body
+TITLE_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+def search_terms(query: str) -> List[str]:
+    """Words of a query; FTS5 operators and punctuation are not passed through."""
+    return re.findall(r"\w+", query.lower())
+
+def fts_query(terms: Sequence[str]) -> str:
+    # Every term must match, each as a prefix: "life jack" finds "life jackets"
+    return " ".join(f'"{term}"*' for term in terms)
+
+def has_search_index(db: Session) -> bool:
+    """True when the FTS5 index from migration 005 exists in this database."""
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    )).first() is not None
+
+def highlight(snippet: str) -> str:
+    """Escape stored text for HTML, then turn the match markers into highlight tags."""
+    return html.escape(snippet).replace(MARKERS[0], HIGHLIGHT[0]).replace(MARKERS[1], HIGHLIGHT[1])
+
+def like_snippet(value: str, terms: Sequence[str], words: int = SNIPPET_WORDS) -> str:
+    """A window of ``value`` around the first matching term, with matches highlighted."""
+    tokens = value.split()
+    first = next(
+        (i for i, token in enumerate(tokens) if any(term in token.lower() for term in terms)),
+        0
+    )
+    start = max(first - words // 2, 0)
+    window = tokens[start:start + words]
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    snippet = " ".join(pattern.sub(lambda m: f"{MARKERS[0]}{m.group(0)}{MARKERS[1]}", token) for token in window)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + words < len(tokens) else ""
+    return highlight(f"{prefix}{snippet}{suffix}")
+
+def _fts_matches(db: Session, terms: Sequence[str], kinds: Sequence[str], limit: int) -> List[Dict]:
+    kind_filter = ", ".join(f"'{kind}'" for kind in kinds)
+    rows = db.execute(text(f"""
+        SELECT kind, ref_id,
+               bm25(search_index, 0.0, 0.0, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score,
+               snippet(search_index, -1, :open, :close, '…', {SNIPPET_WORDS}) AS snippet
+        FROM search_index
+        WHERE search_index MATCH :query AND kind IN ({kind_filter})
+        ORDER BY score
+        LIMIT :limit
+    """), {"query": fts_query(terms), "open": MARKERS[0], "close": MARKERS[1], "limit": limit})
+    # bm25 is lower-is-better; report higher-is-better scores
+    return [
+        {"kind": row.kind, "id": row.ref_id, "score": round(-row.score, 4), "snippet": highlight(row.snippet)}
+        for row in rows
+    ]
+
+def _like(column, term: str):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+def _like_matches(db: Session, terms: Sequence[str], kinds: Sequence[str], limit: int) -> List[Dict]:
+    sources = {
+        "item": (ChecklistItem, ChecklistItem.description, ChecklistItem.notes, ChecklistItem.id),
+        "section": (ChecklistSection, ChecklistSection.name, ChecklistSection.description, ChecklistSection.id),
+        "message": (ConversationMessage, None, ConversationMessage.content, ConversationMessage.id.desc())
+    }
+    matches = []
+    for kind in kinds:
+        model, title, body, order = sources[kind]
+        columns = [column for column in (title, body) if column is not None]
+        query = db.query(model)
+        for term in terms:
+            query = query.filter(or_(*(_like(column, term) for column in columns)))
+        for row in query.order_by(order).limit(limit):
+            title_text = getattr(row, title.key) if title is not None else ""
+            body_text = getattr(row, body.key) or ""
+            # Crude relevance: term hits, with title hits counting more
+            score = sum(
+                TITLE_WEIGHT * (title_text or "").lower().count(term) + BODY_WEIGHT * body_text.lower().count(term)
+                for term in terms
+            )
+            in_title = title_text and any(term in title_text.lower() for term in terms)
+            matches.append({
+                "kind": kind,
+                "id": row.id,
+                "score": float(score),
+                "snippet": like_snippet(title_text if in_title else body_text, terms)
+            })
+    matches.sort(key=lambda match: match["score"], reverse=True)
+    return matches[:limit]
+
+def _describe(db: Session, matches: List[Dict]) -> List[Dict]:
+    """Add what a client needs to show and navigate to each result."""
+    ids = {kind: [m["id"] for m in matches if m["kind"] == kind] for kind in SEARCH_KINDS}
+    items = {
+        row.id: {
+            "title": row.description,
+            "section_id": row.section_id,
+            "section": row.section_name,
+            "category_id": row.category_id,
+            "is_completed": bool(row.is_completed)
+        }
+        for row in db.query(
+            ChecklistItem.id, ChecklistItem.description, ChecklistItem.section_id, ChecklistItem.is_completed,
+            ChecklistSection.name.label("section_name"), ChecklistSection.category_id
+        ).join(ChecklistSection).filter(ChecklistItem.id.in_(ids["item"]))
+    } if ids["item"] else {}
+    sections = {
+        row.id: {"title": row.name, "category_id": row.category_id}
+        for row in db.query(
+            ChecklistSection.id, ChecklistSection.name, ChecklistSection.category_id
+        ).filter(ChecklistSection.id.in_(ids["section"]))
+    } if ids["section"] else {}
+    messages = {
+        row.id: {
+            "title": f"{row.role} message",
+            "session_id": row.session_id,
+            "role": row.role,
+            "created_at": row.created_at.isoformat()
+        }
+        for row in db.query(
+            ConversationMessage.id, ConversationMessage.session_id, ConversationMessage.role,
+            ConversationMessage.created_at
+        ).filter(ConversationMessage.id.in_(ids["message"]))
+    } if ids["message"] else {}
+
+    details = {"item": items, "section": sections, "message": messages}
+    # The index can briefly list a row that was just deleted; skip those
+    return [{**match, **details[match["kind"]][match["id"]]} for match in matches if match["id"] in details[match["kind"]]]
+
+def search(db: Session, query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20) -> Dict:
+    """Ranked matches for ``query``, with HTML-escaped, highlighted snippets.
+
+    Uses the FTS5 index when the database has it and plain LIKE filters
+    otherwise, e.g. on SQLite builds without FTS5.
+    """
+    terms = search_terms(query)
+    kinds = [kind for kind in (kinds or SEARCH_KINDS) if kind in SEARCH_KINDS]
+    if not terms or not kinds:
+        return {"query": query, "engine": None, "results": []}
+
+    if has_search_index(db):
+        engine, matches = "fts5", _fts_matches(db, terms, kinds, limit)
+    else:
+        engine, matches = "like", _like_matches(db, terms, kinds, limit)
+    return {"query": query, "engine": engine, "results": _describe(db, matches)}
@@ -0,0 +1,229 @@
+"""
+Immutable, versioned snapshots of checklist templates
+"""
+import os
+import json
+import hashlib
+import logging
+import time
+import threading
+from itertools import chain
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import ChecklistCategory, ChecklistItem, ChecklistSection, ChecklistTemplateVersion
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SNAPSHOT_CACHE_SIZE = int(os.getenv("TEMPLATE_SNAPSHOT_CACHE_SIZE", "64"))
+TEMPLATE_CURRENT_TTL = float(os.getenv("TEMPLATE_CURRENT_TTL", "30"))  # seconds
+
+def template_content(db: Session, category_id: int) -> Optional[Dict]:
+    """The live template of a category: its sections and items, in order."""
+    category = db.query(ChecklistCategory).filter(ChecklistCategory.id == category_id).first()
+    if category is None:
+        return None
+    sections = (
+        db.query(ChecklistSection)
+        .filter(ChecklistSection.category_id == category_id)
+        .order_by(ChecklistSection.order, ChecklistSection.id)
+        .all()
+    )
+    items: Dict[int, List[Dict]] = {section.id: [] for section in sections}
+    rows = (
+        db.query(ChecklistItem.id, ChecklistItem.section_id, ChecklistItem.description, ChecklistItem.order)
+        .filter(ChecklistItem.section_id.in_(list(items)))
+        .order_by(ChecklistItem.order, ChecklistItem.id)
+    ) if items else []
+    for row in rows:
+        items[row.section_id].append({"id": row.id, "description": row.description, "order": row.order})
+    return {
+        "category": {"id": category.id, "name": category.name, "description": category.description},
+        "sections": [
+            {
+                "id": section.id,
+                "name": section.name,
+                "description": section.description,
+                "order": section.order,
+                "items": items[section.id]
+            }
+            for section in sections
+        ]
+    }
+
+def content_hash(content: Dict) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def latest_version(db: Session, category_id: int) -> Optional[ChecklistTemplateVersion]:
+    return (
+        db.query(ChecklistTemplateVersion)
+        .filter(ChecklistTemplateVersion.category_id == category_id)
+        .order_by(ChecklistTemplateVersion.version.desc())
+        .first()
+    )
+
+def publish_template(db: Session, category_id: int, note: Optional[str] = None) -> ChecklistTemplateVersion:
+    """Freeze the category's current template as a new version.
+
+    If nothing changed since the latest version, that version is returned
+    instead, so publishing is idempotent.
+    """
+    content = template_content(db, category_id)
+    if content is None:
+        raise ValueError(f"Category {category_id} does not exist")
+    digest = content_hash(content)
+    latest = latest_version(db, category_id)
+    if latest is not None and latest.content_hash == digest:
+        return latest
+
+    version = ChecklistTemplateVersion(
+        category_id=category_id,
+        version=(latest.version + 1) if latest else 1,
+        content_hash=digest,
+        snapshot=json.dumps(content),
+        note=note
+    )
+    db.add(version)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request published the same version number first
+        db.rollback()
+        winner = latest_version(db, category_id)
+        if winner is None:
+            raise
+        return winner
+    db.refresh(version)
+    logger.info(f"Published template version {version.version} of category {category_id}")
+    return version
+
+def version_to_dict(version: ChecklistTemplateVersion) -> Dict:
+    return {
+        "id": version.id,
+        "category_id": version.category_id,
+        "version": version.version,
+        "note": version.note,
+        "created_at": version.created_at.isoformat() if version.created_at else None
+    }
+
+class TemplateSnapshot:
+    """A parsed template version, with what run reads need precomputed.
+
+    An item's position is its index in the template (sections in order,
+    then items in order); runs use it as the item's bit.
+    """
+
+    def __init__(self, version_id: int, version: int, content: Dict):
+        self.version_id = version_id
+        self.version = version
+        self.content = content
+        self.item_ids = [item["id"] for section in content["sections"] for item in section["items"]]
+        self.positions = {item_id: position for position, item_id in enumerate(self.item_ids)}
+        self.total = len(self.item_ids)
+        self.mask = (1 << self.total) - 1
+
+    def position(self, item_id: int) -> Optional[int]:
+        return self.positions.get(item_id)
+
+    def has_item(self, item_id: int) -> bool:
+        return item_id in self.positions
+
+class TemplateSnapshots:
+    """LRU cache of parsed template versions, per database engine.
+
+    Versions never change once published, so entries never go stale and
+    are only evicted for space.
+    """
+
+    def __init__(self, max_entries: int = TEMPLATE_SNAPSHOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        # Version ids are only unique within one database
+        self._engines: "WeakKeyDictionary[object, OrderedDict[int, TemplateSnapshot]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0}
+
+    def get(self, db: Session, version_id: int) -> Optional[TemplateSnapshot]:
+        with self._lock:
+            entries = self._engines.setdefault(db.get_bind(), OrderedDict())
+            snapshot = entries.get(version_id)
+            if snapshot is not None:
+                entries.move_to_end(version_id)
+                self.stats["hits"] += 1
+                return snapshot
+
+        row = db.query(
+            ChecklistTemplateVersion.version, ChecklistTemplateVersion.snapshot
+        ).filter(ChecklistTemplateVersion.id == version_id).first()
+        if row is None:
+            return None
+        snapshot = TemplateSnapshot(version_id, row.version, json.loads(row.snapshot))
+        with self._lock:
+            entries[version_id] = snapshot
+            self.stats["loads"] += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return snapshot
+
+template_snapshots = TemplateSnapshots()
+
+class CurrentTemplates:
+    """Id of the version matching each category's live template, per engine.
+
+    Saves hashing the whole template on every new run. Entries are
+    dropped when a session commits changes to categories, sections or
+    items (and on imports, which write through Core), and otherwise
+    expire after ``ttl`` seconds so edits made by other workers are
+    picked up.
+    """
+
+    def __init__(self, ttl: float = TEMPLATE_CURRENT_TTL):
+        self.ttl = ttl
+        self._engines: "WeakKeyDictionary[object, Dict[int, tuple]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, category_id: int) -> int:
+        """The current version id, publishing a new version if the template changed."""
+        bind = db.get_bind()
+        with self._lock:
+            entry = self._engines.get(bind, {}).get(category_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        version_id = publish_template(db, category_id).id
+        with self._lock:
+            self._engines.setdefault(bind, {})[category_id] = (time.monotonic() + self.ttl, version_id)
+        return version_id
+
+    def invalidate(self, category_id: Optional[int] = None):
+        with self._lock:
+            for entries in self._engines.values():
+                if category_id is None:
+                    entries.clear()
+                else:
+                    entries.pop(category_id, None)
+
+current_templates = CurrentTemplates()
+
+_CATALOG_CHANGED_KEY = "checklist_catalog_changed"
+
+@event.listens_for(Session, "after_flush")
+def _note_catalog_changes(session: Session, flush_context):
+    if any(
+        isinstance(obj, (ChecklistCategory, ChecklistSection, ChecklistItem))
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info[_CATALOG_CHANGED_KEY] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_current_templates(session: Session):
+    if session.info.pop(_CATALOG_CHANGED_KEY, False):
+        current_templates.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_changes(session: Session):
+    session.info.pop(_CATALOG_CHANGED_KEY, None)
@@ -0,0 +1,107 @@
+"""
+Trigger DDL shared by the migrations and populate_db.py
+
+Imported by migrations as a top-level module, so it must not import
+anything from the package.
+"""
+from typing import List
+
+# Rowid of an indexed row is ref_id * 4 + kind code: 1 item, 2 section, 3 message
+SEARCH_SOURCES = {
+    "item": ("checklist_items", 1, "new.description", "coalesce(new.notes, '')", "description, notes"),
+    "section": ("checklist_sections", 2, "new.name", "coalesce(new.description, '')", "name, description"),
+    "message": ("conversation_messages", 3, "''", "new.content", "content"),
+}
+
+def _search_row(kind: str) -> str:
+    table, code, title, body, _ = SEARCH_SOURCES[kind]
+    return f"new.id * 4 + {code}, '{kind}', new.id, {title}, {body}"
+
+def search_index_ddl() -> List[str]:
+    """The search_index FTS5 table over items, sections and chat messages, kept in sync by triggers."""
+    statements = ["""
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            kind UNINDEXED, ref_id UNINDEXED, title, body,
+            tokenize = 'porter unicode61'
+        )
+    """]
+    for kind, (table, code, _, _, columns) in SEARCH_SOURCES.items():
+        row = _search_row(kind)
+        statements.append(f"""
+            CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO search_index (rowid, kind, ref_id, title, body) VALUES ({row});
+            END
+        """)
+        statements.append(f"""
+            CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+                INSERT INTO search_index (rowid, kind, ref_id, title, body) VALUES ({row});
+            END
+        """)
+        statements.append(f"""
+            CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+            END
+        """)
+    return statements
+
+def search_index_backfill_ddl() -> List[str]:
+    """Index rows that existed before the triggers."""
+    return [
+        f"""
+            INSERT INTO search_index (rowid, kind, ref_id, title, body)
+            SELECT {_search_row(kind).replace('new.', '')} FROM {table}
+        """
+        for kind, (table, _, _, _, _) in SEARCH_SOURCES.items()
+    ]
+
+def drop_search_index_ddl() -> List[str]:
+    statements = [
+        f"DROP TRIGGER IF EXISTS {table}_search_{action}"
+        for table, _, _, _, _ in SEARCH_SOURCES.values()
+        for action in ("insert", "update", "delete")
+    ]
+    statements.append("DROP TABLE IF EXISTS search_index")
+    return statements
+
+# Tables whose writes make the checklist data version go up
+DATA_VERSION_TABLES = (
+    "checklist_categories",
+    "checklist_sections",
+    "checklist_items",
+    "checklist_template_versions",
+    "inspection_runs",
+)
+
+def data_version_ddl() -> List[str]:
+    """A one-row counter bumped by every write to the checklist tables.
+
+    Unlike ``PRAGMA data_version``, conversation messages and item events
+    do not touch it.
+    """
+    statements = [
+        """
+        CREATE TABLE checklist_data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT INTO checklist_data_version (id, version) VALUES (1, 0)"
+    ]
+    for table in DATA_VERSION_TABLES:
+        for action in ("insert", "update", "delete"):
+            statements.append(f"""
+                CREATE TRIGGER {table}_data_version_{action} AFTER {action.upper()} ON {table} BEGIN
+                    UPDATE checklist_data_version SET version = version + 1;
+                END
+            """)
+    return statements
+
+def drop_data_version_ddl() -> List[str]:
+    statements = [
+        f"DROP TRIGGER IF EXISTS {table}_data_version_{action}"
+        for table in DATA_VERSION_TABLES
+        for action in ("insert", "update", "delete")
+    ]
+    statements.append("DROP TABLE IF EXISTS checklist_data_version")
+    return statements
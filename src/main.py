@@ -1,7 +1,6 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request, Header
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.background import BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
@@ -11,16 +10,47 @@ from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 import json
-from fastapi.responses import FileResponse, StreamingResponse
+import base64
+import io
+import hmac
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 import httpx
 import sys
+import time
+import asyncio
+from contextlib import asynccontextmanager
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.database.connection import get_db
-from src.database.models import ChecklistCategory, ChecklistSection, ChecklistItem
+from src.database.connection import get_db, ping_database, SessionLocal
+from src.database.conversation_store import ConversationStore
+from src.database.models import (
+    ChecklistCategory, ChecklistSection, ChecklistItem, ChecklistTemplateVersion, InspectionRun
+)
+from src.database.checklist_io import ChecklistImportError, export_jsonl, import_jsonl
+from src.database.templates import publish_template, template_snapshots, version_to_dict
+from src.database.search import search as search_index
+from src.database.read_replica import READ_REPLICA_ENABLED, ReadReplica
+from src.database.item_events import ItemEventCompactor, item_history
+from src.database.item_updates import ItemConflictError, item_to_dict, update_item
+from src.database.inspection_runs import (
+    RunConflictError, create_run, finish_run, get_run, run_to_dict, update_run_item
+)
 from src.agents.checklist_agent import ChecklistAgent
+from src.agents.crew_jobs import CrewJobQueue
+from src.services.http_clients import create_default_registry, N8N_IMAGE_WEBHOOK_URL
+from src.services.image_service import ImageService
+from src.services.transcription import AudioTooLargeError, transcribe_upload
+from src.services.tts import (
+    ELEVENLABS_MODEL_ID, OPENAI_TTS_MODEL, OPENAI_TTS_VOICE, TTSUpstreamError,
+    open_elevenlabs_speech, open_openai_speech, relay_stream
+)
+from src.services.audio_cache import AudioCache, cached_audio_response
+from src.services.tts_pipeline import SegmentSynthesizer, prime_stream, split_sentences, synthesize_pipelined
+from src.services.audio_library import AUDIO_LIBRARY_ENABLED, AUDIO_LIBRARY_PROVIDER, AudioLibrary
+from src.services.fleet_progress import FleetProgress
+from src.services.analytics import CompletionAnalytics
 
 # Load environment variables
 load_dotenv()
@@ -29,24 +59,92 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pooled HTTP clients shared by every upstream call in this worker
+http_clients = create_default_registry()
+
 # Initialize OpenAI client with custom httpx client to avoid proxies issue
-http_client = httpx.AsyncClient(
-    timeout=60.0,
-    follow_redirects=True
-)
 client = AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
-    http_client=http_client
+    http_client=http_clients.get("openai")
 )
 
+# Relevant-image lookups shared by the agent and /api/images/relevant
+image_service = ImageService(lambda: http_clients.get("n8n"), N8N_IMAGE_WEBHOOK_URL)
+
+# Persist conversation history so sessions survive worker restarts
+conversation_store = ConversationStore(SessionLocal)
+
 # Initialize the checklist agent
-checklist_agent = ChecklistAgent(os.getenv("OPENAI_API_KEY"))
+checklist_agent = ChecklistAgent(
+    os.getenv("OPENAI_API_KEY"),
+    conversation_store=conversation_store,
+    http_clients=http_clients,
+    image_service=image_service
+)
+
+# Crew runs are slow and blocking; they go through a bounded job queue
+crew_jobs = CrewJobQueue(checklist_agent.new_checklist_crew)
 
 # Add this near other environment variables
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM") # Default voice
 
-app = FastAPI(title="RED Hospitality Compliance Assistant")
+# /api/admin endpoints require it in the X-Admin-Token header; unset, they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Synthesized speech is cached on disk, keyed by provider, voice, model and text
+audio_cache = AudioCache()
+
+# Item and section descriptions are synthesized ahead of time into the audio cache
+audio_library = AudioLibrary(SessionLocal, lambda: segment_synthesizer(AUDIO_LIBRARY_PROVIDER))
+
+# Fleet dashboard aggregates, reused until a run or the catalog changes
+fleet_progress = FleetProgress()
+
+# Completion-time statistics, updated incrementally from new item events
+completion_analytics = CompletionAnalytics()
+
+# Item events older than the retention window are folded into daily rollups
+item_event_compactor = ItemEventCompactor(SessionLocal)
+
+# Optional in-memory copy of the database for read-heavy endpoints
+read_replica = ReadReplica() if READ_REPLICA_ENABLED else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the database now rather than on the first request
+    try:
+        latency = await asyncio.to_thread(ping_database)
+        logger.info(f"Connected to the database in {latency:.1f} ms")
+    except Exception as e:
+        logger.error(f"Error connecting to database: {str(e)}")
+    if read_replica is not None:
+        try:
+            await asyncio.to_thread(read_replica.refresh)
+        except Exception as e:
+            logger.error(f"Error creating read replica: {str(e)}")
+    conversation_store.start()
+    # Open upstream connections in the background so startup is not delayed
+    warmup_task = asyncio.create_task(http_clients.warm_up())
+    if AUDIO_LIBRARY_ENABLED:
+        # Without a key every entry would fail and be retried on each check
+        if speech_api_key(AUDIO_LIBRARY_PROVIDER):
+            audio_library.start()
+        else:
+            logger.error(f"Audio library not started: no API key for '{AUDIO_LIBRARY_PROVIDER}'")
+    item_event_compactor.start()
+    yield
+    warmup_task.cancel()
+    await audio_library.stop()
+    await item_event_compactor.stop()
+    crew_jobs.shutdown()
+    await http_clients.aclose()
+    # Flush queued conversation writes before the worker exits
+    await asyncio.to_thread(conversation_store.stop)
+    if read_replica is not None:
+        read_replica.close()
+
+app = FastAPI(title="RED Hospitality Compliance Assistant", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -67,21 +165,69 @@ class Message(BaseModel):
 
 class ChecklistItemUpdate(BaseModel):
     id: int
-    is_completed: bool
+    is_completed: Optional[bool] = None
     notes: Optional[str] = None
     checked_by: Optional[str] = None
+    version: Optional[int] = None
 
 class ChecklistResponse(BaseModel):
     message: str
     categories: List[Dict]
 
+class SpeechRequest(BaseModel):
+    content: str
+    provider: str = "openai"
+
+class ImageLookupRequest(BaseModel):
+    message: str
+
+class CrewJobRequest(BaseModel):
+    kind: str
+    params: Dict = {}
+
+class TemplatePublishRequest(BaseModel):
+    note: Optional[str] = None
+
+class InspectionRunCreate(BaseModel):
+    vessel: str
+    category_id: int
+
+class InspectionRunItemUpdate(BaseModel):
+    is_completed: bool
+    notes: Optional[str] = None
+    checked_by: Optional[str] = None
+
+def get_read_db(db: Session = Depends(get_db)):
+    """Session for read-only endpoints: the read replica when enabled, else ``db``"""
+    if read_replica is None:
+        yield db
+        return
+    replica = read_replica.session()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
 @app.get("/")
 async def read_root():
     index_path = os.path.join(static_dir, "index.html")
     return FileResponse(index_path)
 
+@app.get("/healthz")
+async def healthz(db: Session = Depends(get_db)):
+    """Liveness plus the round-trip time of a trivial database query"""
+    try:
+        latency = ping_database(db)
+    except Exception as e:
+        logger.error(f"Error in health check: {str(e)}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "database": {"status": "error", "detail": str(e)}}
+        )
+    return {"status": "ok", "database": {"status": "ok", "latency_ms": round(latency, 2)}}
+
 @app.get("/api/checklists")
-async def get_checklists(db: Session = Depends(get_db)):
+async def get_checklists(db: Session = Depends(get_read_db)):
     try:
         categories = db.query(ChecklistCategory).all()
         result = []
@@ -109,7 +255,8 @@ async def get_checklists(db: Session = Depends(get_db)):
                         "is_completed": item.is_completed,
                         "notes": item.notes,
                         "last_checked": item.last_checked.isoformat() if item.last_checked else None,
-                        "checked_by": item.checked_by
+                        "checked_by": item.checked_by,
+                        "version": item.version
                     })
                 
                 cat_dict["sections"].append(section_dict)
@@ -166,8 +313,7 @@ async def chat(message: Message, db: Session = Depends(get_db)):
                 try:
                     item = db.query(ChecklistItem).filter(ChecklistItem.id == item_id).first()
                     if item and not item.is_completed:
-                        item.is_completed = True
-                        item.last_checked = datetime.utcnow()
+                        update_item(db, item.id, {"is_completed": True}, source="chat", commit=False)
                         completed_updates.append(f"{item.description} (in {item_map[item.description.lower()]['section']})")
                         logger.info(f"Marked item {item_id} ({item.description}) as completed")
                 except Exception as e:
@@ -178,7 +324,7 @@ async def chat(message: Message, db: Session = Depends(get_db)):
                 try:
                     item = db.query(ChecklistItem).filter(ChecklistItem.id == item_id).first()
                     if item and item.is_completed:
-                        item.is_completed = False
+                        update_item(db, item.id, {"is_completed": False}, source="chat", commit=False)
                         uncompleted_updates.append(f"{item.description} (in {item_map[item.description.lower()]['section']})")
                         logger.info(f"Marked item {item_id} ({item.description}) as uncompleted")
                 except Exception as e:
@@ -267,93 +413,502 @@ async def chat(message: Message, db: Session = Depends(get_db)):
             "success": False
         }
 
+@app.post("/api/images/relevant")
+async def relevant_image(request: ImageLookupRequest):
+    """Find a safety or compliance image related to a message"""
+    image = await image_service.get_relevant_image(request.message)
+    return image or {"image": None, "type": None}
+
 @app.post("/api/speech-to-text")
 async def speech_to_text(audio: UploadFile = File(...)):
     try:
-        # Save the audio file temporarily
-        temp_file = f"temp_{audio.filename}"
-        with open(temp_file, "wb") as buffer:
-            content = await audio.read()
-            buffer.write(content)
-        
-        # Transcribe using OpenAI's Whisper API
-        with open(temp_file, "rb") as audio_file:
-            transcript = await client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-        
-        # Clean up temp file
-        os.remove(temp_file)
-        
-        return {"text": transcript.text}
+        # Transcribe using OpenAI's Whisper API straight from the upload buffer
+        transcription = await transcribe_upload(client, audio)
+        return {"text": transcription.text, "preprocessing": transcription.preprocessing}
         
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error in speech-to-text endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/text-to-speech")
-async def text_to_speech(message: Message, background_tasks: BackgroundTasks):
+async def text_to_speech(message: Message, request: Request):
+    cache_key = audio_cache.make_key("openai", OPENAI_TTS_VOICE, OPENAI_TTS_MODEL, message.content)
+    cached_path = audio_cache.get(cache_key)
+    if cached_path:
+        try:
+            return cached_audio_response(cached_path, cache_key, request.headers.get("range"))
+        except FileNotFoundError:
+            # Evicted by another worker since the lookup; synthesize it again
+            pass
+
+    started_at = time.perf_counter()
     try:
-        # Generate speech using OpenAI's TTS API
-        response = await client.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=message.content
-        )
-        
-        # Create a temporary file to store the audio
-        temp_file = "temp_speech.mp3"
-        response.stream_to_file(temp_file)
-        
-        # Schedule file cleanup after response is sent
-        background_tasks.add_task(os.remove, temp_file)
-        
-        # Return the audio file
-        return FileResponse(
-            temp_file,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=speech.mp3"}
+        # Start OpenAI synthesis; audio is relayed as it is generated
+        upstream = await open_openai_speech(
+            http_clients.get("openai"),
+            client.api_key,
+            message.content
         )
-        
+    except TTSUpstreamError as e:
+        logger.error(f"Error in text-to-speech endpoint: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error(f"Error in text-to-speech endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    # Fill the cache while the audio streams to the client
+    return StreamingResponse(
+        audio_cache.fill(cache_key, relay_stream(upstream, "openai-tts", started_at)),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "attachment; filename=speech.mp3",
+            "X-Audio-Key": cache_key
+        }
+    )
+
 @app.post("/api/elevenlabs-tts")
-async def elevenlabs_tts(message: Message):
+async def elevenlabs_tts(message: Message, request: Request):
     """Stream audio from ElevenLabs TTS API"""
+    cache_key = audio_cache.make_key("elevenlabs", ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, message.content)
+    cached_path = audio_cache.get(cache_key)
+    if cached_path:
+        try:
+            return cached_audio_response(cached_path, cache_key, request.headers.get("range"))
+        except FileNotFoundError:
+            # Evicted by another worker since the lookup; synthesize it again
+            pass
+
+    started_at = time.perf_counter()
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}/stream",
-                headers={
-                    "Accept": "audio/mpeg",
-                    "xi-api-key": ELEVENLABS_API_KEY,
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "text": message.content,
-                    "model_id": "eleven_monolingual_v1",
-                    "voice_settings": {
-                        "stability": 0.5,
-                        "similarity_boost": 0.75
-                    }
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code == 200:
-                return StreamingResponse(
-                    response.iter_bytes(),
-                    media_type="audio/mpeg",
-                    headers={
-                        "Content-Disposition": "attachment; filename=speech.mp3"
-                    }
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=str(response.text))
-                
+        # Keep the upstream stream open for the life of our response
+        upstream = await open_elevenlabs_speech(
+            http_clients.get("elevenlabs"),
+            ELEVENLABS_API_KEY,
+            ELEVENLABS_VOICE_ID,
+            message.content
+        )
+    except TTSUpstreamError as e:
+        logger.error(f"Error in elevenlabs-tts endpoint: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error(f"Error in elevenlabs-tts endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Chunks are forwarded (and cached) as they arrive
+    return StreamingResponse(
+        audio_cache.fill(cache_key, relay_stream(upstream, "elevenlabs-tts", started_at)),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "attachment; filename=speech.mp3",
+            "X-Audio-Key": cache_key
+        }
+    )
+
+def speech_api_key(provider: str) -> Optional[str]:
+    """API key configured for the given TTS provider, if any"""
+    if provider == "elevenlabs":
+        return ELEVENLABS_API_KEY
+    if provider == "openai":
+        return client.api_key
+    return None
+
+def segment_synthesizer(provider: str) -> SegmentSynthesizer:
+    """Per-sentence synthesizer for the given TTS provider"""
+    if provider == "elevenlabs":
+        return SegmentSynthesizer(
+            audio_cache, "elevenlabs", ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID,
+            lambda text: open_elevenlabs_speech(
+                http_clients.get("elevenlabs"), ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID, text
+            )
+        )
+    if provider == "openai":
+        return SegmentSynthesizer(
+            audio_cache, "openai", OPENAI_TTS_VOICE, OPENAI_TTS_MODEL,
+            lambda text: open_openai_speech(http_clients.get("openai"), client.api_key, text)
+        )
+    raise ValueError(f"Unknown TTS provider '{provider}'")
+
+@app.post("/api/text-to-speech/stream")
+async def text_to_speech_pipelined(speech: SpeechRequest):
+    """Speak a long reply sentence by sentence; audio starts after the first sentence"""
+    try:
+        synthesize = segment_synthesizer(speech.provider)
+        audio = await prime_stream(synthesize_pipelined(split_sentences(speech.content), synthesize))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TTSUpstreamError as e:
+        logger.error(f"Error in pipelined text-to-speech endpoint: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error(f"Error in pipelined text-to-speech endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(audio, media_type="audio/mpeg")
+
+@app.get("/api/tts/audio/{audio_key}")
+async def get_cached_audio(audio_key: str, request: Request):
+    """Serve previously synthesized audio by its X-Audio-Key (supports Range)"""
+    if len(audio_key) != 64 or any(c not in "0123456789abcdef" for c in audio_key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    cached_path = audio_cache.get(audio_key)
+    if cached_path:
+        try:
+            return cached_audio_response(cached_path, audio_key, request.headers.get("range"))
+        except FileNotFoundError:
+            pass
+    raise HTTPException(status_code=404, detail="Audio not found")
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/voice/turn")
+async def voice_turn(
+    audio: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
+    provider: str = Form("elevenlabs"),
+    db: Session = Depends(get_db)
+):
+    """One voice turn in a single round trip.
+
+    Transcribes the recording, runs it through the chat flow (applying any
+    checklist updates) and streams back server-sent events: ``transcript``,
+    ``reply`` (the same payload as /api/chat), one ``audio`` event per
+    spoken sentence (base64 MP3, in order) and finally ``done``.
+    """
+    try:
+        synthesize = segment_synthesizer(provider)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        transcription = await transcribe_upload(client, audio)
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in voice turn endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    text = transcription.text
+
+    async def events():
+        yield sse_event("transcript", {"text": text, "preprocessing": transcription.preprocessing})
+        if not text.strip():
+            yield sse_event("done", {"success": False})
+            return
+
+        reply = await chat(Message(content=text, session_id=session_id), db)
+        yield sse_event("reply", reply)
+        spoken = reply["messages"][0]["content"] if reply["success"] else ""
+
+        sentences = split_sentences(spoken)
+        chunks = synthesize_pipelined(sentences, synthesize)
+        try:
+            seq = 0
+            async for chunk in chunks:
+                yield sse_event("audio", {
+                    "seq": seq,
+                    "text": sentences[seq],
+                    "audio": base64.b64encode(chunk).decode("ascii")
+                })
+                seq += 1
+        except TTSUpstreamError as e:
+            logger.error(f"Error in voice turn endpoint: {e.detail}")
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Error in voice turn endpoint: {str(e)}")
+            yield sse_event("error", {"status_code": 500, "detail": str(e)})
+        finally:
+            # Stops outstanding syntheses if the client goes away
+            await chunks.aclose()
+        yield sse_event("done", {"success": reply["success"]})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+async def library_audio_response(kind: str, entry_id: int, request: Request):
+    # A second attempt re-synthesizes audio another worker evicted after the lookup
+    for attempt in range(2):
+        try:
+            found = await audio_library.get(kind, entry_id)
+        except TTSUpstreamError as e:
+            logger.error(f"Error in {kind} audio endpoint: {e.detail}")
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except Exception as e:
+            logger.error(f"Error in {kind} audio endpoint: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        if found is None:
+            raise HTTPException(status_code=404, detail=f"{kind.capitalize()} not found")
+        path, key = found
+        try:
+            return cached_audio_response(path, key, request.headers.get("range"))
+        except FileNotFoundError:
+            if attempt:
+                logger.error(f"Error in {kind} audio endpoint: audio {key} evicted while serving")
+                raise HTTPException(status_code=503, detail="Audio was evicted, try again")
+
+@app.get("/api/checklist/items/{item_id}/audio")
+async def get_item_audio(item_id: int, request: Request):
+    """Spoken item description, pre-synthesized by the audio library"""
+    return await library_audio_response("item", item_id, request)
+
+@app.get("/api/checklist/sections/{section_id}/audio")
+async def get_section_audio(section_id: int, request: Request):
+    """Spoken section name and description, pre-synthesized by the audio library"""
+    return await library_audio_response("section", section_id, request)
+
+@app.post("/api/checklists/{category_id}/versions", status_code=201)
+async def publish_checklist_version(
+    category_id: int,
+    request: Optional[TemplatePublishRequest] = None,
+    db: Session = Depends(get_db)
+):
+    """Freeze the category's current template; returns the latest version if unchanged"""
+    try:
+        version = publish_template(db, category_id, request.note if request else None)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return version_to_dict(version)
+
+@app.get("/api/checklists/{category_id}/versions")
+async def list_checklist_versions(category_id: int, db: Session = Depends(get_db)):
+    """Published template versions of a category, newest first"""
+    versions = (
+        db.query(ChecklistTemplateVersion)
+        .filter(ChecklistTemplateVersion.category_id == category_id)
+        .order_by(ChecklistTemplateVersion.version.desc())
+    )
+    return [version_to_dict(version) for version in versions]
+
+@app.get("/api/checklists/{category_id}/versions/{version}")
+async def get_checklist_version(category_id: int, version: int, db: Session = Depends(get_db)):
+    """A published template version with its sections and items"""
+    row = db.query(ChecklistTemplateVersion).filter(
+        ChecklistTemplateVersion.category_id == category_id, ChecklistTemplateVersion.version == version
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Template version not found")
+    return {**version_to_dict(row), **template_snapshots.get(db, row.id).content}
+
+@app.get("/api/search")
+async def search(
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """Ranked full-text search over items, sections, notes and chat messages
+
+    `kind` is an optional comma-separated subset of item, section and message.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    kinds = [k.strip() for k in kind.split(",") if k.strip()] if kind else None
+    # The read replica is only refreshed on checklist writes, not chat messages
+    source = read_db if kinds and "message" not in kinds else db
+    try:
+        return search_index(source, q, kinds, min(limit, 100))
+    except Exception as e:
+        logger.error(f"Error in search endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/checklist/item")
+async def update_checklist_item(update: ChecklistItemUpdate, db: Session = Depends(get_db)):
+    """Check, uncheck or annotate an item.
+
+    Pass the item's ``version`` from the last read to be told (409) when
+    someone else changed the same fields in the meantime.
+    """
+    changes = {}
+    if update.is_completed is not None:
+        changes["is_completed"] = update.is_completed
+    if update.notes is not None:
+        changes["notes"] = update.notes
+    try:
+        item = update_item(db, update.id, changes, update.version, update.checked_by, source="api")
+    except ItemConflictError as e:
+        raise HTTPException(
+            status_code=409, detail={"message": str(e), "fields": e.fields, "item": e.item}
+        )
+    except Exception as e:
+        logger.error(f"Error in checklist item endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item_to_dict(item)
+
+@app.get("/api/checklist/items/{item_id}/events")
+async def get_item_events(
+    item_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 200,
+    db: Session = Depends(get_db)
+):
+    """Change history of an item: recent events plus daily rollups of compacted ones"""
+    if db.query(ChecklistItem.id).filter(ChecklistItem.id == item_id).first() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    try:
+        return item_history(db, item_id, since, until, min(limit, 1000))
+    except Exception as e:
+        logger.error(f"Error in item events endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/inspection-runs", status_code=201)
+async def start_inspection_run(request: InspectionRunCreate, db: Session = Depends(get_db)):
+    """Start an inspection of a vessel against a checklist category"""
+    try:
+        run = create_run(db, request.vessel, request.category_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return run_to_dict(db, run)
+
+@app.get("/api/inspection-runs")
+async def list_inspection_runs(vessel: Optional[str] = None, limit: int = 50, db: Session = Depends(get_read_db)):
+    """Most recent runs, optionally for one vessel"""
+    query = db.query(InspectionRun)
+    if vessel:
+        query = query.filter(InspectionRun.vessel == vessel)
+    runs = query.order_by(InspectionRun.started_at.desc(), InspectionRun.id.desc()).limit(min(limit, 500))
+    return [run_to_dict(db, run) for run in runs]
+
+@app.get("/api/inspection-runs/{run_id}")
+async def get_inspection_run(run_id: int, db: Session = Depends(get_read_db)):
+    """A run with the state of each of its items"""
+    run = get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Inspection run not found")
+    return run_to_dict(db, run, include_items=True)
+
+@app.post("/api/inspection-runs/{run_id}/items/{item_id}")
+async def update_inspection_run_item(
+    run_id: int,
+    item_id: int,
+    update: InspectionRunItemUpdate,
+    db: Session = Depends(get_db)
+):
+    """Check or uncheck an item within a run"""
+    run = get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Inspection run not found")
+    if run.finished_at is not None:
+        raise HTTPException(status_code=409, detail="Inspection run is finished")
+    try:
+        run = update_run_item(db, run, item_id, update.is_completed, update.notes, update.checked_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RunConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return run_to_dict(db, run)
+
+@app.post("/api/inspection-runs/{run_id}/finish")
+async def finish_inspection_run(run_id: int, db: Session = Depends(get_db)):
+    """Mark a run as finished"""
+    run = get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Inspection run not found")
+    return run_to_dict(db, finish_run(db, run))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/api/admin/checklists/export", dependencies=[Depends(require_admin)])
+async def export_checklists(db: Session = Depends(get_db)):
+    """Every checklist template as JSON Lines, streamed"""
+    return StreamingResponse(
+        export_jsonl(db),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="checklists.jsonl"'}
+    )
+
+@app.post("/api/admin/checklists/import", dependencies=[Depends(require_admin)])
+async def import_checklists(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Upsert checklist templates from a JSON Lines upload"""
+    # Uploads are spooled to disk, so the file is read line by line in constant memory
+    lines = io.TextIOWrapper(file.file, encoding="utf-8")
+    try:
+        return await asyncio.to_thread(import_jsonl, db, lines)
+    except (ChecklistImportError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in checklist import endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        lines.detach()
+
+@app.get("/api/fleet/progress")
+async def get_fleet_progress(db: Session = Depends(get_read_db)):
+    """Completion per vessel, category and section over each vessel's latest runs"""
+    try:
+        return fleet_progress.get(db)
+    except Exception as e:
+        logger.error(f"Error in fleet progress endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/items")
+async def get_item_analytics(db: Session = Depends(get_db)):
+    """Time to complete each item during inspection runs: count, mean, p50 and p95 in seconds"""
+    try:
+        return completion_analytics.item_stats(db)
+    except Exception as e:
+        logger.error(f"Error in item analytics endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/sections")
+async def get_section_analytics(db: Session = Depends(get_db)):
+    """Item completion times merged per section"""
+    try:
+        return completion_analytics.section_stats(db)
+    except Exception as e:
+        logger.error(f"Error in section analytics endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/stalls")
+async def get_stall_analytics(limit: int = 10, db: Session = Depends(get_db)):
+    """Items where inspections stall longest, by p95 completion time"""
+    try:
+        return completion_analytics.stalls(db, min(limit, 100))
+    except Exception as e:
+        logger.error(f"Error in stall analytics endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/crew/jobs", status_code=202)
+async def submit_crew_job(request: CrewJobRequest):
+    """Queue a checklist crew operation and return its job id"""
+    try:
+        job = crew_jobs.submit(request.kind, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+@app.get("/api/crew/jobs/{job_id}")
+async def get_crew_job(job_id: str, wait: float = 0):
+    """Return a job's status, optionally long-polling up to `wait` seconds"""
+    job = await crew_jobs.wait(job_id, timeout=min(wait, 30)) if wait > 0 else crew_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/crew/jobs/{job_id}/events")
+async def stream_crew_job(job_id: str):
+    """Stream a job's status changes as server-sent events"""
+    if crew_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for state in crew_jobs.stream(job_id):
+            yield f"data: {json.dumps(state, default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.delete("/api/crew/jobs/{job_id}")
+async def cancel_crew_job(job_id: str):
+    """Cancel a pending or running job"""
+    job = crew_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
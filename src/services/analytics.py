@@ -0,0 +1,312 @@
+"""
+Completion-time analytics, folded into stored sketches as item events are written
+"""
+import json
+import math
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..database.item_events import ITEM_EVENT_RETENTION_DAYS, WRITTEN_KEY
+from ..database.models import (
+    ChecklistItem, ChecklistItemEvent, ChecklistSection, CompletionAnalyticsCursor, CompletionSketch, InspectionRun
+)
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_BATCH_SIZE = 5000
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_MAX_BUCKETS = 512
+SKETCH_MIN_VALUE = 1e-3  # seconds; anything shorter counts as zero
+
+class DurationSketch:
+    """Quantile sketch over positive durations, in the style of DDSketch.
+
+    Values fall into logarithmic buckets, so any quantile is reported
+    within ``relative_accuracy`` of a true value. Sketches merge by adding
+    bucket counts, which is what lets item sketches roll up into section
+    sketches. Memory is capped at ``max_buckets``: past that the lowest
+    buckets are folded together, trading accuracy on the fastest
+    completions for the p95 we care about.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY, max_buckets: int = SKETCH_MAX_BUCKETS):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float):
+        value = max(value, 0.0)
+        if value < SKETCH_MIN_VALUE:
+            self.zeros += 1
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self._collapse()
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DurationSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self._collapse()
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _collapse(self):
+        if len(self.buckets) <= self.max_buckets:
+            return
+        indexes = sorted(self.buckets)
+        excess = indexes[:len(indexes) - self.max_buckets + 1]
+        target = excess[-1]
+        self.buckets[target] = sum(self.buckets.pop(index) for index in excess[:-1]) + self.buckets[target]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Exact extremes are known; keep estimates inside them
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "buckets": sorted(self.buckets.items()),
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        })
+
+    @classmethod
+    def from_json(cls, value: str) -> "DurationSketch":
+        state = json.loads(value)
+        sketch = cls()
+        sketch.buckets = {index: count for index, count in state["buckets"]}
+        sketch.zeros = state["zeros"]
+        sketch.count = state["count"]
+        sketch.total = state["total"]
+        sketch.min = state["min"]
+        sketch.max = state["max"]
+        return sketch
+
+    def to_dict(self) -> Dict:
+        def seconds(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean": seconds(self.mean),
+            "p50": seconds(self.quantile(0.5)),
+            "p95": seconds(self.quantile(0.95)),
+            "max": seconds(self.max) if self.count else None
+        }
+
+def _last_folded(connection) -> int:
+    return connection.execute(
+        select(CompletionAnalyticsCursor.last_event_id).where(CompletionAnalyticsCursor.id == 1)
+    ).scalar() or 0
+
+def _run_steps(connection, run_ids: Iterable[int], cursor: int) -> Dict[int, datetime]:
+    """Last completion already folded for each run, or its start; deleted runs are left out."""
+    run_ids = list(run_ids)
+    steps: Dict[int, datetime] = {}
+    for start in range(0, len(run_ids), 500):
+        chunk = run_ids[start:start + 500]
+        for row in connection.execute(
+            select(InspectionRun.id, InspectionRun.started_at).where(InspectionRun.id.in_(chunk))
+        ):
+            steps[row.id] = row.started_at
+        for run_id, last_at in connection.execute(
+            select(ChecklistItemEvent.run_id, func.max(ChecklistItemEvent.created_at))
+            .where(
+                ChecklistItemEvent.run_id.in_(chunk),
+                ChecklistItemEvent.event == "completed",
+                ChecklistItemEvent.id <= cursor
+            )
+            .group_by(ChecklistItemEvent.run_id)
+        ):
+            if run_id in steps:
+                steps[run_id] = max(steps[run_id], last_at)
+    return steps
+
+def load_sketches(connection, item_ids: Optional[Iterable[int]] = None) -> Dict[int, DurationSketch]:
+    query = select(CompletionSketch.item_id, CompletionSketch.sketch)
+    if item_ids is not None:
+        query = query.where(CompletionSketch.item_id.in_(list(item_ids)))
+    return {row.item_id: DurationSketch.from_json(row.sketch) for row in connection.execute(query)}
+
+def fold_completions(db: Session, batch_size: int = ANALYTICS_BATCH_SIZE) -> int:
+    """Fold ``completed`` events past the stored cursor into the stored sketches.
+
+    Must run inside a write transaction, so the cursor cannot move under
+    it. An item's duration is the time from the previous completion in the
+    same run (or the start of the run) to its own completion: the time the
+    crew spent on it. Returns how many events were read.
+    """
+    connection = db.connection()
+    cursor = _last_folded(connection)
+    processed = 0
+    while True:
+        rows = connection.execute(
+            select(
+                ChecklistItemEvent.id, ChecklistItemEvent.item_id,
+                ChecklistItemEvent.run_id, ChecklistItemEvent.created_at
+            )
+            .where(
+                ChecklistItemEvent.id > cursor,
+                ChecklistItemEvent.event == "completed",
+                ChecklistItemEvent.run_id.isnot(None)
+            )
+            .order_by(ChecklistItemEvent.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        steps = _run_steps(connection, {row.run_id for row in rows}, cursor)
+        sketches = load_sketches(connection, {row.item_id for row in rows})
+        changed = set()
+        for row in rows:
+            previous = steps.get(row.run_id)
+            # Skip deleted runs, and runs whose previous completion may have been compacted away
+            if previous is not None and row.created_at - previous <= timedelta(days=ITEM_EVENT_RETENTION_DAYS):
+                sketches.setdefault(row.item_id, DurationSketch()).add((row.created_at - previous).total_seconds())
+                changed.add(row.item_id)
+            if previous is not None:
+                steps[row.run_id] = row.created_at
+        cursor = rows[-1].id
+        # A batch's sketches and the cursor past it are saved together or not at all,
+        # so a failure in a later batch cannot leave durations that get folded twice
+        with connection.begin_nested():
+            if changed:
+                upsert = sqlite_insert(CompletionSketch).values([
+                    {"item_id": item_id, "sketch": sketches[item_id].to_json()} for item_id in changed
+                ])
+                connection.execute(upsert.on_conflict_do_update(
+                    index_elements=[CompletionSketch.item_id], set_={"sketch": upsert.excluded.sketch}
+                ))
+            upsert = sqlite_insert(CompletionAnalyticsCursor).values(id=1, last_event_id=cursor)
+            connection.execute(upsert.on_conflict_do_update(
+                index_elements=[CompletionAnalyticsCursor.id], set_={"last_event_id": cursor}
+            ))
+        processed += len(rows)
+    return processed
+
+# Registered after item_events' writer (imported above), so this commit's events are already inserted
+@event.listens_for(Session, "before_commit")
+def _fold_written_events(session: Session):
+    rows = session.info.pop(WRITTEN_KEY, None)
+    if not rows or not any(row["event"] == "completed" and row["run_id"] is not None for row in rows):
+        return
+    try:
+        fold_completions(session)
+    except Exception as e:
+        # The events are saved regardless; the next fold picks them up
+        logger.error(f"Error folding completion analytics: {str(e)}")
+
+class CompletionAnalytics:
+    """How long items and sections take to complete during inspection runs.
+
+    Durations are folded into one sketch per item, stored in
+    ``completion_sketches``, by the same transaction that writes their
+    ``completed`` events, with the last folded event id stored alongside.
+    Every worker reads the same sketches, so nothing is rescanned after a
+    restart and compacting old events does not change the results.
+    Sections are item sketches merged on request.
+    """
+
+    def __init__(self, batch_size: int = ANALYTICS_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def update(self, db: Session) -> int:
+        """Fold in events not folded when they were written; returns how many were read."""
+        pending = db.query(func.max(ChecklistItemEvent.id)).filter(
+            ChecklistItemEvent.event == "completed", ChecklistItemEvent.run_id.isnot(None)
+        ).scalar()
+        if pending is None or pending <= _last_folded(db.connection()):
+            return 0
+        db.execute(text("BEGIN IMMEDIATE"))
+        try:
+            processed = fold_completions(db, self.batch_size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return processed
+
+    def sketches(self, db: Session) -> Dict[int, DurationSketch]:
+        self.update(db)
+        return load_sketches(db.connection())
+
+    def item_stats(self, db: Session) -> List[Dict]:
+        sketches = self.sketches(db)
+        rows = db.query(
+            ChecklistItem.id, ChecklistItem.description, ChecklistItem.section_id
+        ).order_by(ChecklistItem.section_id, ChecklistItem.order)
+        return [
+            {"item_id": row.id, "description": row.description, "section_id": row.section_id,
+             **sketches[row.id].to_dict()}
+            for row in rows if row.id in sketches
+        ]
+
+    def section_stats(self, db: Session) -> List[Dict]:
+        sketches = self.sketches(db)
+        items_by_section: Dict[int, List[int]] = {}
+        for item_id, section_id in db.query(ChecklistItem.id, ChecklistItem.section_id):
+            items_by_section.setdefault(section_id, []).append(item_id)
+        sections = db.query(
+            ChecklistSection.id, ChecklistSection.name, ChecklistSection.category_id
+        ).order_by(ChecklistSection.category_id, ChecklistSection.order)
+
+        result = []
+        for section in sections:
+            merged = DurationSketch()
+            for item_id in items_by_section.get(section.id, []):
+                if item_id in sketches:
+                    merged.merge(sketches[item_id])
+            if merged.count:
+                result.append({
+                    "section_id": section.id, "name": section.name, "category_id": section.category_id,
+                    **merged.to_dict()
+                })
+        return result
+
+    def stalls(self, db: Session, limit: int = 10) -> List[Dict]:
+        """Items that take longest to complete, slowest p95 first."""
+        items = self.item_stats(db)
+        return sorted(items, key=lambda item: item["p95"], reverse=True)[:limit]
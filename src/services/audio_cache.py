@@ -0,0 +1,239 @@
+"""
+Content-addressed, size-bounded disk cache for synthesized speech
+"""
+import os
+import re
+import uuid
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from fastapi.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(BASE_DIR, "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+def normalize_text(text: str) -> str:
+    """Text as it affects the audio: Unicode-normalized, whitespace collapsed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+class AudioCache:
+    """Synthesized audio stored on disk under a hash of what produced it.
+
+    The key covers provider, voice, model and normalized text, so identical
+    requests share one file. An LRU index bounded by ``max_bytes`` decides
+    what to evict; file modification times record recency so the order
+    survives restarts. Other workers may evict a file at any time, which
+    simply turns a hit into a miss.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES, suffix: str = ".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index: Optional["OrderedDict[str, int]"] = None  # key -> size, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    @staticmethod
+    def make_key(provider: str, voice: str, model: str, text: str) -> str:
+        payload = "\x1f".join([provider, voice, model, normalize_text(text)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached audio for ``key``, or None on a miss.
+
+        The file on disk is what counts: a file another worker wrote after
+        this one scanned the directory is a hit and joins the index.
+        """
+        path = self.path(key)
+        with self._lock:
+            index = self._load_index()
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                if key in index:
+                    self._total_bytes -= index.pop(key)
+                self.stats["misses"] += 1
+                return None
+            if key in index:
+                index.move_to_end(key)
+            else:
+                index[key] = size
+                self._total_bytes += size
+                self._evict()
+            self.stats["hits"] += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, data: bytes):
+        """Store a complete audio file."""
+        tmp_path = self._tmp_path(key)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self._commit(key, tmp_path)
+
+    async def fill(self, key: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Pass audio chunks through while writing them to the cache.
+
+        The file only becomes visible once the stream has completed; an
+        error or client disconnect part way through discards it.
+        """
+        tmp_path = self._tmp_path(key)
+        complete = False
+        try:
+            with open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                self._commit(key, tmp_path)
+            else:
+                self._discard(tmp_path)
+
+    def _tmp_path(self, key: str) -> str:
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        return self.path(key) + f".{uuid.uuid4().hex}.tmp"
+
+    def _commit(self, key: str, tmp_path: str):
+        try:
+            size = os.path.getsize(tmp_path)
+            if size == 0 or size > self.max_bytes:
+                self._discard(tmp_path)
+                return
+            os.replace(tmp_path, self.path(key))
+        except OSError as e:
+            logger.error(f"Error storing cached audio {key}: {str(e)}")
+            self._discard(tmp_path)
+            return
+        with self._lock:
+            index = self._load_index()
+            self._total_bytes += size - index.pop(key, 0)
+            index[key] = size
+            self.stats["stored"] += 1
+            self._evict()
+
+    def _evict(self):
+        # Called with self._lock held; files another worker already removed
+        # are simply dropped from the index
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.stats["evicted"] += 1
+            self._discard(self.path(key))
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        # Called with self._lock held; scans the directory once per worker
+        if self._index is not None:
+            return self._index
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if name.endswith(".tmp"):
+                        # Left behind by a crashed worker
+                        self._discard(path)
+                    elif name.endswith(self.suffix):
+                        stat = os.stat(path)
+                        entries.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+        self._evict()
+        return self._index
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None when the header is absent or not a byte range; raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are not worth supporting for short audio clips
+        return None
+    start_text, _, end_text = spec.partition("-")
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    else:
+        suffix = int(end_text)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(size - suffix, 0), size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+def _read_chunks(f, start: int, length: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+def cached_audio_response(path: str, key: str, range_header: Optional[str] = None, media_type: str = "audio/mpeg") -> Response:
+    """Serve a cached file, honouring a single byte range if requested.
+
+    The file is opened before the response is built, so another worker
+    evicting it afterwards cannot break the response. Raises
+    FileNotFoundError if it is already gone; callers treat that as a miss.
+    """
+    f = open(path, "rb")
+    size = os.fstat(f.fileno()).st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{key}"',
+        "X-Audio-Key": key,
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        f.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read_chunks(f, start, end - start + 1),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
@@ -0,0 +1,190 @@
+"""
+Pre-synthesized audio for checklist item and section descriptions
+"""
+import os
+import fcntl
+import asyncio
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..database.models import ChecklistItem, ChecklistSection
+from .audio_cache import normalize_text
+from .tts_pipeline import SegmentSynthesizer
+
+logger = logging.getLogger(__name__)
+
+AUDIO_LIBRARY_ENABLED = os.getenv("AUDIO_LIBRARY_ENABLED", "false").lower() == "true"
+AUDIO_LIBRARY_PROVIDER = os.getenv("AUDIO_LIBRARY_PROVIDER", "elevenlabs")
+AUDIO_LIBRARY_CHECK_INTERVAL = float(os.getenv("AUDIO_LIBRARY_CHECK_INTERVAL", "300"))  # seconds
+AUDIO_LIBRARY_PARALLELISM = int(os.getenv("AUDIO_LIBRARY_PARALLELISM", "2"))
+
+# (kind, id, spoken text); kind is "item" or "section"
+CatalogEntry = Tuple[str, int, str]
+
+def section_text(section: ChecklistSection) -> str:
+    return f"{section.name}. {section.description}" if section.description else section.name
+
+def load_catalog(db: Session) -> List[CatalogEntry]:
+    """Everything voice mode reads aloud, in a stable order."""
+    entries: List[CatalogEntry] = []
+    for section in db.query(ChecklistSection).order_by(ChecklistSection.id):
+        entries.append(("section", section.id, section_text(section)))
+    for item in db.query(ChecklistItem).order_by(ChecklistItem.id):
+        entries.append(("item", item.id, item.description))
+    return entries
+
+def load_entry(db: Session, kind: str, entry_id: int) -> Optional[CatalogEntry]:
+    if kind == "section":
+        section = db.query(ChecklistSection).filter(ChecklistSection.id == entry_id).first()
+        return (kind, section.id, section_text(section)) if section else None
+    item = db.query(ChecklistItem).filter(ChecklistItem.id == entry_id).first()
+    return (kind, item.id, item.description) if item else None
+
+@contextmanager
+def build_lock(directory: str) -> Iterator[bool]:
+    """Lock file in the shared cache directory; yields False if another worker holds it."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "audio_library.lock"), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def catalog_hash(entries: List[CatalogEntry], voice: str = "") -> str:
+    digest = hashlib.sha256(voice.encode("utf-8"))
+    for kind, entry_id, text in entries:
+        digest.update(f"{kind}\x1f{entry_id}\x1f{normalize_text(text)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+class AudioLibrary:
+    """Keeps spoken audio for every item and section description in the audio cache.
+
+    A background job hashes the catalog's text every
+    ``AUDIO_LIBRARY_CHECK_INTERVAL`` seconds and, when the hash changes,
+    synthesizes whatever is not cached yet. Descriptions rarely change, so
+    reading out the next item is normally a cache hit; anything missing
+    (a brand new item, an evicted file) is synthesized on request.
+
+    Workers sharing the cache directory take turns through a lock file:
+    while one is building, the others skip the check and fill their
+    lookups from the cache on request.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        synthesizer_factory: Callable[[], SegmentSynthesizer],
+        check_interval: float = AUDIO_LIBRARY_CHECK_INTERVAL,
+        max_parallel: int = AUDIO_LIBRARY_PARALLELISM
+    ):
+        self.session_factory = session_factory
+        self.synthesizer_factory = synthesizer_factory
+        self.check_interval = check_interval
+        self.max_parallel = max_parallel
+        self.catalog_hash: Optional[str] = None
+        self._keys: Dict[Tuple[str, int], str] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"builds": 0, "synthesized": 0, "reused": 0, "errors": 0}
+
+    def _with_session(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Synthesize any missing audio if the catalog changed; True if it did."""
+        async with self._lock:
+            synthesizer = self.synthesizer_factory()
+            entries = await asyncio.to_thread(self._with_session, load_catalog)
+            digest = catalog_hash(entries, f"{synthesizer.provider}/{synthesizer.voice}/{synthesizer.model}")
+            if digest == self.catalog_hash and not force:
+                return False
+            with build_lock(synthesizer.cache.directory) as acquired:
+                if not acquired:
+                    logger.info("Audio library is being built by another worker")
+                    return False
+                return await self._build(synthesizer, entries, digest)
+
+    async def _build(self, synthesizer: SegmentSynthesizer, entries: List[CatalogEntry], digest: str) -> bool:
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        keys: Dict[Tuple[str, int], str] = {}
+        failures = 0
+
+        async def build(kind: str, entry_id: int, text: str):
+            nonlocal failures
+            key = synthesizer.cache.make_key(synthesizer.provider, synthesizer.voice, synthesizer.model, text)
+            keys[(kind, entry_id)] = key
+            if synthesizer.cache.get(key):
+                self.stats["reused"] += 1
+                return
+            async with semaphore:
+                try:
+                    await synthesizer(text)
+                    self.stats["synthesized"] += 1
+                except Exception as e:
+                    failures += 1
+                    self.stats["errors"] += 1
+                    logger.error(f"Error synthesizing {kind} {entry_id}: {str(e)}")
+
+        await asyncio.gather(*(build(*entry) for entry in entries))
+        self._keys = keys
+        self.stats["builds"] += 1
+        # Leave the hash unset after failures so the next check retries them
+        self.catalog_hash = digest if failures == 0 else None
+        logger.info(f"Audio library refreshed: {len(entries)} entries, {failures} failures")
+        return True
+
+    async def get(self, kind: str, entry_id: int) -> Optional[Tuple[str, str]]:
+        """``(path, key)`` of the audio for an item or section, or None if it does not exist."""
+        synthesizer = self.synthesizer_factory()
+        key = self._keys.get((kind, entry_id))
+        if key:
+            path = synthesizer.cache.get(key)
+            if path:
+                return path, key
+
+        # Not built yet, new since the last refresh, or evicted
+        entry = await asyncio.to_thread(self._with_session, load_entry, kind, entry_id)
+        if entry is None:
+            return None
+        text = entry[2]
+        key = synthesizer.cache.make_key(synthesizer.provider, synthesizer.voice, synthesizer.model, text)
+        path = synthesizer.cache.get(key)
+        if not path:
+            await synthesizer(text)
+            path = synthesizer.cache.get(key)
+        self._keys[(kind, entry_id)] = key
+        return (path, key) if path else None
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing audio library: {str(e)}")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
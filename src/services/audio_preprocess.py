@@ -0,0 +1,251 @@
+"""
+Audio preprocessing before transcription: downmix, resample, trim silence
+"""
+import io
+import os
+import time
+import wave
+import logging
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AUDIO_PREPROCESSING_ENABLED = os.getenv("AUDIO_PREPROCESSING_ENABLED", "true").lower() == "true"
+TARGET_SAMPLE_RATE = 16000  # what Whisper resamples to anyway
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+VAD_PADDING_MS = 200  # kept around speech so word onsets are not clipped
+WAV_DECODE_BLOCK_FRAMES = 1 << 20  # frames decoded at once from an upload
+
+_PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+@dataclass
+class PreprocessedAudio:
+    data: bytes
+    original_bytes: int
+    original_seconds: float
+    seconds: float
+    elapsed_ms: float
+    # Trimmed mono samples at ``sample_rate``, kept for chunked transcription
+    samples: Optional[np.ndarray] = None
+    sample_rate: int = TARGET_SAMPLE_RATE
+
+    @property
+    def is_silent(self) -> bool:
+        return self.seconds == 0
+
+    def report(self) -> dict:
+        return {
+            "original_bytes": self.original_bytes,
+            "bytes": len(self.data),
+            "bytes_saved": self.original_bytes - len(self.data),
+            "original_seconds": round(self.original_seconds, 3),
+            "seconds": round(self.seconds, 3),
+            "seconds_trimmed": round(self.original_seconds - self.seconds, 3),
+            "preprocess_ms": round(self.elapsed_ms, 1)
+        }
+
+def is_wav(header: bytes) -> bool:
+    return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+def _pcm_to_float(raw: bytes, width: int, channels: int) -> np.ndarray:
+    if width == 3:
+        # 24-bit: widen to 32-bit by padding the low byte
+        packed = np.frombuffer(raw[:len(raw) - len(raw) % 3], dtype=np.uint8).reshape(-1, 3)
+        widened = np.zeros((len(packed), 4), dtype=np.uint8)
+        widened[:, 1:] = packed
+        samples = widened.view("<i4").ravel().astype(np.float32) / 2 ** 31
+    elif width in _PCM_DTYPES:
+        dtype = np.dtype(_PCM_DTYPES[width]).newbyteorder("<")
+        samples = np.frombuffer(raw[:len(raw) - len(raw) % width], dtype=dtype).astype(np.float32)
+        if width == 1:
+            samples = (samples - 128) / 128
+        else:
+            samples /= 2 ** (8 * width - 1)
+    else:
+        raise ValueError(f"Unsupported sample width: {width} bytes")
+
+    frames = len(samples) // channels
+    return samples[:frames * channels].reshape(frames, channels)
+
+def _open_wav(source: BinaryIO) -> wave.Wave_read:
+    try:
+        return wave.open(source, "rb")
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Unsupported WAV file: {e}")
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode PCM WAV into float32 samples in [-1, 1], shaped (frames, channels).
+
+    Raises ValueError for WAV files that are not integer PCM.
+    """
+    with _open_wav(io.BytesIO(data)) as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        try:
+            raw = wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f"Unsupported WAV file: {e}")
+    return _pcm_to_float(raw, width, channels), rate
+
+def read_wav_mono(
+    source: BinaryIO,
+    target_rate: int = TARGET_SAMPLE_RATE,
+    block_frames: int = WAV_DECODE_BLOCK_FRAMES
+) -> Tuple[np.ndarray, float]:
+    """Decode PCM WAV from a file into mono samples at ``target_rate``, block by block.
+
+    Only one block of the original is held in memory at a time; the result
+    is what ``resample(to_mono(decode_wav(data)))`` gives for the whole
+    file. Returns the samples and the original duration in seconds.
+    """
+    with _open_wav(source) as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        total = wav.getnframes()
+
+        def blocks() -> Iterator[np.ndarray]:
+            while True:
+                try:
+                    raw = wav.readframes(block_frames)
+                except (wave.Error, EOFError) as e:
+                    raise ValueError(f"Unsupported WAV file: {e}")
+                if not raw:
+                    return
+                yield to_mono(_pcm_to_float(raw, width, channels))
+
+        if not rate:
+            return np.zeros(0, dtype=np.float32), 0.0
+        return _resample_blocks(blocks(), total, rate, target_rate), total / rate
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+def resample(samples: np.ndarray, rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Resample by linear interpolation, low-pass filtering first when downsampling."""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if rate > target_rate:
+        width = int(round(rate / target_rate))
+        if width > 1:
+            # Box filter against aliasing; cheap and good enough for speech
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    count = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(count, dtype=np.float64) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def _resample_blocks(blocks: Iterator[np.ndarray], total: int, rate: int, target_rate: int) -> np.ndarray:
+    # Same result as resample() over the concatenated blocks: each block is
+    # filtered with enough of the previous one before it to be exact at the
+    # seam, and output samples are only taken where both neighbours are final
+    if rate == target_rate:
+        return np.concatenate(list(blocks) or [np.zeros(0, dtype=np.float32)])
+    width = int(round(rate / target_rate)) if rate > target_rate else 1
+    kernel = np.full(width, 1.0 / width, dtype=np.float32)
+    margin = width + 2
+    step = rate / target_rate
+    count = int(round(total * target_rate / rate))
+
+    pending = next(blocks, np.zeros(0, dtype=np.float32))
+    following = next(blocks, None)
+    if following is None:
+        return resample(pending, rate, target_rate)
+
+    output = []
+    history = np.zeros(0, dtype=np.float32)
+    offset = 0  # source index of history[0]
+    produced = 0
+    while pending is not None:
+        buffer = np.concatenate([history, pending])
+        filtered = np.convolve(buffer, kernel, mode="same") if width > 1 else buffer
+        if following is None:
+            end = count
+        else:
+            # Output k needs source samples floor(k * step) and the one after it
+            final = offset + len(buffer) - margin
+            end = min(count, max(int(np.ceil((final - 1) / step)), produced))
+        if end > produced:
+            positions = np.arange(produced, end, dtype=np.float64) * step - offset
+            output.append(np.interp(positions, np.arange(len(buffer)), filtered).astype(np.float32))
+            produced = end
+        keep = min(len(buffer), 2 * margin)
+        offset += len(buffer) - keep
+        history = buffer[len(buffer) - keep:]
+        pending, following = following, (next(blocks, None) if following is not None else None)
+    return np.concatenate(output) if output else np.zeros(0, dtype=np.float32)
+
+def frame_levels(samples: np.ndarray, frame: int) -> np.ndarray:
+    """RMS level in dBFS of each complete ``frame``-sample frame."""
+    frames = len(samples) // frame
+    energy = np.sqrt(np.mean(np.square(samples[:frames * frame].reshape(frames, frame)), axis=1))
+    return 20 * np.log10(energy + 1e-10)
+
+def speech_bounds(
+    samples: np.ndarray,
+    rate: int,
+    threshold_dbfs: float = VAD_THRESHOLD_DBFS,
+    frame_ms: int = VAD_FRAME_MS,
+    padding_ms: int = VAD_PADDING_MS
+) -> Optional[Tuple[int, int]]:
+    """Sample range from the first to the last frame louder than the threshold.
+
+    Returns None when no frame is loud enough (the recording is silence).
+    """
+    frame = max(int(rate * frame_ms / 1000), 1)
+    levels = frame_levels(samples, frame)
+    if len(levels) == 0:
+        return None
+    voiced = np.flatnonzero(levels > threshold_dbfs)
+    if len(voiced) == 0:
+        return None
+    padding = int(rate * padding_ms / 1000)
+    start = max(voiced[0] * frame - padding, 0)
+    end = min((voiced[-1] + 1) * frame + padding, len(samples))
+    return start, end
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+def preprocess_wav(
+    source: Union[bytes, BinaryIO],
+    target_rate: int = TARGET_SAMPLE_RATE,
+    block_frames: int = WAV_DECODE_BLOCK_FRAMES
+) -> PreprocessedAudio:
+    """Decode, downmix to mono, resample and trim leading/trailing silence.
+
+    ``source`` is the WAV file's bytes or a seekable file, which is
+    decoded ``block_frames`` frames at a time. CPU-bound; call it from a
+    worker thread.
+    """
+    started_at = time.perf_counter()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    start = source.tell()
+    original_bytes = source.seek(0, os.SEEK_END) - start
+    source.seek(start)
+    mono, original_seconds = read_wav_mono(source, target_rate, block_frames)
+
+    bounds = speech_bounds(mono, target_rate)
+    trimmed = mono[bounds[0]:bounds[1]] if bounds else mono[:0]
+
+    return PreprocessedAudio(
+        data=encode_wav(trimmed, target_rate),
+        original_bytes=original_bytes,
+        original_seconds=original_seconds,
+        seconds=len(trimmed) / target_rate,
+        elapsed_ms=(time.perf_counter() - started_at) * 1000,
+        samples=trimmed,
+        sample_rate=target_rate
+    )
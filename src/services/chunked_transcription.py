@@ -0,0 +1,172 @@
+"""
+Chunked, parallel transcription of long recordings
+"""
+import os
+import re
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Sequence, Tuple
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from .audio_preprocess import VAD_FRAME_MS, encode_wav, frame_levels
+
+logger = logging.getLogger(__name__)
+
+CHUNKED_TRANSCRIPTION_MIN_SECONDS = float(os.getenv("CHUNKED_TRANSCRIPTION_MIN_SECONDS", "60"))
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "30"))
+TRANSCRIPTION_PARALLELISM = int(os.getenv("TRANSCRIPTION_PARALLELISM", "4"))
+CHUNK_OVERLAP_SECONDS = 1.0
+# How far before the target length to look for a pause to cut at
+CUT_SEARCH_FRACTION = 0.3
+MAX_OVERLAP_WORDS = 30
+
+@dataclass
+class AudioChunk:
+    index: int
+    start: float  # seconds into the recording
+    end: float
+    data: bytes  # 16-bit mono WAV
+
+def find_cuts(
+    samples: np.ndarray,
+    rate: int,
+    chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+    frame_ms: int = VAD_FRAME_MS
+) -> List[int]:
+    """Sample offsets to split at, each at the quietest frame near a chunk boundary.
+
+    Every chunk is at most ``chunk_seconds`` long; within the last
+    ``CUT_SEARCH_FRACTION`` of that span the cut goes where the level is
+    lowest, which is normally a pause between words.
+    """
+    frame = max(int(rate * frame_ms / 1000), 1)
+    levels = frame_levels(samples, frame)
+    frames_per_chunk = max(int(chunk_seconds * rate / frame), 1)
+    search = max(int(frames_per_chunk * CUT_SEARCH_FRACTION), 1)
+
+    cuts = []
+    position = 0  # in frames
+    while len(levels) - position > frames_per_chunk:
+        limit = position + frames_per_chunk
+        window = levels[limit - search:limit]
+        quietest = limit - search + int(np.argmin(window))
+        cuts.append(quietest * frame + frame // 2)
+        position = quietest + 1
+    return cuts
+
+def split_audio(
+    samples: np.ndarray,
+    rate: int,
+    chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS
+) -> List[AudioChunk]:
+    """Split mono samples at pauses into overlapping WAV chunks.
+
+    Each chunk extends ``overlap_seconds`` past its cuts on both sides, so a
+    word that straddles a cut is heard whole by at least one chunk; the
+    duplicate words are removed again by ``stitch``.
+    """
+    cuts = find_cuts(samples, rate, chunk_seconds)
+    bounds = [0] + cuts + [len(samples)]
+    overlap = int(overlap_seconds * rate)
+    chunks = []
+    for index, (start, end) in enumerate(zip(bounds, bounds[1:])):
+        start = max(start - overlap, 0)
+        end = min(end + overlap, len(samples))
+        chunks.append(AudioChunk(
+            index=index,
+            start=start / rate,
+            end=end / rate,
+            data=encode_wav(samples[start:end], rate)
+        ))
+    return chunks
+
+def _word_key(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _overlap_length(previous: Sequence[str], following: Sequence[str], max_words: int) -> int:
+    # Longest run of words that ends ``previous`` and starts ``following``
+    for length in range(min(len(previous), len(following), max_words), 0, -1):
+        if previous[-length:] == following[:length]:
+            return length
+    return 0
+
+def stitch(texts: Sequence[str], max_overlap_words: int = MAX_OVERLAP_WORDS) -> str:
+    """Join chunk transcripts in order, dropping words repeated across the overlap.
+
+    Words are compared ignoring case and punctuation, since the same word
+    may be transcribed as "jackets." at the end of one chunk and "jackets"
+    at the start of the next.
+    """
+    words: List[str] = []
+    for text in texts:
+        following = text.split()
+        skip = _overlap_length(
+            [_word_key(w) for w in words[-max_overlap_words:]],
+            [_word_key(w) for w in following[:max_overlap_words]],
+            max_overlap_words
+        )
+        words.extend(following[skip:])
+    return " ".join(words)
+
+async def transcribe_chunks(
+    chunks: Sequence[AudioChunk],
+    transcribe: Callable[[AudioChunk], Awaitable[str]],
+    max_parallel: int = TRANSCRIPTION_PARALLELISM
+) -> str:
+    """Transcribe chunks concurrently, at most ``max_parallel`` at a time, and stitch them."""
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(chunk: AudioChunk) -> str:
+        async with semaphore:
+            return await transcribe(chunk)
+
+    texts = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return stitch(texts)
+
+class WhisperTranscriber:
+    """Transcribes one chunk with the Whisper API."""
+
+    def __init__(self, client: AsyncOpenAI, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    async def __call__(self, chunk: AudioChunk) -> str:
+        transcript = await self.client.audio.transcriptions.create(
+            model=self.model,
+            file=(f"chunk-{chunk.index}.wav", chunk.data, "audio/wav")
+        )
+        return transcript.text
+
+class StubTranscriber:
+    """Offline stand-in for Whisper, for tests and local development.
+
+    Built from a script of ``(start, end, word)`` timings; a chunk is
+    "transcribed" as the words that overlap its time span, so words in the
+    overlap between chunks come out twice, as they would from Whisper.
+    """
+
+    def __init__(self, script: Sequence[Tuple[float, float, str]], delay: float = 0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls: List[AudioChunk] = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, chunk: AudioChunk) -> str:
+        self.calls.append(chunk)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            return " ".join(word for start, end, word in self.script if start < chunk.end and end > chunk.start)
+        finally:
+            self.running -= 1
+
+    @classmethod
+    def from_text(cls, text: str, seconds_per_word: float = 0.4, **kwargs) -> "StubTranscriber":
+        words = text.split()
+        return cls([(i * seconds_per_word, (i + 1) * seconds_per_word, w) for i, w in enumerate(words)], **kwargs)
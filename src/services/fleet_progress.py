@@ -0,0 +1,275 @@
+"""
+Fleet-wide inspection progress, aggregated with NumPy over run bitsets
+"""
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database.models import ChecklistCategory, ChecklistItem, ChecklistSection, InspectionRun
+from ..database.templates import TemplateSnapshot, template_snapshots
+
+logger = logging.getLogger(__name__)
+
+FLEET_PROGRESS_CHUNK_SIZE = int(os.getenv("FLEET_PROGRESS_CHUNK_SIZE", "1024"))  # runs unpacked at once
+
+def _percent(completed, total):
+    return np.round(np.divide(100.0 * completed, total, out=np.zeros(len(total)), where=total > 0), 1)
+
+def bitset_matrix(bitsets: List[bytes], indices: np.ndarray) -> np.ndarray:
+    """Boolean matrix (runs x indices): whether each run has each bit set.
+
+    Only the bytes spanning ``indices`` are unpacked, so the width follows
+    one template's items rather than the whole catalog.
+    """
+    if not bitsets or not len(indices):
+        return np.zeros((len(bitsets), len(indices)), dtype=bool)
+    first = int(indices.min()) // 8
+    width = int(indices.max()) // 8 + 1 - first
+    # Pad or cut every bitset to the same span; bits outside it are irrelevant
+    packed = b"".join(bits[first:first + width].ljust(width, b"\0") for bits in bitsets)
+    matrix = np.frombuffer(packed, dtype=np.uint8).reshape(len(bitsets), width)
+    return np.unpackbits(matrix, axis=1, bitorder="little")[:, indices - first * 8].astype(bool)
+
+class Layout:
+    """Where one template's items sit in run bitsets, grouped by section.
+
+    Also keeps the running sums over the runs currently counted with it,
+    so adding or removing one run is a vector add.
+    """
+
+    def __init__(self, bits: np.ndarray, section_ids: np.ndarray, section_sizes: np.ndarray):
+        self.bits = bits
+        self.section_ids = section_ids
+        self.section_sizes = section_sizes
+        self.total = int(section_sizes.sum())
+        starts = np.cumsum(section_sizes) - section_sizes
+        self._nonempty = section_sizes > 0
+        self._starts = starts[self._nonempty]
+        self.runs = 0
+        self.section_completed = np.zeros(len(section_ids), dtype=np.int64)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: TemplateSnapshot) -> "Layout":
+        # Items are numbered through the template, section by section
+        sections = snapshot.content["sections"]
+        return cls(
+            np.arange(snapshot.total, dtype=np.int64),
+            np.array([section["id"] for section in sections], dtype=np.int64),
+            np.array([len(section["items"]) for section in sections], dtype=np.int64)
+        )
+
+    def count(self, bitsets: List[bytes]) -> np.ndarray:
+        """Completed items per run (rows) and section (columns)."""
+        counts = np.zeros((len(bitsets), len(self.section_ids)), dtype=np.int32)
+        if bitsets and len(self._starts):
+            done = bitset_matrix(bitsets, self.bits)
+            counts[:, self._nonempty] = np.add.reduceat(done, self._starts, axis=1, dtype=np.int32)
+        return counts
+
+class RunState(NamedTuple):
+    version: int
+    vessel: str
+    category_id: int
+    template_version_id: int
+    completed: int
+    sections: np.ndarray
+
+class FleetProgress:
+    """Per-vessel, per-category and per-section completion across the fleet.
+
+    Only the latest run for each vessel and category counts. The aggregate
+    is reused until a single-row fingerprint of the run versions and the
+    catalog changes. Otherwise only runs that are new or changed since the
+    last call are loaded and unpacked, and their counts are swapped into
+    running totals.
+
+    Runs are grouped by template version, and each group unpacks only its
+    own template's items. A run keeps one count per section; nothing per
+    item is kept.
+    """
+
+    def __init__(self, chunk_size: int = FLEET_PROGRESS_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._layouts: Dict[int, Layout] = {}  # template version id -> layout
+        self._runs: Dict[int, RunState] = {}
+        self._vessels: Dict[str, List[int]] = {}  # vessel -> [runs, completed, total]
+        self._categories: Dict[int, List[int]] = {}
+        self._result: Optional[Tuple[tuple, Dict]] = None  # (fingerprint, result)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "computed": 0, "bitsets_loaded": 0}
+
+    def get(self, db: Session) -> Dict:
+        started_at = time.perf_counter()
+        fingerprint = self._fingerprint(db)
+        with self._lock:
+            if self._result is not None and self._result[0] == fingerprint:
+                self.stats["hits"] += 1
+                return {**self._result[1], "cached": True, "elapsed_ms": self._elapsed(started_at)}
+
+            categories = db.query(ChecklistCategory.id, ChecklistCategory.name).order_by(ChecklistCategory.id).all()
+            self._update(db, {category.id for category in categories})
+            result = self._summarize(db, categories)
+            self._result = (fingerprint, result)
+            self.stats["computed"] += 1
+        return {**result, "cached": False, "elapsed_ms": self._elapsed(started_at)}
+
+    @staticmethod
+    def _fingerprint(db: Session) -> tuple:
+        # Versions only go up, so their sum changes whenever any run changes;
+        # count, max and sum of ids catch runs being added or removed
+        runs = db.execute(select(
+            func.count(InspectionRun.id), func.max(InspectionRun.id),
+            func.sum(InspectionRun.id), func.sum(InspectionRun.version)
+        )).one()
+        items = db.execute(select(
+            func.count(ChecklistItem.id), func.max(ChecklistItem.id),
+            func.sum(ChecklistItem.id), func.sum(ChecklistItem.section_id)
+        )).one()
+        sections = db.execute(select(
+            func.count(ChecklistSection.id), func.sum(ChecklistSection.id), func.sum(ChecklistSection.category_id)
+        )).one()
+        return tuple(runs) + tuple(items) + tuple(sections)
+
+    @staticmethod
+    def _elapsed(started_at: float) -> float:
+        return round((time.perf_counter() - started_at) * 1000, 2)
+
+    def _load_layout(self, db: Session, version_id: int) -> Optional[Layout]:
+        snapshot = template_snapshots.get(db, version_id)
+        return Layout.from_snapshot(snapshot) if snapshot is not None else None
+
+    def _add(self, run_id: int, state: RunState):
+        layout = self._layouts[state.template_version_id]
+        layout.runs += 1
+        layout.section_completed += state.sections
+        for totals in (
+            self._vessels.setdefault(state.vessel, [0, 0, 0]),
+            self._categories.setdefault(state.category_id, [0, 0, 0])
+        ):
+            totals[0] += 1
+            totals[1] += state.completed
+            totals[2] += layout.total
+        self._runs[run_id] = state
+
+    def _remove(self, run_id: int):
+        state = self._runs.pop(run_id)
+        layout = self._layouts[state.template_version_id]
+        layout.runs -= 1
+        layout.section_completed -= state.sections
+        for group, key in ((self._vessels, state.vessel), (self._categories, state.category_id)):
+            totals = group[key]
+            totals[0] -= 1
+            totals[1] -= state.completed
+            totals[2] -= layout.total
+            if totals[0] == 0:
+                del group[key]
+
+    def _update(self, db: Session, known_categories: set):
+        # Plain Core rows; ORM result processing dominates at fleet scale
+        connection = db.connection()
+        latest_ids = (
+            select(func.max(InspectionRun.id))
+            .group_by(InspectionRun.vessel, InspectionRun.category_id)
+            .scalar_subquery()
+        )
+        runs = {
+            run.id: run for run in connection.execute(
+                select(
+                    InspectionRun.id, InspectionRun.vessel, InspectionRun.category_id,
+                    InspectionRun.template_version_id, InspectionRun.version
+                )
+                .where(InspectionRun.id.in_(latest_ids))
+                .order_by(InspectionRun.id)
+            )
+            # Runs of a category that has since been deleted cannot be placed
+            if run.category_id in known_categories
+        }
+
+        for run_id in [
+            run_id for run_id, state in self._runs.items()
+            if run_id not in runs or state.version != runs[run_id].version
+        ]:
+            self._remove(run_id)
+
+        stale = defaultdict(list)
+        for run in runs.values():
+            if run.id not in self._runs:
+                stale[run.template_version_id].append(run)
+        for version_id, group in stale.items():
+            if version_id not in self._layouts:
+                layout = self._load_layout(db, version_id)
+                if layout is None:
+                    continue
+                self._layouts[version_id] = layout
+            layout = self._layouts[version_id]
+            for start in range(0, len(group), self.chunk_size):
+                chunk = group[start:start + self.chunk_size]
+                loaded = {
+                    row.id: (row.version, row.completed_bits or b"") for row in connection.execute(
+                        select(InspectionRun.id, InspectionRun.version, InspectionRun.completed_bits)
+                        .where(InspectionRun.id.in_([run.id for run in chunk]))
+                    )
+                }
+                chunk = [run for run in chunk if run.id in loaded]
+                counts = layout.count([loaded[run.id][1] for run in chunk])
+                for run, sections in zip(chunk, counts):
+                    self._add(run.id, RunState(
+                        loaded[run.id][0], run.vessel, run.category_id, version_id, int(sections.sum()), sections
+                    ))
+                self.stats["bitsets_loaded"] += len(chunk)
+
+        for version_id in [version_id for version_id, layout in self._layouts.items() if layout.runs == 0]:
+            del self._layouts[version_id]
+
+    def _summarize(self, db: Session, categories: List) -> Dict:
+        sections = db.query(
+            ChecklistSection.id, ChecklistSection.name, ChecklistSection.category_id
+        ).order_by(ChecklistSection.category_id, ChecklistSection.order).all()
+
+        section_totals: Dict[int, np.ndarray] = defaultdict(lambda: np.zeros(3, dtype=np.int64))
+        for layout in self._layouts.values():
+            for section_id, size, completed in zip(
+                layout.section_ids, layout.section_sizes, layout.section_completed
+            ):
+                section_totals[int(section_id)] += (layout.runs, completed, layout.runs * size)
+
+        def rows(keys: List, totals: np.ndarray, describe) -> List[Dict]:
+            totals = totals.reshape(len(keys), 3)
+            percent = _percent(totals[:, 1], totals[:, 2])
+            return [
+                {
+                    **describe(i, key),
+                    "runs": int(totals[i, 0]),
+                    "completed": int(totals[i, 1]),
+                    "total": int(totals[i, 2]),
+                    "percent": float(percent[i])
+                }
+                for i, key in enumerate(keys)
+            ]
+
+        vessels = sorted(self._vessels)
+        return {
+            "runs": len(self._runs),
+            "vessels": rows(
+                vessels,
+                np.array([self._vessels[vessel] for vessel in vessels], dtype=np.int64),
+                lambda i, key: {"vessel": key}
+            ),
+            "categories": rows(
+                categories,
+                np.array([self._categories.get(category.id, (0, 0, 0)) for category in categories], dtype=np.int64),
+                lambda i, key: {"category_id": key.id, "name": key.name}
+            ),
+            "sections": rows(
+                sections,
+                np.array([section_totals.get(section.id, (0, 0, 0)) for section in sections], dtype=np.int64),
+                lambda i, key: {"section_id": key.id, "category_id": key.category_id, "name": key.name}
+            )
+        }
@@ -0,0 +1,127 @@
+"""
+Shared, pooled HTTP clients for upstream APIs
+"""
+import os
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+# h2 comes with httpx[http2] from requirements.txt; without it (e.g. a bare
+# dev install) the clients fall back to pooled HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+N8N_IMAGE_WEBHOOK_URL = os.getenv("N8N_IMAGE_WEBHOOK_URL", "https://blopit.app.n8n.cloud/webhook/red_image")
+HTTP_WARMUP_ENABLED = os.getenv("HTTP_WARMUP_ENABLED", "true").lower() == "true"
+
+class HTTPClientRegistry:
+    """Named ``httpx.AsyncClient`` instances, one connection pool per upstream.
+
+    Clients are created on first ``get`` and reused for the life of the
+    worker so requests share keep-alive connections instead of paying a TLS
+    handshake each time. ``warm_up`` opens connections ahead of the first
+    request and ``aclose`` must be called on shutdown.
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, Dict] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(
+        self,
+        name: str,
+        base_url: str = "",
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        warmup_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """Declare a client; it is not created until first requested."""
+        self._configs[name] = {
+            "base_url": base_url,
+            "timeout": timeout,
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            "warmup_url": warmup_url,
+            "transport": transport
+        }
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the pooled client registered under ``name``."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self._configs:
+                raise KeyError(f"No HTTP client registered as '{name}'")
+            config = self._configs[name]
+            client = httpx.AsyncClient(
+                base_url=config["base_url"],
+                timeout=config["timeout"],
+                limits=config["limits"],
+                http2=HTTP2_AVAILABLE and config["transport"] is None,
+                follow_redirects=True,
+                transport=config["transport"]
+            )
+            self._clients[name] = client
+        return client
+
+    async def warm_up(self, timeout: float = 5.0):
+        """Open a keep-alive connection to every upstream with a warm-up URL.
+
+        Failures are logged and ignored; a cold pool only costs latency.
+        """
+        async def _warm(name: str, url: str):
+            try:
+                await self.get(name).head(url, timeout=timeout)
+                logger.info(f"Warmed up HTTP client '{name}'")
+            except Exception as e:
+                logger.warning(f"Warm-up for HTTP client '{name}' failed: {str(e)}")
+
+        await asyncio.gather(*(
+            _warm(name, config["warmup_url"])
+            for name, config in self._configs.items()
+            if config["warmup_url"]
+        ))
+
+    async def aclose(self):
+        """Close every client that has been created."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {str(e)}")
+
+def create_default_registry() -> HTTPClientRegistry:
+    """Registry with the upstreams the application talks to."""
+    registry = HTTPClientRegistry()
+    registry.register(
+        "openai",
+        timeout=60.0,
+        warmup_url="https://api.openai.com/v1/models" if HTTP_WARMUP_ENABLED else None
+    )
+    registry.register(
+        "elevenlabs",
+        base_url="https://api.elevenlabs.io",
+        timeout=30.0,
+        warmup_url="https://api.elevenlabs.io/v1/models" if HTTP_WARMUP_ENABLED else None
+    )
+    registry.register(
+        "n8n",
+        timeout=15.0,
+        # Warm the origin rather than the webhook so no workflow is triggered
+        warmup_url=str(httpx.URL(N8N_IMAGE_WEBHOOK_URL).join("/")) if HTTP_WARMUP_ENABLED else None
+    )
+    return registry
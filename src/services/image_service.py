@@ -0,0 +1,167 @@
+"""
+Relevant-image lookup against the n8n webhook, cached and failure-isolated
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "512"))
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", "3600"))  # seconds
+IMAGE_MISS_TTL = int(os.getenv("IMAGE_MISS_TTL", "300"))  # seconds to remember "no image"
+IMAGE_LOOKUP_TIMEOUT = httpx.Timeout(8.0, connect=3.0)
+
+def normalize_message(message: str) -> str:
+    """Cache key for a message: case, punctuation and spacing do not matter."""
+    words = re.findall(r"[a-z0-9']+", message.lower())
+    return " ".join(words)
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are skipped for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open); success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_progress = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+class ImageService:
+    """Looks up a safety/compliance image for a message.
+
+    Results (including "no image") are kept in an LRU cache with a TTL,
+    concurrent lookups for the same normalized message share one webhook
+    call, and a circuit breaker skips the webhook while it is failing.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], httpx.AsyncClient],
+        webhook_url: str,
+        cache_size: int = IMAGE_CACHE_SIZE,
+        cache_ttl: float = IMAGE_CACHE_TTL,
+        miss_ttl: float = IMAGE_MISS_TTL,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.client_factory = client_factory
+        self.webhook_url = webhook_url
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.miss_ttl = miss_ttl
+        self.breaker = breaker or CircuitBreaker()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, result)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "skipped": 0, "errors": 0}
+
+    async def get_relevant_image(self, message: str) -> Optional[Dict]:
+        """Return ``{"image": url, "type": label}`` or None."""
+        key = normalize_message(message)
+        if not key:
+            return None
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if time.monotonic() < expires_at:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+            del self._cache[key]
+
+        # The lookup runs as its own task and every caller awaits it shielded,
+        # so a caller that is cancelled does not cancel it for the others
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+        else:
+            task = asyncio.ensure_future(self._lookup(message, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark any exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _lookup(self, message: str, key: str) -> Optional[Dict]:
+        if not self.breaker.allow():
+            self.stats["skipped"] += 1
+            return None
+
+        self.stats["misses"] += 1
+        try:
+            response = await self.client_factory().post(
+                self.webhook_url,
+                json={"message": message},
+                timeout=IMAGE_LOOKUP_TIMEOUT
+            )
+            response.raise_for_status()
+            image_data = response.json()
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.breaker.record_failure()
+            logger.error(f"Error getting image: {str(e)}")
+            return None
+
+        self.breaker.record_success()
+        result = None
+        # Only return an image if we got a valid image response
+        if isinstance(image_data, dict) and image_data.get("image"):
+            result = {
+                "image": image_data["image"],
+                "type": image_data.get("type", "Safety Related")
+            }
+        self._store(key, result)
+        return result
+
+    def _store(self, key: str, result: Optional[Dict]):
+        ttl = self.cache_ttl if result is not None else self.miss_ttl
+        self._cache[key] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
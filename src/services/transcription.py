@@ -0,0 +1,132 @@
+"""
+Speech-to-text for uploaded voice recordings
+"""
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import UploadFile
+from openai import AsyncOpenAI
+
+from .audio_preprocess import AUDIO_PREPROCESSING_ENABLED, PreprocessedAudio, is_wav, preprocess_wav
+from .chunked_transcription import (
+    CHUNK_OVERLAP_SECONDS, CHUNKED_TRANSCRIPTION_MIN_SECONDS, TRANSCRIPTION_CHUNK_SECONDS,
+    AudioChunk, WhisperTranscriber, split_audio, transcribe_chunks
+)
+
+logger = logging.getLogger(__name__)
+
+# Whisper rejects files over 25 MB
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# PCM WAV is decoded block by block from the spooled upload and sent in chunks,
+# so longer recordings are accepted
+MAX_WAV_UPLOAD_BYTES = int(os.getenv("MAX_WAV_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+
+class AudioTooLargeError(ValueError):
+    pass
+
+@dataclass
+class Transcription:
+    text: str
+    # Savings from preprocessing, when the upload was PCM WAV
+    preprocessing: Optional[Dict] = None
+
+def upload_size(upload: UploadFile) -> int:
+    """Size of an upload in bytes without reading it into memory."""
+    if upload.size is not None:
+        return upload.size
+    position = upload.file.tell()
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(position)
+    return size
+
+def _read_header(upload: UploadFile) -> bytes:
+    header = upload.file.read(12)
+    upload.file.seek(0)
+    return header
+
+async def _preprocess(upload: UploadFile) -> Optional[PreprocessedAudio]:
+    try:
+        return await asyncio.to_thread(preprocess_wav, upload.file)
+    except ValueError as e:
+        logger.info(f"Skipping audio preprocessing: {str(e)}")
+        upload.file.seek(0)
+        return None
+
+async def transcribe_upload(
+    client: AsyncOpenAI,
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    preprocess: Optional[bool] = None,
+    transcriber: Optional[Callable[[AudioChunk], Awaitable[str]]] = None
+) -> Transcription:
+    """Transcribe an uploaded recording with Whisper.
+
+    The upload's own spooled buffer (memory, or an anonymous temp file for
+    large uploads) is handed straight to the API, so nothing is written to
+    the working directory and concurrent uploads cannot collide. The upload
+    is always closed, which releases that buffer.
+
+    PCM WAV uploads are first downmixed to 16 kHz mono with leading and
+    trailing silence trimmed (in a worker thread); a recording that is all
+    silence is not sent to Whisper at all. Long recordings are split at
+    pauses and the chunks transcribed in parallel by ``transcriber``
+    (Whisper by default).
+    """
+    max_bytes = MAX_AUDIO_UPLOAD_BYTES if max_bytes is None else max_bytes
+    preprocess = AUDIO_PREPROCESSING_ENABLED if preprocess is None else preprocess
+    try:
+        size = upload_size(upload)
+        upload.file.seek(0)
+        # WAV is decoded and chunked here, so only Whisper's own limit is per chunk
+        decodable = preprocess and is_wav(_read_header(upload))
+        limit = max(max_bytes, MAX_WAV_UPLOAD_BYTES) if decodable else max_bytes
+        if size > limit:
+            raise AudioTooLargeError(f"Audio upload is {size} bytes; the limit is {limit} bytes")
+
+        preprocessed = await _preprocess(upload) if decodable else None
+        if preprocessed is None:
+            if size > max_bytes:
+                raise AudioTooLargeError(f"Audio upload is {size} bytes; the limit is {max_bytes} bytes")
+            transcript = await client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(
+                    upload.filename or "audio.webm",
+                    upload.file,
+                    upload.content_type or "application/octet-stream"
+                )
+            )
+            return Transcription(text=transcript.text)
+
+        report = preprocessed.report()
+        logger.info(
+            f"Preprocessed audio: {report['bytes_saved']} bytes and "
+            f"{report['seconds_trimmed']}s removed in {report['preprocess_ms']}ms"
+        )
+        if preprocessed.is_silent:
+            return Transcription(text="", preprocessing=report)
+
+        if preprocessed.seconds > CHUNKED_TRANSCRIPTION_MIN_SECONDS or len(preprocessed.data) > max_bytes:
+            # Keep each chunk, overlap included, under the per-request limit
+            bytes_per_second = 2 * preprocessed.sample_rate
+            chunk_seconds = min(
+                TRANSCRIPTION_CHUNK_SECONDS,
+                max(max_bytes / bytes_per_second - 2 * CHUNK_OVERLAP_SECONDS - 1, 1)
+            )
+            chunks = await asyncio.to_thread(
+                split_audio, preprocessed.samples, preprocessed.sample_rate, chunk_seconds
+            )
+            report["chunks"] = len(chunks)
+            text = await transcribe_chunks(chunks, transcriber or WhisperTranscriber(client))
+            return Transcription(text=text, preprocessing=report)
+
+        transcript = await client.audio.transcriptions.create(
+            model="whisper-1",
+            file=("audio.wav", preprocessed.data, "audio/wav")
+        )
+        return Transcription(text=transcript.text, preprocessing=report)
+    finally:
+        await upload.close()
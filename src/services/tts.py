@@ -0,0 +1,120 @@
+"""
+Text-to-speech synthesis streamed from upstream providers
+"""
+import time
+import logging
+from typing import AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+OPENAI_SPEECH_URL = "https://api.openai.com/v1/audio/speech"
+OPENAI_TTS_MODEL = "tts-1"
+OPENAI_TTS_VOICE = "alloy"
+
+ELEVENLABS_MODEL_ID = "eleven_monolingual_v1"
+ELEVENLABS_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75
+}
+
+class TTSUpstreamError(Exception):
+    """The TTS provider answered with an error status."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+async def open_stream(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request and return the response with its body still unread.
+
+    Error responses are read, closed and raised as ``TTSUpstreamError`` so
+    the caller can still answer with a proper status code; a successful
+    response must be consumed with ``relay_stream``.
+    """
+    request = client.build_request(method, url, **kwargs)
+    response = await client.send(request, stream=True)
+    if response.status_code != 200:
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        raise TTSUpstreamError(response.status_code, body.decode("utf-8", errors="replace"))
+    return response
+
+async def relay_stream(
+    response: httpx.Response,
+    label: str = "tts",
+    started_at: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """Yield an upstream body chunk by chunk as it arrives, then close it.
+
+    Logs time to first byte (from ``started_at``, usually taken just before
+    the upstream request was sent) and the total transfer.
+    """
+    started_at = started_at if started_at is not None else time.perf_counter()
+    total_bytes = 0
+    try:
+        async for chunk in response.aiter_bytes():
+            if total_bytes == 0 and chunk:
+                logger.info(f"{label} time to first byte: {(time.perf_counter() - started_at) * 1000:.0f} ms")
+            total_bytes += len(chunk)
+            yield chunk
+        logger.info(f"{label} streamed {total_bytes} bytes in {(time.perf_counter() - started_at) * 1000:.0f} ms")
+    finally:
+        await response.aclose()
+
+async def open_openai_speech(
+    client: httpx.AsyncClient,
+    api_key: str,
+    text: str,
+    voice: str = OPENAI_TTS_VOICE,
+    model: str = OPENAI_TTS_MODEL,
+    response_format: Optional[str] = "mp3"
+) -> httpx.Response:
+    """Start an OpenAI speech synthesis and return the streaming response.
+
+    The SDK's ``audio.speech.create`` buffers the whole file before
+    returning, so the endpoint is called directly on the pooled client.
+    """
+    return await open_stream(
+        client,
+        "POST",
+        OPENAI_SPEECH_URL,
+        headers={"Authorization": f"Bearer {api_key}"},
+        json={
+            "model": model,
+            "voice": voice,
+            "input": text,
+            "response_format": response_format
+        }
+    )
+
+async def open_elevenlabs_speech(
+    client: httpx.AsyncClient,
+    api_key: str,
+    voice_id: str,
+    text: str,
+    model_id: str = ELEVENLABS_MODEL_ID
+) -> httpx.Response:
+    """Start an ElevenLabs streaming synthesis and return the open response.
+
+    ``client`` is expected to have the ElevenLabs API as its base URL.
+    """
+    return await open_stream(
+        client,
+        "POST",
+        f"/v1/text-to-speech/{voice_id}/stream",
+        headers={
+            "Accept": "audio/mpeg",
+            "xi-api-key": api_key or "",
+            "Content-Type": "application/json",
+        },
+        json={
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": ELEVENLABS_VOICE_SETTINGS
+        }
+    )
@@ -0,0 +1,214 @@
+"""
+Sentence-pipelined speech synthesis for long replies
+"""
+import os
+import re
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+
+import httpx
+
+from .audio_cache import AudioCache
+from .tts import relay_stream
+
+logger = logging.getLogger(__name__)
+
+TTS_PIPELINE_PARALLELISM = int(os.getenv("TTS_PIPELINE_PARALLELISM", "3"))
+SEGMENT_MIN_CHARS = 20
+SEGMENT_MAX_CHARS = 240
+
+SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\n{2,}")
+CLAUSE_END = re.compile(r"(?<=[,;:—])\s+")
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Break a long sentence at clause boundaries, then at spaces."""
+    pieces: List[str] = []
+    current = ""
+    for clause in CLAUSE_END.split(text):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if current and len(current) + 1 + len(clause) > max_chars:
+            pieces.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_sentences(text: str, min_chars: int = SEGMENT_MIN_CHARS, max_chars: int = SEGMENT_MAX_CHARS) -> List[str]:
+    """Split text into speakable segments.
+
+    Segments end at sentence boundaries; very short sentences are merged
+    with the following one (fewer requests) and long ones are split at
+    clauses (no segment takes too long to synthesize).
+    """
+    segments: List[str] = []
+    pending = ""
+    for sentence in SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        for piece in _split_long(sentence, max_chars):
+            pending = f"{pending} {piece}".strip()
+            if len(pending) >= min_chars:
+                segments.append(pending)
+                pending = ""
+    if pending:
+        segments.append(pending)
+    return segments
+
+class SentenceBuffer:
+    """Collects streamed text deltas and releases whole sentences."""
+
+    def __init__(self, min_chars: int = SEGMENT_MIN_CHARS, max_chars: int = SEGMENT_MAX_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._text = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._text += delta
+        last_end = None
+        for match in SENTENCE_END.finditer(self._text):
+            last_end = match.end()
+        if last_end is None or len(self._text[:last_end].strip()) < self.min_chars:
+            return []
+        complete, self._text = self._text[:last_end], self._text[last_end:]
+        segments = split_sentences(complete, self.min_chars, self.max_chars)
+        if segments and len(segments[-1]) < self.min_chars:
+            # Too short on its own; merge it with whatever comes next
+            self._text = segments.pop() + " " + self._text
+        return segments
+
+    def flush(self) -> List[str]:
+        rest, self._text = self._text, ""
+        return split_sentences(rest, self.min_chars, self.max_chars)
+
+async def iter_sentences(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Turn a stream of text deltas (e.g. a streamed chat reply) into sentences."""
+    buffer = SentenceBuffer()
+    async for delta in chunks:
+        for sentence in buffer.feed(delta):
+            yield sentence
+    for sentence in buffer.flush():
+        yield sentence
+
+async def _as_async(segments: Union[Iterable[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+    if hasattr(segments, "__aiter__"):
+        async for segment in segments:
+            yield segment
+    else:
+        for segment in segments:
+            yield segment
+
+async def synthesize_pipelined(
+    segments: Union[Iterable[str], AsyncIterator[str]],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    max_parallel: int = TTS_PIPELINE_PARALLELISM
+) -> AsyncIterator[bytes]:
+    """Synthesize segments concurrently and yield their audio in order.
+
+    At most ``max_parallel`` syntheses run at once. The first segment's audio
+    is yielded as soon as it is ready, while later segments are still being
+    synthesized, so playback starts after the first sentence.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+    # Bounds how far synthesis may run ahead of the consumer
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_parallel)
+    loop = asyncio.get_running_loop()
+
+    async def run(text: str) -> bytes:
+        async with semaphore:
+            return await synthesize(text)
+
+    async def produce():
+        try:
+            async for segment in _as_async(segments):
+                await queue.put(loop.create_task(run(segment)))
+        finally:
+            await queue.put(None)
+
+    producer = loop.create_task(produce())
+    started = []
+    try:
+        while True:
+            task = await queue.get()
+            if task is None:
+                break
+            started.append(task)
+            yield await task
+        # Surface errors raised while reading the segments
+        await producer
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            task = queue.get_nowait()
+            if task is not None:
+                task.cancel()
+        for task in started:
+            task.cancel()
+
+class SegmentSynthesizer:
+    """Synthesizes one segment to bytes, going through the audio cache.
+
+    Segments are cached individually, so sentences that recur across
+    replies ("Great, marked as complete.") are only synthesized once.
+    """
+
+    def __init__(
+        self,
+        cache: AudioCache,
+        provider: str,
+        voice: str,
+        model: str,
+        open_speech: Callable[[str], Awaitable[httpx.Response]]
+    ):
+        self.cache = cache
+        self.provider = provider
+        self.voice = voice
+        self.model = model
+        self.open_speech = open_speech
+
+    async def __call__(self, text: str) -> bytes:
+        key = self.cache.make_key(self.provider, self.voice, self.model, text)
+        path = self.cache.get(key)
+        if path:
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                # Evicted by another worker in the meantime
+                pass
+        response = await self.open_speech(text)
+        data = b"".join([chunk async for chunk in relay_stream(response, f"{self.provider}-segment")])
+        self.cache.put(key, data)
+        return data
+
+async def prime_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Wait for the first chunk so errors surface before the response starts.
+
+    Returns an iterator that yields the first chunk followed by the rest.
+    """
+    first: Optional[bytes] = None
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        pass
+
+    async def replay() -> AsyncIterator[bytes]:
+        try:
+            if first is not None:
+                yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return replay()
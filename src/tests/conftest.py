@@ -14,6 +14,8 @@ from fastapi import Depends
 from ..database.models import Base, ChecklistCategory, ChecklistSection, ChecklistItem
 from ..database.connection import get_db
 from ..main import app
+from .. import main as main_module
+from ..services.audio_cache import AudioCache
 
 # Set test environment
 os.environ["ENV"] = "test"
@@ -38,18 +40,18 @@ def pytest_configure(config):
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
+shared_engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=shared_engine)
 
 @pytest_asyncio.fixture(scope="function")
 async def test_db():
     """Create a fresh test database for each test"""
     # Create tables
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=shared_engine)
     
     # Get a test database session
     db = TestingSessionLocal()
@@ -69,10 +71,54 @@ async def test_db():
         db.rollback()
         db.close()
         # Drop all tables after the test
-        Base.metadata.drop_all(bind=engine)
+        Base.metadata.drop_all(bind=shared_engine)
         # Clean up the override
         app.dependency_overrides.pop(get_db, None)
 
+def memory_engine():
+    """A private in-memory database with every table"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture
+def engine():
+    engine = memory_engine()
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def make_catalog(db):
+    """Factory adding a category with ``{section name: [item descriptions]}``.
+
+    Sections and items are ordered as given. Returns the category, its
+    sections and a list of items per section, committed.
+    """
+    def make(name, sections, description=None, **item_fields):
+        category = ChecklistCategory(name=name, description=description)
+        added_sections, added_items = [], []
+        for order, (section_name, descriptions) in enumerate(sections.items(), 1):
+            section = ChecklistSection(name=section_name, order=order, category=category)
+            added_sections.append(section)
+            added_items.append([
+                ChecklistItem(description=item, order=position, section=section, **item_fields)
+                for position, item in enumerate(descriptions, 1)
+            ])
+        db.add(category)
+        db.commit()
+        return category, added_sections, added_items
+    return make
+
 # Override the database dependency
 async def override_get_db():
     db = TestingSessionLocal()
@@ -82,4 +128,11 @@ async def override_get_db():
         db.close()
 
 # Override the database dependency for tests
-app.dependency_overrides[get_db] = override_get_db 
\ No newline at end of file
+app.dependency_overrides[get_db] = override_get_db
+
+@pytest.fixture(autouse=True)
+def isolated_audio_cache(tmp_path, monkeypatch):
+    """Keep audio synthesized during tests out of the project directory"""
+    cache = AudioCache(str(tmp_path / "tts_cache"))
+    monkeypatch.setattr(main_module, "audio_cache", cache)
+    return cache
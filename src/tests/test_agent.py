@@ -147,4 +147,22 @@ def test_current_items(memory):
     memory.set_current_items("test_session", items)
     
     current = memory.get_current_items("test_session")
-    assert current == items 
\ No newline at end of file
+    assert current == items 
+
+
+def test_agent_construction_does_not_import_crewai():
+    """Building the agent for chat must not pull in crewai or langchain"""
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = (
+        "import sys\n"
+        "from src.agents.checklist_agent import ChecklistAgent\n"
+        "ChecklistAgent('sk-test')\n"
+        "heavy = [m for m in ('crewai', 'langchain', 'langchain_community') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+    )
+    repo_root = Path(__file__).resolve().parents[2]
+    result = subprocess.run([sys.executable, "-c", code], cwd=repo_root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
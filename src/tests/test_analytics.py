@@ -0,0 +1,180 @@
+"""
+Tests for completion-time analytics
+"""
+import random
+from datetime import datetime, timedelta
+import httpx
+import numpy as np
+import pytest
+
+from .. import main
+from ..main import app
+from ..database.connection import get_db
+from ..database.item_events import compact_item_events, record_item_event
+from ..database.models import ChecklistItemEvent, CompletionSketch, InspectionRun
+from ..database.templates import publish_template
+from ..services.analytics import CompletionAnalytics, DurationSketch
+
+START = datetime(2024, 6, 1, 9, 0)
+
+@pytest.fixture
+def catalog(make_catalog):
+    """One category: Deck with 2 items, Hull with 1"""
+    category, _, (deck, hull) = make_catalog(
+        "Catamaran", {"Deck": ["Life jackets", "Fire extinguisher"], "Hull": ["Bilge pump"]}
+    )
+    return category, deck + hull
+
+def complete(db, run, steps):
+    """Log completions of ``(item, seconds after run start)``"""
+    for item, seconds in steps:
+        record_item_event(db, item.id, "completed", run_id=run.id, created_at=run.started_at + timedelta(seconds=seconds))
+    db.commit()
+
+def new_run(db, category, started_at=START):
+    run = InspectionRun(
+        vessel="Sea Breeze", category_id=category.id, template_version_id=publish_template(db, category.id).id,
+        started_at=started_at
+    )
+    db.add(run)
+    db.commit()
+    return run
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    """p50 and p95 stay within 1% of the exact percentiles"""
+    values = np.random.default_rng(7).lognormal(mean=4, sigma=1.2, size=20000)
+    sketch = DurationSketch()
+    for value in values:
+        sketch.add(float(value))
+
+    for q in (0.5, 0.95):
+        exact = np.quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) / exact < 0.02
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(values.mean())
+
+def test_sketches_merge_and_stay_bounded():
+    """Merged sketches match one built from all values; bucket count is capped"""
+    random.seed(3)
+    values = [random.expovariate(1 / 60) for _ in range(5000)]
+    left, right, whole = DurationSketch(), DurationSketch(), DurationSketch()
+    for i, value in enumerate(values):
+        (left if i % 2 else right).add(value)
+        whole.add(value)
+    left.merge(right)
+    assert left.buckets == whole.buckets
+    assert left.quantile(0.95) == whole.quantile(0.95)
+
+    bounded = DurationSketch(max_buckets=32)
+    for exponent in range(-3, 7):
+        for step in range(100):
+            bounded.add(10 ** (exponent + step / 100))
+    assert len(bounded.buckets) <= 32
+    # High quantiles stay accurate; only the fastest values are folded together
+    assert abs(bounded.quantile(0.99) - 10 ** 6.9) / 10 ** 6.9 < 0.05
+
+def test_item_durations_are_time_since_previous_completion(db, catalog):
+    """Each completion is timed from the previous one in the run, or the run start"""
+    category, items = catalog
+    complete(db, new_run(db, category), [(items[0], 60), (items[1], 180), (items[2], 600)])
+    complete(db, new_run(db, category), [(items[0], 120), (items[2], 420)])
+
+    analytics = CompletionAnalytics()
+    stats = {row["description"]: row for row in analytics.item_stats(db)}
+
+    assert stats["Life jackets"]["count"] == 2
+    assert stats["Life jackets"]["mean"] == pytest.approx(90, rel=0.01)
+    assert stats["Fire extinguisher"]["p50"] == pytest.approx(120, rel=0.01)
+    assert stats["Bilge pump"]["max"] == 420
+    sections = {row["name"]: row for row in analytics.section_stats(db)}
+    assert sections["Deck"]["count"] == 3
+    assert sections["Hull"]["count"] == 2
+    assert analytics.stalls(db, limit=1)[0]["description"] == "Bilge pump"
+
+def test_sketches_are_folded_as_events_are_written(db, catalog):
+    """Completions are folded by the commit that writes them; nothing is left to read"""
+    category, items = catalog
+    run = new_run(db, category)
+    complete(db, run, [(items[0], 60)])
+    record_item_event(db, items[1].id, "completed", source="chat")  # not part of a run
+    db.commit()
+    assert db.query(CompletionSketch).count() == 1
+
+    analytics = CompletionAnalytics()
+    assert analytics.update(db) == 0
+    complete(db, run, [(items[1], 90)])
+    assert analytics.update(db) == 0
+    assert analytics.sketches(db)[items[1].id].total == 30
+
+def test_unfolded_events_are_read_once(db, catalog):
+    """Events written without the listener, e.g. before the sketches existed, are folded on read"""
+    category, items = catalog
+    run = new_run(db, category)
+    db.execute(ChecklistItemEvent.__table__.insert(), [
+        {"item_id": item.id, "run_id": run.id, "event": "completed", "created_at": START + timedelta(seconds=seconds)}
+        for item, seconds in ((items[0], 60), (items[1], 90))
+    ])
+    db.commit()
+
+    analytics = CompletionAnalytics(batch_size=1)
+    assert analytics.update(db) == 2
+    assert analytics.update(db) == 0
+    assert analytics.sketches(db)[items[1].id].total == 30
+
+def test_failed_fold_keeps_sketches_and_cursor_together(db, catalog, monkeypatch):
+    """A fold that fails part way never leaves folded durations behind the cursor"""
+    from ..services import analytics
+
+    category, items = catalog
+    run = new_run(db, category)
+    fold, load = analytics.fold_completions, analytics.load_sketches
+    loads = []
+
+    def failing_load(connection, item_ids=None):
+        loads.append(item_ids)
+        if len(loads) == 2:
+            raise RuntimeError("disk I/O error")
+        return load(connection, item_ids)
+
+    monkeypatch.setattr(analytics, "fold_completions", lambda session: fold(session, batch_size=1))
+    monkeypatch.setattr(analytics, "load_sketches", failing_load)
+    complete(db, run, [(items[0], 60), (items[1], 90)])
+    assert db.query(CompletionSketch).count() == 1
+
+    monkeypatch.setattr(analytics, "fold_completions", fold)
+    monkeypatch.setattr(analytics, "load_sketches", load)
+    assert CompletionAnalytics().update(db) == 1
+    sketches = CompletionAnalytics().sketches(db)
+    assert (sketches[items[0].id].count, sketches[items[1].id].total) == (1, 30)
+
+def test_results_survive_restarts_and_compaction(db, catalog):
+    """A new worker reads the stored sketches, even once the events are compacted"""
+    category, items = catalog
+    complete(db, new_run(db, category), [(items[0], 60), (items[2], 600)])
+    before = CompletionAnalytics().item_stats(db)
+
+    assert compact_item_events(db, START + timedelta(days=2)) == 2
+    assert db.query(ChecklistItemEvent).count() == 0
+    assert CompletionAnalytics().item_stats(db) == before
+
+@pytest.mark.asyncio
+async def test_analytics_endpoints(db, catalog, monkeypatch):
+    """Items, sections and stalls are served under /api/analytics"""
+    category, items = catalog
+    complete(db, new_run(db, category), [(items[0], 30), (items[2], 630)])
+
+    monkeypatch.setattr(main, "completion_analytics", CompletionAnalytics())
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/analytics/items")
+        assert response.status_code == 200
+        assert [row["item_id"] for row in response.json()] == [items[0].id, items[2].id]
+
+        response = await client.get("/api/analytics/sections")
+        assert response.status_code == 200
+        assert [row["name"] for row in response.json()] == ["Deck", "Hull"]
+
+        response = await client.get("/api/analytics/stalls?limit=1")
+        assert response.status_code == 200
+        assert response.json()[0]["description"] == "Bilge pump"
+        assert response.json()[0]["p95"] == pytest.approx(600, rel=0.01)
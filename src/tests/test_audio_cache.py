@@ -0,0 +1,157 @@
+"""
+Tests for the content-addressed TTS audio cache
+"""
+import os
+import time
+import httpx
+import pytest
+
+from ..main import app, http_clients
+from ..services.audio_cache import AudioCache, parse_range
+
+async def chunks_of(*parts, fail=False):
+    for part in parts:
+        yield part
+    if fail:
+        raise RuntimeError("upstream dropped")
+
+@pytest.fixture
+def cache(tmp_path):
+    return AudioCache(str(tmp_path / "cache"), max_bytes=100)
+
+def test_key_ignores_whitespace_but_not_voice():
+    """Keys depend on provider, voice, model and normalized text"""
+    key = AudioCache.make_key("openai", "alloy", "tts-1", "Great,  marked as complete ")
+    assert key == AudioCache.make_key("openai", "alloy", "tts-1", "Great, marked as complete")
+    assert key != AudioCache.make_key("openai", "nova", "tts-1", "Great, marked as complete")
+    assert key != AudioCache.make_key("elevenlabs", "alloy", "tts-1", "Great, marked as complete")
+
+@pytest.mark.asyncio
+async def test_fill_stores_audio_after_stream_completes(cache):
+    """Chunks pass through unchanged and the file appears once complete"""
+    key = AudioCache.make_key("openai", "alloy", "tts-1", "hello")
+    assert cache.get(key) is None
+
+    passed = [chunk async for chunk in cache.fill(key, chunks_of(b"abc", b"def"))]
+    assert passed == [b"abc", b"def"]
+
+    path = cache.get(key)
+    with open(path, "rb") as f:
+        assert f.read() == b"abcdef"
+
+@pytest.mark.asyncio
+async def test_failed_stream_is_not_cached(cache):
+    """A stream that breaks part way leaves no file behind"""
+    key = AudioCache.make_key("openai", "alloy", "tts-1", "broken")
+    with pytest.raises(RuntimeError):
+        async for _ in cache.fill(key, chunks_of(b"abc", fail=True)):
+            pass
+    assert cache.get(key) is None
+    assert not any(name.endswith(".tmp") for _, _, files in os.walk(cache.directory) for name in files)
+
+def test_lru_eviction_by_size(cache):
+    """The least recently used entries are evicted past max_bytes"""
+    cache.put("a" * 64, b"x" * 40)
+    cache.put("b" * 64, b"x" * 40)
+    assert cache.get("a" * 64)  # a is now more recent than b
+    cache.put("c" * 64, b"x" * 40)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) and cache.get("c" * 64)
+    assert cache.stats["evicted"] == 1
+
+def test_index_is_rebuilt_from_disk(cache, tmp_path):
+    """A new worker sees existing files, oldest first"""
+    cache.put("a" * 64, b"x" * 40)
+    old = time.time() - 60
+    os.utime(cache.path("a" * 64), (old, old))
+    cache.put("b" * 64, b"x" * 40)
+
+    restarted = AudioCache(cache.directory, max_bytes=100)
+    restarted.put("c" * 64, b"x" * 40)
+    assert restarted.get("a" * 64) is None
+    assert restarted.get("b" * 64)
+
+def test_files_written_by_another_worker_are_hits(cache):
+    """Workers sharing a directory see each other's files and count them against the bound"""
+    other = AudioCache(cache.directory, max_bytes=100)
+    cache.get("a" * 64)  # both workers have scanned the empty directory
+    other.get("a" * 64)
+
+    cache.put("a" * 64, b"x" * 40)
+    assert other.get("a" * 64) == cache.path("a" * 64)
+
+    other.put("b" * 64, b"x" * 40)
+    other.put("c" * 64, b"x" * 40)
+    assert other.stats["evicted"] == 1
+    assert not os.path.exists(cache.path("a" * 64))
+    assert cache.get("a" * 64) is None
+    assert cache.get("b" * 64) and cache.get("c" * 64)
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+@pytest.mark.asyncio
+async def test_endpoint_serves_hits_with_ranges(isolated_audio_cache, monkeypatch):
+    """A repeated reply is served from the cache, including byte ranges"""
+    upstream_calls = []
+
+    def handler(request):
+        upstream_calls.append(request)
+        return httpx.Response(200, content=b"0123456789")
+
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_clients, "get", lambda name: upstream)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/api/text-to-speech", json={"content": "Great, marked as complete"})
+        assert first.content == b"0123456789"
+        key = first.headers["x-audio-key"]
+
+        second = await client.post(
+            "/api/text-to-speech",
+            json={"content": "Great, marked as complete"},
+            headers={"Range": "bytes=2-5"}
+        )
+        assert second.status_code == 206
+        assert second.content == b"2345"
+        assert second.headers["content-range"] == "bytes 2-5/10"
+
+        by_key = await client.get(f"/api/tts/audio/{key}")
+        assert by_key.status_code == 200
+        assert by_key.content == b"0123456789"
+        assert (await client.get("/api/tts/audio/" + "f" * 64)).status_code == 404
+
+    assert len(upstream_calls) == 1
+    await upstream.aclose()
+
+@pytest.mark.asyncio
+async def test_file_evicted_after_lookup_is_synthesized_again(isolated_audio_cache, monkeypatch):
+    """A hit whose file disappears before it is served falls back to synthesis"""
+    upstream_calls = []
+
+    def handler(request):
+        upstream_calls.append(request)
+        return httpx.Response(200, content=b"0123456789")
+
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_clients, "get", lambda name: upstream)
+    # Another worker removes the file between the lookup and the response
+    monkeypatch.setattr(isolated_audio_cache, "get", lambda key: isolated_audio_cache.path(key))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/text-to-speech", json={"content": "Great, marked as complete"})
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+
+        response = await client.get("/api/tts/audio/" + "f" * 64)
+        assert response.status_code == 404
+
+    assert len(upstream_calls) == 1
+    await upstream.aclose()
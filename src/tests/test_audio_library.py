@@ -0,0 +1,144 @@
+"""
+Tests for the pre-synthesized checklist audio library
+"""
+import json
+import httpx
+import pytest
+
+from .. import main as main_module
+from ..main import app
+from ..database.models import ChecklistItem
+from ..services.audio_cache import AudioCache
+from ..services.audio_library import AudioLibrary, build_lock
+from ..services.tts import open_openai_speech
+from ..services.tts_pipeline import SegmentSynthesizer
+
+class StubSpeech:
+    """Upstream stub that returns the requested text as audio"""
+
+    def __init__(self):
+        self.inputs = []
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["input"]
+        self.inputs.append(text)
+        return httpx.Response(200, content=f"<{text}>".encode())
+
+@pytest.fixture
+def catalog(db, make_catalog):
+    _, (section,), (items,) = make_catalog(
+        "Safety", {"Deck": ["Life jackets stowed", "Fire extinguisher gauge green"]}, description="Safety checks"
+    )
+    section.description = "Deck equipment"
+    db.commit()
+    return db, section, items
+
+@pytest.fixture
+async def speech():
+    stub = StubSpeech()
+    yield stub
+    await stub.client.aclose()
+
+@pytest.fixture
+def library(speech, isolated_audio_cache, session_factory):
+    synthesizer = SegmentSynthesizer(
+        isolated_audio_cache, "openai", "alloy", "tts-1",
+        lambda text: open_openai_speech(speech.client, "sk-test", text)
+    )
+    return AudioLibrary(session_factory, lambda: synthesizer)
+
+@pytest.mark.asyncio
+async def test_refresh_synthesizes_catalog_once(library, speech, catalog):
+    """Every description is synthesized once; an unchanged catalog is skipped"""
+    assert await library.refresh()
+    assert sorted(speech.inputs) == ["Deck. Deck equipment", "Fire extinguisher gauge green", "Life jackets stowed"]
+
+    assert not await library.refresh()
+    assert len(speech.inputs) == 3
+
+@pytest.mark.asyncio
+async def test_refresh_skips_while_another_worker_builds(library, speech, catalog, isolated_audio_cache):
+    """Only the worker holding the cache's lock file synthesizes the catalog"""
+    with build_lock(isolated_audio_cache.directory) as acquired:
+        assert acquired
+        assert not await library.refresh()
+        assert speech.inputs == []
+
+    assert await library.refresh()
+    assert len(speech.inputs) == 3
+
+@pytest.mark.asyncio
+async def test_second_worker_reuses_the_first_workers_build(library, speech, catalog, isolated_audio_cache, session_factory):
+    """A worker whose cache index predates another worker's build synthesizes nothing"""
+    other_cache = AudioCache(isolated_audio_cache.directory, max_bytes=isolated_audio_cache.max_bytes)
+    other_synthesizer = SegmentSynthesizer(
+        other_cache, "openai", "alloy", "tts-1",
+        lambda text: open_openai_speech(speech.client, "sk-test", text)
+    )
+    other = AudioLibrary(session_factory, lambda: other_synthesizer)
+    db, section, items = catalog
+    assert await other.get("item", 9999) is None  # the second worker has scanned the empty cache
+    assert other_cache.get("0" * 64) is None
+
+    assert await library.refresh()
+    assert len(speech.inputs) == 3
+
+    assert await other.refresh()
+    path, key = await other.get("item", items[0].id)
+    with open(path, "rb") as f:
+        assert f.read() == b"<Life jackets stowed>"
+    assert len(speech.inputs) == 3
+    assert other.stats["reused"] == 3
+
+@pytest.mark.asyncio
+async def test_changed_description_triggers_partial_rebuild(library, speech, catalog):
+    """A content change is detected by hash and only the new text is synthesized"""
+    db, section, items = catalog
+    await library.refresh()
+
+    items[0].description = "Life jackets stowed and tagged"
+    db.commit()
+    assert await library.refresh()
+    assert speech.inputs[-1] == "Life jackets stowed and tagged"
+    assert len(speech.inputs) == 4
+    assert library.stats["reused"] == 2
+
+@pytest.mark.asyncio
+async def test_get_serves_prebuilt_and_new_entries(library, speech, catalog):
+    """Built audio is served without synthesis; new items are synthesized on demand"""
+    db, section, items = catalog
+    await library.refresh()
+
+    path, key = await library.get("item", items[1].id)
+    with open(path, "rb") as f:
+        assert f.read() == b"<Fire extinguisher gauge green>"
+    assert len(speech.inputs) == 3
+
+    new_item = ChecklistItem(description="Flares in date", order=3, section=section)
+    db.add(new_item)
+    db.commit()
+    path, key = await library.get("item", new_item.id)
+    assert speech.inputs[-1] == "Flares in date"
+
+    assert await library.get("item", 9999) is None
+
+@pytest.mark.asyncio
+async def test_item_audio_endpoint(library, speech, catalog, monkeypatch):
+    """Item and section audio is served by id"""
+    db, section, items = catalog
+    monkeypatch.setattr(main_module, "audio_library", library)
+    await library.refresh()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/api/checklist/items/{items[0].id}/audio")
+        assert response.status_code == 200
+        assert response.content == b"<Life jackets stowed>"
+        assert response.headers["x-audio-key"]
+
+        response = await client.get(f"/api/checklist/sections/{section.id}/audio")
+        assert response.content == b"<Deck. Deck equipment>"
+
+        response = await client.get("/api/checklist/items/9999/audio")
+        assert response.status_code == 404
+    assert len(speech.inputs) == 3
@@ -0,0 +1,145 @@
+"""
+Tests for audio preprocessing before Whisper
+"""
+import io
+import wave
+from types import SimpleNamespace
+import httpx
+import numpy as np
+import pytest
+
+from ..main import app, client as openai_client
+from ..services.audio_preprocess import decode_wav, preprocess_wav, read_wav_mono, resample, speech_bounds, to_mono
+
+def make_wav(samples: np.ndarray, rate: int, width: int = 2) -> bytes:
+    """Encode float samples shaped (frames, channels) as PCM WAV"""
+    if width == 1:
+        raw = (samples * 127 + 128).astype(np.uint8).tobytes()
+    elif width == 3:
+        ints = (samples * (2 ** 23 - 1)).astype("<i4")
+        raw = ints.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        raw = (samples * 32767).astype("<i2").tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(raw)
+    return buffer.getvalue()
+
+def recording(rate=44100, silence=1.0, speech=0.5, channels=2):
+    """Silence, a 440 Hz tone standing in for speech, then silence"""
+    t = np.arange(int(rate * speech)) / rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    quiet = np.zeros(int(rate * silence))
+    mono = np.concatenate([quiet, tone, quiet]).astype(np.float32)
+    return np.repeat(mono[:, None], channels, axis=1)
+
+def test_stereo_recording_is_downmixed_resampled_and_trimmed():
+    """Dead air is removed and the result is 16 kHz mono"""
+    data = make_wav(recording(), 44100)
+    result = preprocess_wav(data)
+
+    with wave.open(io.BytesIO(result.data)) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getframerate() == 16000
+    # 0.5 s of speech plus up to 200 ms of padding either side
+    assert 0.5 <= result.seconds <= 0.95
+    assert result.original_seconds == pytest.approx(2.5, abs=0.01)
+
+    report = result.report()
+    assert report["bytes_saved"] > 0.9 * len(data)
+    assert report["seconds_trimmed"] == pytest.approx(2.5 - result.seconds, abs=0.001)
+
+def test_silence_is_detected():
+    """A recording with no speech trims down to nothing"""
+    result = preprocess_wav(make_wav(np.zeros((16000, 1), dtype=np.float32), 16000))
+    assert result.is_silent
+    assert speech_bounds(np.zeros(100, dtype=np.float32), 16000) is None
+
+@pytest.mark.parametrize("width", [1, 2, 3])
+def test_decode_sample_widths(width):
+    """8, 16 and 24-bit PCM decode to the same normalized samples"""
+    samples = recording(rate=8000, silence=0.01, speech=0.05, channels=1)
+    decoded, rate = decode_wav(make_wav(samples, 8000, width))
+    assert rate == 8000
+    assert decoded.shape == samples.shape
+    assert np.allclose(decoded, samples, atol=0.02)
+
+def test_resample_preserves_duration_and_tone():
+    """Resampling keeps the length in seconds and the signal's shape"""
+    rate = 48000
+    t = np.arange(rate) / rate
+    tone = np.sin(2 * np.pi * 300 * t).astype(np.float32)
+    out = resample(tone, rate, 16000)
+    assert len(out) == 16000
+    expected = np.sin(2 * np.pi * 300 * np.arange(16000) / 16000)
+    assert np.abs(out[100:-100] - expected[100:-100]).max() < 0.05
+
+@pytest.mark.parametrize("rate", [8000, 16000, 44100, 48000])
+def test_block_decoding_matches_whole_file(rate):
+    """Decoding a file block by block gives the same samples as decoding it at once"""
+    data = make_wav(recording(rate=rate, silence=0.2, speech=0.3), rate)
+    samples, _ = decode_wav(data)
+    expected = resample(to_mono(samples), rate, 16000)
+
+    decoded, seconds = read_wav_mono(io.BytesIO(data), block_frames=1000)
+    assert seconds == pytest.approx(0.7, abs=0.001)
+    assert np.array_equal(decoded, expected)
+
+def test_non_pcm_wav_is_rejected():
+    """Compressed or malformed WAV is reported so the caller can pass it through"""
+    with pytest.raises(ValueError):
+        decode_wav(b"RIFF\x00\x00\x00\x00WAVEjunk")
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Record what is sent to Whisper"""
+    sent = []
+
+    async def create(model, file):
+        sent.append(file)
+        return SimpleNamespace(text="check the life jackets")
+
+    monkeypatch.setattr(openai_client.audio.transcriptions, "create", create)
+    return sent
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.mark.asyncio
+async def test_endpoint_sends_preprocessed_audio(client, fake_whisper):
+    """Whisper receives the trimmed mono audio and the savings are reported"""
+    data = make_wav(recording(), 44100)
+    response = await client.post("/api/speech-to-text", files={"audio": ("recording.wav", data, "audio/wav")})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["text"] == "check the life jackets"
+    assert body["preprocessing"]["bytes_saved"] > 0
+    assert body["preprocessing"]["seconds_trimmed"] > 1.5
+
+    filename, sent, content_type = fake_whisper[0]
+    assert content_type == "audio/wav"
+    assert len(sent) == body["preprocessing"]["bytes"] < len(data)
+
+@pytest.mark.asyncio
+async def test_endpoint_skips_whisper_for_silence(client, fake_whisper):
+    """A silent recording returns an empty transcript without calling Whisper"""
+    data = make_wav(np.zeros((44100, 2), dtype=np.float32), 44100)
+    response = await client.post("/api/speech-to-text", files={"audio": ("recording.wav", data, "audio/wav")})
+
+    assert response.json()["text"] == ""
+    assert fake_whisper == []
+
+@pytest.mark.asyncio
+async def test_endpoint_passes_compressed_audio_through(client, fake_whisper):
+    """Formats other than PCM WAV are sent to Whisper unchanged"""
+    response = await client.post("/api/speech-to-text", files={"audio": ("recording.webm", b"\x1aE\xdf\xa3webm", "audio/webm")})
+
+    assert response.json()["preprocessing"] is None
+    filename, sent, content_type = fake_whisper[0]
+    assert filename == "recording.webm"
@@ -0,0 +1,158 @@
+"""
+Tests for checklist JSON Lines import and export
+"""
+import json
+import tracemalloc
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from .. import main
+from ..main import app
+from ..database.checklist_io import ChecklistImportError, export_jsonl, import_jsonl
+from ..database.connection import get_db
+from ..database.models import ChecklistCategory, ChecklistSection, ChecklistItem
+from .conftest import memory_engine
+
+def record(**fields):
+    return json.dumps(fields) + "\n"
+
+def catalog_lines(categories=2, sections=3, items=4):
+    for c in range(categories):
+        category = f"Category {c}"
+        yield record(type="category", name=category, description=f"About {category}")
+        for s in range(sections):
+            yield record(type="section", category=category, name=f"Section {s}", description=None, order=s)
+            for i in range(items):
+                yield record(type="item", category=category, section=f"Section {s}", description=f"Item {s}.{i}", order=i)
+
+def counts(db):
+    return db.query(ChecklistCategory).count(), db.query(ChecklistSection).count(), db.query(ChecklistItem).count()
+
+def test_import_is_batched_and_idempotent(engine, db):
+    """Records are written with executemany, and a second import changes nothing"""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def track(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("INSERT"):
+            statements.append(executemany)
+
+    stats = import_jsonl(db, catalog_lines(), batch_size=10)
+    assert stats == {"lines": 32, "categories": 2, "sections": 6, "items": 24, "skipped": 0}
+    assert counts(db) == (2, 6, 24)
+    assert len(statements) < 10 and any(statements)
+
+    import_jsonl(db, catalog_lines(), batch_size=10)
+    assert counts(db) == (2, 6, 24)
+
+def test_import_updates_existing_rows(db):
+    """Matching records update descriptions and order in place"""
+    import_jsonl(db, catalog_lines(categories=1, sections=1, items=2))
+    item_id = db.query(ChecklistItem.id).filter(ChecklistItem.description == "Item 0.1").scalar()
+
+    import_jsonl(db, [
+        record(type="category", name="Category 0", description="Updated"),
+        record(type="item", category="Category 0", section="Section 0", description="Item 0.1", order=9)
+    ])
+
+    db.expire_all()
+    assert db.query(ChecklistCategory).one().description == "Updated"
+    item = db.query(ChecklistItem).filter(ChecklistItem.description == "Item 0.1").one()
+    assert (item.id, item.order) == (item_id, 9)
+
+def test_records_without_parent_are_skipped(db):
+    """An item whose section does not exist is counted, not inserted"""
+    stats = import_jsonl(db, [
+        record(type="category", name="Catamaran"),
+        record(type="item", category="Catamaran", section="Missing", description="Orphan", order=1)
+    ])
+    assert stats["skipped"] == 1
+    assert counts(db) == (1, 0, 0)
+
+def test_invalid_record_rolls_back_everything(db):
+    """A bad line aborts the import with its line number"""
+    lines = list(catalog_lines(categories=1)) + ["\n", record(type="item", category="Category 0", order=1)]
+    with pytest.raises(ChecklistImportError, match="Line 18: item is missing section, description"):
+        import_jsonl(db, lines, batch_size=2)
+    assert counts(db) == (0, 0, 0)
+
+def test_export_round_trips(db):
+    """Exporting and importing into an empty database reproduces the catalog"""
+    import_jsonl(db, catalog_lines())
+    exported = list(export_jsonl(db, batch_size=5))
+    assert sorted(exported) == sorted(catalog_lines())
+
+    other_engine = memory_engine()
+    other = sessionmaker(bind=other_engine)()
+    import_jsonl(other, exported)
+    assert list(export_jsonl(other)) == exported
+    other.close()
+    other_engine.dispose()
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_memory_does_not_grow_with_catalog_size():
+    """Importing and exporting 10x more items needs no more memory"""
+    peaks = {}
+    # The first run warms up statement caches
+    for sections in (1, 10, 100):
+        engine = memory_engine()
+        db = sessionmaker(bind=engine)()
+        import_peak = peak_memory(
+            lambda: import_jsonl(db, catalog_lines(categories=1, sections=sections, items=100), batch_size=200)
+        )
+        export_peak = peak_memory(lambda: all(export_jsonl(db, batch_size=200)))
+        peaks[sections] = (import_peak, export_peak)
+        db.close()
+        engine.dispose()
+
+    assert peaks[100][0] < peaks[10][0] * 1.5
+    assert peaks[100][1] < peaks[10][1] * 1.5
+    assert max(peaks[100]) < 2 * 1024 * 1024
+
+@pytest.mark.asyncio
+async def test_admin_import_and_export_endpoints(db, monkeypatch):
+    """Uploads are imported, exports are streamed, and the admin token is enforced"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    body = "".join(catalog_lines(categories=1, sections=1, items=2)).encode("utf-8")
+    headers = {"X-Admin-Token": "secret"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/admin/checklists/import", files={"file": ("c.jsonl", body)})
+        assert response.status_code == 403
+        response = await client.get("/api/admin/checklists/export", headers={"X-Admin-Token": "guess"})
+        assert response.status_code == 403
+
+        response = await client.post(
+            "/api/admin/checklists/import", files={"file": ("c.jsonl", body)}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["items"] == 2
+
+        response = await client.post(
+            "/api/admin/checklists/import", files={"file": ("c.jsonl", b"{not json\n")}, headers=headers
+        )
+        assert response.status_code == 400
+
+        response = await client.get("/api/admin/checklists/export", headers=headers)
+        assert response.status_code == 200
+        assert response.content == body
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_are_disabled_without_a_token(db, monkeypatch):
+    """Without a configured admin token the admin endpoints do not exist"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/admin/checklists/export", headers={"X-Admin-Token": ""})
+        assert response.status_code == 404
+        response = await client.post("/api/admin/checklists/import", files={"file": ("c.jsonl", b"")})
+        assert response.status_code == 404
@@ -0,0 +1,96 @@
+"""
+Tests for chunked, parallel transcription of long recordings
+"""
+import io
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from ..services import transcription
+from ..services.audio_preprocess import encode_wav
+from ..services.chunked_transcription import StubTranscriber, find_cuts, split_audio, stitch, transcribe_chunks
+
+RATE = 16000
+
+def dictation(seconds: int, phrase: float = 1.8, pause: float = 0.2) -> np.ndarray:
+    """Phrases of tone separated by short pauses, starting with speech"""
+    t = np.arange(int(RATE * phrase)) / RATE
+    block = np.concatenate([0.5 * np.sin(2 * np.pi * 300 * t), np.zeros(int(RATE * pause))])
+    repeats = int(seconds / (phrase + pause))
+    return np.tile(block, repeats).astype(np.float32)
+
+def script_text(seconds: int, seconds_per_word: float = 0.4) -> str:
+    return " ".join(f"word{i}" for i in range(int(seconds / seconds_per_word)))
+
+def test_cuts_fall_in_pauses_and_bound_chunk_length():
+    """Every cut lands in silence and no chunk exceeds the target length"""
+    samples = dictation(120)
+    cuts = find_cuts(samples, RATE, chunk_seconds=30)
+
+    assert len(cuts) >= 3
+    assert all(abs(samples[cut]) < 1e-6 for cut in cuts)
+    bounds = [0] + cuts + [len(samples)]
+    assert max(b - a for a, b in zip(bounds, bounds[1:])) <= 30 * RATE
+
+def test_chunks_overlap():
+    """Neighbouring chunks share the configured overlap"""
+    chunks = split_audio(dictation(90), RATE, chunk_seconds=30, overlap_seconds=1.0)
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous.end - following.start == pytest.approx(2.0, abs=0.01)
+    assert chunks[0].start == 0
+    assert chunks[-1].end == pytest.approx(len(dictation(90)) / RATE)
+
+def test_stitch_removes_duplicated_overlap():
+    """Words repeated across a chunk boundary appear once, ignoring case and punctuation"""
+    texts = [
+        "Life jackets are stowed. The fire",
+        "the fire extinguisher gauge is green. Flares",
+        "flares are in date."
+    ]
+    assert stitch(texts) == "Life jackets are stowed. The fire extinguisher gauge is green. Flares are in date."
+    assert stitch(["no overlap here", "at all"]) == "no overlap here at all"
+
+@pytest.mark.asyncio
+async def test_chunks_are_transcribed_in_parallel_and_in_order():
+    """Stitched output matches the full script, with bounded concurrency"""
+    samples = dictation(120)
+    stub = StubTranscriber.from_text(script_text(120), delay=0.01)
+    chunks = split_audio(samples, RATE, chunk_seconds=30)
+
+    text = await transcribe_chunks(chunks, stub, max_parallel=2)
+
+    assert text == script_text(120)
+    assert len(stub.calls) == len(chunks) > 2
+    assert stub.peak == 2
+
+@pytest.mark.asyncio
+async def test_long_upload_is_chunked(monkeypatch):
+    """A long WAV upload goes through the chunked path and reports the chunk count"""
+    monkeypatch.setattr(transcription, "CHUNKED_TRANSCRIPTION_MIN_SECONDS", 45)
+    seconds = 90
+    upload = UploadFile(file=io.BytesIO(encode_wav(dictation(seconds), RATE)), filename="inspection.wav")
+    stub = StubTranscriber.from_text(script_text(seconds))
+
+    result = await transcription.transcribe_upload(None, upload, transcriber=stub)
+
+    assert result.text == script_text(seconds)
+    assert result.preprocessing["chunks"] == len(stub.calls) >= 3
+
+@pytest.mark.asyncio
+async def test_long_wav_may_exceed_whisper_upload_limit(monkeypatch):
+    """WAV over the single-request limit is accepted because it is sent in chunks"""
+    data = encode_wav(dictation(20), RATE)
+    monkeypatch.setattr(transcription, "CHUNKED_TRANSCRIPTION_MIN_SECONDS", 600)
+    stub = StubTranscriber.from_text(script_text(20))
+
+    result = await transcription.transcribe_upload(
+        None, UploadFile(file=io.BytesIO(data), filename="a.wav"), max_bytes=len(data) // 2, transcriber=stub
+    )
+    assert result.text == script_text(20)
+    assert result.preprocessing["chunks"] >= 2
+    assert all(len(chunk.data) <= len(data) // 2 for chunk in stub.calls)
+
+    with pytest.raises(transcription.AudioTooLargeError):
+        await transcription.transcribe_upload(
+            None, UploadFile(file=io.BytesIO(b"x" * 100), filename="a.webm"), max_bytes=10, transcriber=stub
+        )
@@ -0,0 +1,65 @@
+"""
+Tests for lazy database engine creation and the health endpoint
+"""
+import threading
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+
+from ..main import app
+from ..database import connection
+from ..database.connection import get_db
+
+def test_engine_is_created_once_on_first_use(tmp_path, monkeypatch):
+    """Concurrent first sessions share one engine, created from the current environment"""
+    created = []
+
+    def counting_create_engine(url, **kwargs):
+        created.append(url)
+        return create_engine(url, **kwargs)
+
+    monkeypatch.setattr(connection, "_engine", None)
+    monkeypatch.setattr(connection, "create_engine", counting_create_engine)
+    monkeypatch.setattr(connection, "BASE_DIR", str(tmp_path))
+    monkeypatch.setenv("ENV", "development")
+    assert created == []
+
+    barrier = threading.Barrier(8)
+    sessions = []
+
+    def open_session():
+        barrier.wait()
+        sessions.append(connection.SessionLocal())
+
+    threads = [threading.Thread(target=open_session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == [f"sqlite:///{tmp_path / 'checklist.db'}"]
+    assert {session.get_bind() for session in sessions} == {connection._engine}
+    assert connection.ping_database() >= 0
+    for session in sessions:
+        session.close()
+    connection._engine.dispose()
+
+@pytest.mark.asyncio
+async def test_healthz_reports_database_latency(db, monkeypatch):
+    """The health endpoint reports database latency, or 503 when it is unreachable"""
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/healthz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert response.json()["database"]["latency_ms"] >= 0
+
+        def failing_ping(db=None):
+            raise RuntimeError("database is locked")
+
+        from .. import main
+        monkeypatch.setattr(main, "ping_database", failing_ping)
+        response = await client.get("/healthz")
+        assert response.status_code == 503
+        assert response.json()["database"] == {"status": "error", "detail": "database is locked"}
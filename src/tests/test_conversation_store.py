@@ -0,0 +1,146 @@
+"""
+Tests for the write-behind conversation store
+"""
+import time
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..database.models import Base, ConversationMessage
+from ..database.conversation_store import ConversationStore
+from ..agents.checklist_agent import ConversationMemory
+
+@pytest.fixture
+def store(session_factory):
+    store = ConversationStore(session_factory, flush_interval_ms=10)
+    yield store
+    store.stop()
+
+def count_rows(session_factory):
+    db = session_factory()
+    try:
+        return db.query(ConversationMessage).count()
+    finally:
+        db.close()
+
+def test_enqueue_does_not_write_until_flush(store, session_factory):
+    """Messages are queued in memory and written in one batch"""
+    for i in range(5):
+        store.enqueue("s1", "user", f"message {i}", datetime.now())
+
+    assert count_rows(session_factory) == 0
+    assert store.flush() == 5
+    assert count_rows(session_factory) == 5
+    assert store.pending_count == 0
+
+def test_load_session_includes_queued_writes(store):
+    """Cold loads see both persisted and not-yet-flushed messages in order"""
+    now = datetime.now()
+    store.enqueue("s1", "user", "first", now - timedelta(seconds=2))
+    store.flush()
+    store.enqueue("s1", "assistant", "second", now - timedelta(seconds=1))
+    store.enqueue("s2", "user", "other session", now)
+
+    messages = store.load_session("s1")
+    assert [m["content"] for m in messages] == ["first", "second"]
+
+def test_delete_session(store):
+    """Deleting a session drops persisted and queued messages"""
+    store.enqueue("s1", "user", "hello", datetime.now())
+    store.flush()
+    store.enqueue("s1", "user", "again", datetime.now())
+    store.delete_session("s1")
+
+    assert store.load_session("s1") == []
+    store.flush()
+    assert store.load_session("s1") == []
+
+def test_failed_flush_is_retried(engine, session_factory):
+    """Writes are kept in the queue when the database is unavailable"""
+    store = ConversationStore(session_factory)
+    Base.metadata.drop_all(bind=engine)
+    store.enqueue("s1", "user", "hello", datetime.now())
+
+    assert store.flush() == 0
+    assert store.pending_count == 1
+
+    Base.metadata.create_all(bind=engine)
+    assert store.flush() == 1
+
+def test_background_thread_flushes(store, session_factory):
+    """The writer thread persists queued messages without an explicit flush"""
+    store.start()
+    store.enqueue("s1", "user", "hello", datetime.now())
+
+    deadline = time.time() + 2
+    while count_rows(session_factory) == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert count_rows(session_factory) == 1
+
+def test_memory_hydrates_cold_session(store):
+    """A fresh ConversationMemory lazily restores history from the store"""
+    memory = ConversationMemory(store=store)
+    memory.add_message("s1", "user", "Hello")
+    memory.add_message("s1", "assistant", "Hi there")
+    store.flush()
+
+    restarted = ConversationMemory(store=store)
+    context = restarted.get_recent_context("s1")
+    assert context == [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi there"}
+    ]
+
+@pytest.mark.parametrize("stage", ["before_commit", "after_commit"])
+def test_load_does_not_wait_for_a_flush(tmp_path, stage):
+    """Reads run alongside a flush and see each message exactly once"""
+    # A file database, so the flush and the read use separate connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'conversations.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    store = ConversationStore(sessionmaker(bind=engine))
+    store.enqueue("s1", "user", "hello", datetime.now())
+    store.enqueue("s1", "assistant", "hi", datetime.now())
+    entered, release = threading.Event(), threading.Event()
+
+    def hold(*args):
+        entered.set()
+        release.wait(5)
+
+    target = engine if stage == "before_commit" else Session
+    event_name = "commit" if stage == "before_commit" else "after_commit"
+    event.listen(target, event_name, hold)
+    try:
+        flusher = threading.Thread(target=store.flush)
+        flusher.start()
+        assert entered.wait(5)
+        assert [m["content"] for m in store.load_session("s1")] == ["hello", "hi"]
+        assert flusher.is_alive()
+        release.set()
+        flusher.join(5)
+    finally:
+        release.set()
+        event.remove(target, event_name, hold)
+    assert [m["content"] for m in store.load_session("s1")] == ["hello", "hi"]
+    assert count_rows(store.session_factory) == 2
+    engine.dispose()
+
+@pytest.mark.asyncio
+async def test_memory_loads_cold_session_off_the_event_loop(store, monkeypatch):
+    """Async callers hydrate through a worker thread"""
+    store.enqueue("s1", "user", "Hello", datetime.now())
+    threads = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(fn, *args):
+        threads.append(fn.__name__)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", recording_to_thread)
+    memory = ConversationMemory(store=store)
+    await memory.load("s1")
+    await memory.load("s1")
+    assert threads == ["_hydrate"]
+    assert memory.get_recent_context("s1") == [{"role": "user", "content": "Hello"}]
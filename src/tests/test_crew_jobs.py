@@ -0,0 +1,145 @@
+"""
+Tests for the background crew job queue
+"""
+import asyncio
+import threading
+import httpx
+import pytest
+
+from ..agents.crew_jobs import CrewJobQueue, JobStatus
+from ..main import app, crew_jobs
+
+class FakeCrew:
+    """Stands in for ChecklistCrew; records runs and can be held open"""
+
+    def __init__(self, log, release, active, lock):
+        self.log = log
+        self.release = release
+        self.active = active
+        self.lock = lock
+
+    def get_checklist_suggestions(self, context):
+        with self.lock:
+            self.active["now"] += 1
+            self.active["max"] = max(self.active["max"], self.active["now"])
+        try:
+            self.release.wait(5)
+            self.log.append(context)
+            if context == "explode":
+                raise RuntimeError("crew failed")
+            return [{"name": f"Item for {context}"}]
+        finally:
+            with self.lock:
+                self.active["now"] -= 1
+
+@pytest.fixture
+def crew_state():
+    return {
+        "log": [],
+        "release": threading.Event(),
+        "active": {"now": 0, "max": 0},
+        "lock": threading.Lock()
+    }
+
+@pytest.fixture
+def queue(crew_state):
+    queue = CrewJobQueue(lambda: FakeCrew(**crew_state), max_workers=2)
+    yield queue
+    crew_state["release"].set()
+    queue.shutdown()
+
+@pytest.mark.asyncio
+async def test_job_runs_and_result_is_cached(queue, crew_state):
+    """A finished job's result answers identical later submissions"""
+    crew_state["release"].set()
+    job = queue.submit("get_checklist_suggestions", {"context": "galley"})
+    assert job.status == JobStatus.PENDING
+
+    job = await queue.wait(job.id, timeout=5)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == [{"name": "Item for galley"}]
+
+    again = queue.submit("get_checklist_suggestions", {"context": "galley"})
+    assert again.cached and again.status == JobStatus.SUCCEEDED
+    assert crew_state["log"] == ["galley"]
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_jobs_are_shared(queue, crew_state):
+    """Submitting the same work twice attaches to the running job"""
+    first = queue.submit("get_checklist_suggestions", {"context": "deck"})
+    second = queue.submit("get_checklist_suggestions", {"context": "deck"})
+    assert first is second
+
+    crew_state["release"].set()
+    await queue.wait(first.id, timeout=5)
+    assert crew_state["log"] == ["deck"]
+
+@pytest.mark.asyncio
+async def test_worker_pool_is_bounded_and_pending_jobs_cancel(queue, crew_state):
+    """Only max_workers crews run at once; queued jobs can be cancelled"""
+    jobs = [queue.submit("get_checklist_suggestions", {"context": f"c{i}"}) for i in range(4)]
+    await asyncio.sleep(0.1)
+    assert crew_state["active"]["now"] == 2
+
+    cancelled = queue.cancel(jobs[3].id)
+    assert cancelled.status == JobStatus.CANCELLED
+
+    crew_state["release"].set()
+    for job in jobs[:3]:
+        await queue.wait(job.id, timeout=5)
+    assert crew_state["active"]["max"] == 2
+    assert "c3" not in crew_state["log"]
+    assert jobs[3].status == JobStatus.CANCELLED
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_error(queue, crew_state):
+    """Exceptions from the crew mark the job as failed"""
+    crew_state["release"].set()
+    job = queue.submit("get_checklist_suggestions", {"context": "explode"})
+    job = await queue.wait(job.id, timeout=5)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "crew failed"
+
+def test_unknown_job_kind(queue):
+    """Only crew operations can be submitted"""
+    with pytest.raises(ValueError):
+        queue.submit("drop_tables", {})
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"context": ["galley"]},
+    {"context": "galley", "delete_all": True},
+])
+def test_job_params_are_validated(queue, params):
+    """Parameters must match the operation before anything is queued"""
+    with pytest.raises(ValueError, match="get_checklist_suggestions"):
+        queue.submit("get_checklist_suggestions", params)
+    assert queue._jobs == {}
+
+@pytest.mark.asyncio
+async def test_crew_job_endpoints(crew_state, monkeypatch):
+    """Jobs can be submitted and polled over HTTP"""
+    crew_state["release"].set()
+    monkeypatch.setattr(crew_jobs, "crew_factory", lambda: FakeCrew(**crew_state))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/crew/jobs",
+            json={"kind": "get_checklist_suggestions", "params": {"context": "bridge"}}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        response = await client.get(f"/api/crew/jobs/{job_id}", params={"wait": 5})
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"] == [{"name": "Item for bridge"}]
+
+        response = await client.post("/api/crew/jobs", json={"kind": "nope"})
+        assert response.status_code == 400
+        response = await client.post(
+            "/api/crew/jobs",
+            json={"kind": "update_checklist", "params": {"checklist_id": "c1"}}
+        )
+        assert response.status_code == 400
+        assert "updates" in response.json()["detail"]
+        response = await client.get("/api/crew/jobs/missing")
+        assert response.status_code == 404
@@ -0,0 +1,131 @@
+"""
+Tests for fleet-wide progress aggregation
+"""
+import random
+import time
+import httpx
+import numpy as np
+import pytest
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.inspection_runs import bitset_from_ids, create_run, update_run_item
+from ..database.models import ChecklistItem, InspectionRun
+from ..database.templates import publish_template
+from ..services.fleet_progress import FleetProgress, bitset_matrix
+
+@pytest.fixture
+def catalog(make_catalog):
+    """Catamaran: 2 sections x 2 items; Jet Ski: 1 section x 2 items"""
+    boat, _, (deck, hull) = make_catalog(
+        "Catamaran", {"Deck": [f"Deck {i}" for i in range(2)], "Hull": [f"Hull {i}" for i in range(2)]}
+    )
+    ski, _, (engine,) = make_catalog("Jet Ski", {"Engine": [f"Engine {i}" for i in range(2)]})
+    return boat, ski, {"deck": deck, "hull": hull, "engine": engine}
+
+def by(rows, key):
+    return {row[key]: (row["completed"], row["total"]) for row in rows}
+
+def test_bitset_matrix():
+    """Bitsets of different lengths line up as one boolean matrix"""
+    item_ids = np.array([1, 9, 20])
+    matrix = bitset_matrix([bitset_from_ids([1, 20]), b"", bitset_from_ids([9, 300])], item_ids)
+    assert matrix.tolist() == [[True, False, True], [False, False, False], [False, True, False]]
+
+def test_progress_per_vessel_category_and_section(db, catalog):
+    """Only each vessel's latest run per category counts"""
+    boat, ski, items = catalog
+    old = create_run(db, "Sea Breeze", boat.id)
+    for item in items["deck"] + items["hull"]:
+        update_run_item(db, old, item.id, True)
+    latest = create_run(db, "Sea Breeze", boat.id)
+    update_run_item(db, latest, items["deck"][0].id, True)
+    other = create_run(db, "Blue Horizon", boat.id)
+    update_run_item(db, other, items["deck"][1].id, True)
+    update_run_item(db, other, items["hull"][0].id, True)
+    ski_run = create_run(db, "Sea Breeze", ski.id)
+    update_run_item(db, ski_run, items["engine"][0].id, True)
+
+    result = FleetProgress().get(db)
+
+    assert result["runs"] == 3
+    assert by(result["vessels"], "vessel") == {"Blue Horizon": (2, 4), "Sea Breeze": (2, 6)}
+    assert by(result["categories"], "name") == {"Catamaran": (3, 8), "Jet Ski": (1, 2)}
+    assert by(result["sections"], "name") == {"Deck": (2, 4), "Hull": (1, 4), "Engine": (1, 2)}
+    assert next(r for r in result["vessels"] if r["vessel"] == "Blue Horizon")["percent"] == 50.0
+
+def test_runs_count_against_their_own_template(db, catalog):
+    """Runs started before and after a catalog edit each count their own template's items"""
+    boat, ski, items = catalog
+    before = create_run(db, "Sea Breeze", boat.id)
+    update_run_item(db, before, items["deck"][0].id, True)
+    deck = items["deck"][0].section
+    added = ChecklistItem(description="Deck 2", order=3, section=deck)
+    db.add(added)
+    db.commit()
+    after = create_run(db, "Blue Horizon", boat.id)
+    update_run_item(db, after, added.id, True)
+
+    result = FleetProgress().get(db)
+    assert by(result["vessels"], "vessel") == {"Sea Breeze": (1, 4), "Blue Horizon": (1, 5)}
+    assert by(result["sections"], "name")["Deck"] == (2, 5)
+    assert by(result["categories"], "name")["Catamaran"] == (2, 9)
+
+def test_results_are_cached_by_run_version(db, catalog):
+    """Unchanged runs are served from cache; a change reloads only that run's bitset"""
+    boat, ski, items = catalog
+    runs = [create_run(db, f"Vessel {i}", boat.id) for i in range(3)]
+    progress = FleetProgress()
+
+    first = progress.get(db)
+    assert not first["cached"]
+    assert progress.get(db)["cached"]
+    assert progress.stats["bitsets_loaded"] == 3
+
+    update_run_item(db, runs[1], items["hull"][1].id, True)
+    result = progress.get(db)
+    assert not result["cached"]
+    assert progress.stats["bitsets_loaded"] == 4
+    assert by(result["categories"], "name")["Catamaran"] == (1, 12)
+
+def test_ten_thousand_runs_aggregate_quickly(db, catalog):
+    """Aggregating 10k runs stays well within an interactive budget"""
+    boat, ski, items = catalog
+    version_id = publish_template(db, boat.id).id
+    rng = random.Random(7)
+    db.bulk_insert_mappings(InspectionRun, [
+        {
+            "vessel": f"Vessel {i}",
+            "category_id": boat.id,
+            "template_version_id": version_id,
+            "completed_bits": bitset_from_ids(rng.sample(range(4), rng.randint(0, 4))),
+            "version": 1
+        }
+        for i in range(10000)
+    ])
+    db.commit()
+
+    progress = FleetProgress()
+    started = time.perf_counter()
+    result = progress.get(db)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    assert progress.get(db)["cached"]
+    warm = time.perf_counter() - started
+
+    assert result["runs"] == 10000
+    assert len(result["vessels"]) == 10000
+    assert cold < 5 and warm < 1
+
+@pytest.mark.asyncio
+async def test_fleet_progress_endpoint(db, catalog, monkeypatch):
+    """The endpoint returns the aggregate for the current runs"""
+    boat, ski, items = catalog
+    run = create_run(db, "Sea Breeze", boat.id)
+    update_run_item(db, run, items["deck"][0].id, True)
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/fleet/progress")
+        assert response.status_code == 200
+        assert by(response.json()["vessels"], "vessel") == {"Sea Breeze": (1, 4)}
@@ -0,0 +1,69 @@
+"""
+Tests for the pooled HTTP client registry
+"""
+import httpx
+import pytest
+
+from ..services.http_clients import HTTPClientRegistry
+
+@pytest.fixture
+def requests_seen():
+    return []
+
+@pytest.fixture
+def registry(requests_seen):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        if request.url.host == "down.example":
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    registry = HTTPClientRegistry()
+    transport = httpx.MockTransport(handler)
+    registry.register("up", base_url="https://up.example", warmup_url="https://up.example/", transport=transport)
+    registry.register("down", warmup_url="https://down.example/", transport=transport)
+    registry.register("cold", transport=transport)
+    return registry
+
+@pytest.mark.asyncio
+async def test_get_reuses_client(registry):
+    """The same pooled client is returned for every lookup"""
+    assert registry.get("up") is registry.get("up")
+    assert registry.get("up") is not registry.get("down")
+    await registry.aclose()
+
+def test_get_unknown_client(registry):
+    """Looking up an unregistered client is an error"""
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+@pytest.mark.asyncio
+async def test_warm_up_tolerates_failures(registry, requests_seen):
+    """Warm-up hits every upstream with a warm-up URL and ignores failures"""
+    await registry.warm_up()
+    hosts = sorted(request.url.host for request in requests_seen)
+    assert hosts == ["down.example", "up.example"]
+    assert all(request.method == "HEAD" for request in requests_seen)
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_aclose_recreates_on_next_get(registry):
+    """Closed clients are replaced with fresh ones on the next lookup"""
+    client = registry.get("up")
+    await registry.aclose()
+    assert client.is_closed
+
+    response = await registry.get("up").get("/ping")
+    assert response.json() == {"ok": True}
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_real_clients_offer_http2():
+    """With httpx[http2] installed, upstream pools negotiate HTTP/2"""
+    from ..services import http_clients
+
+    assert http_clients.HTTP2_AVAILABLE
+    registry = HTTPClientRegistry()
+    registry.register("api", base_url="https://api.example")
+    assert registry.get("api")._transport._pool._http2
+    await registry.aclose()
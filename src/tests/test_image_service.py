@@ -0,0 +1,125 @@
+"""
+Tests for the relevant-image service against a local stub webhook
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from ..services.image_service import CircuitBreaker, ImageService, normalize_message
+from ..main import app, image_service
+
+STUB_WEBHOOK_URL = "http://stub-n8n/webhook/red_image"
+
+class StubWebhook:
+    """Local stand-in for the n8n image webhook"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = False
+        self.delay = 0.0
+        self.app = FastAPI()
+
+        @self.app.post("/webhook/red_image")
+        async def red_image(payload: dict):
+            self.calls.append(payload["message"])
+            await asyncio.sleep(self.delay)
+            if self.failing:
+                raise HTTPException(status_code=503, detail="unavailable")
+            if "life jacket" in payload["message"].lower():
+                return {"image": "https://images.example/life-jacket.png", "type": "Safety Equipment"}
+            return {}
+
+@pytest.fixture
+def stub():
+    return StubWebhook()
+
+@pytest.fixture
+async def service(stub):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app))
+    yield ImageService(lambda: client, STUB_WEBHOOK_URL, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    await client.aclose()
+
+def test_normalize_message():
+    """Case, punctuation and whitespace do not change the cache key"""
+    assert normalize_message("  Check the LIFE jacket!! ") == normalize_message("check the life jacket")
+
+@pytest.mark.asyncio
+async def test_results_are_cached(service, stub):
+    """Repeated lookups of the same message hit the webhook once"""
+    first = await service.get_relevant_image("Where is the life jacket?")
+    second = await service.get_relevant_image("where is the LIFE JACKET")
+    assert first == {"image": "https://images.example/life-jacket.png", "type": "Safety Equipment"}
+    assert second == first
+    assert len(stub.calls) == 1
+
+    # "No image" answers are cached as well
+    assert await service.get_relevant_image("hello") is None
+    assert await service.get_relevant_image("Hello!") is None
+    assert len(stub.calls) == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_deduplicated(service, stub):
+    """Concurrent identical lookups share a single webhook call"""
+    stub.delay = 0.05
+    results = await asyncio.gather(*(service.get_relevant_image("life jacket") for _ in range(10)))
+    assert all(result["type"] == "Safety Equipment" for result in results)
+    assert len(stub.calls) == 1
+    assert service.stats["shared"] == 9
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_lookup(service, stub):
+    """Other callers still get the result when the one that started the lookup gives up"""
+    stub.delay = 0.05
+    first = asyncio.create_task(service.get_relevant_image("life jacket"))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(service.get_relevant_image("life jacket"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert (await second)["type"] == "Safety Equipment"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert len(stub.calls) == 1
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_skips_failing_webhook(service, stub):
+    """After repeated failures the webhook is not called until reset"""
+    stub.failing = True
+    assert await service.get_relevant_image("first") is None
+    assert await service.get_relevant_image("second") is None
+    assert service.breaker.state == "open"
+
+    assert await service.get_relevant_image("third") is None
+    assert len(stub.calls) == 2
+    assert service.stats["skipped"] == 1
+
+def test_circuit_breaker_half_open_trial():
+    """An open circuit lets a single trial call through after the timeout"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_relevant_image_endpoint(stub, monkeypatch):
+    """The endpoint returns the image found by the service"""
+    stub_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app))
+    monkeypatch.setattr(image_service, "client_factory", lambda: stub_client)
+    monkeypatch.setattr(image_service, "webhook_url", STUB_WEBHOOK_URL)
+    monkeypatch.setattr(image_service, "_cache", type(image_service._cache)())
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/images/relevant", json={"message": "life jacket"})
+        assert response.status_code == 200
+        assert response.json()["image"] == "https://images.example/life-jacket.png"
+
+        response = await client.post("/api/images/relevant", json={"message": "nothing here"})
+        assert response.json() == {"image": None, "type": None}
+    await stub_client.aclose()
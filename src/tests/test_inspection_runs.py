@@ -0,0 +1,147 @@
+"""
+Tests for inspection runs with bitset completion state
+"""
+import httpx
+import pytest
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.inspection_runs import (
+    bitset_from_ids, create_run, get_run, has_bit, ids_from_bitset,
+    popcount, run_progress, update_run_item, with_bit
+)
+from ..database.models import ChecklistItem, InspectionRun, InspectionRunItem
+
+@pytest.fixture
+def catalog(db, make_catalog):
+    """Two categories so items from the wrong one can be rejected"""
+    boat, _, (items,) = make_catalog("Catamaran", {"Deck": [f"Check {i}" for i in range(1, 5)]})
+    _, _, ((other,),) = make_catalog("Jet Ski", {"Engine": ["Kill cord"]})
+    return db, boat, items, other
+
+def test_bitset_helpers():
+    """Bitsets round-trip item ids and count with a mask"""
+    bits = bitset_from_ids([1, 9, 70])
+    assert ids_from_bitset(bits) == [1, 9, 70]
+    assert has_bit(bits, 9) and not has_bit(bits, 8) and not has_bit(bits, 500)
+    assert ids_from_bitset(with_bit(bits, 9, False)) == [1, 70]
+    assert ids_from_bitset(with_bit(b"", 3, True)) == [3]
+    assert popcount(bits) == 3
+    assert popcount(bits, mask=(1 << 1) | (1 << 70)) == 2
+
+def test_create_run_copies_nothing_per_item(catalog):
+    """A new run is one row with an empty bitset"""
+    db, boat, items, _ = catalog
+    run = create_run(db, "Sea Breeze", boat.id)
+
+    assert run.completed_bits == b""
+    assert db.query(InspectionRunItem).count() == 0
+    assert run_progress(db, run) == {"completed": 0, "total": 4, "percent": 0.0}
+
+    with pytest.raises(ValueError):
+        create_run(db, "Sea Breeze", 999)
+
+def test_update_items_and_progress(catalog):
+    """Completion is kept in the bitset and notes in the sparse side table"""
+    db, boat, items, other = catalog
+    run = create_run(db, "Sea Breeze", boat.id)
+
+    update_run_item(db, run, items[0].id, True)
+    update_run_item(db, run, items[2].id, True, notes="Replaced", checked_by="sam")
+    assert run_progress(db, run) == {"completed": 2, "total": 4, "percent": 50.0}
+    assert run.version == 2
+
+    update_run_item(db, run, items[0].id, False)
+    # Bits are positions in the run's template
+    assert ids_from_bitset(run.completed_bits) == [2]
+
+    details = db.query(InspectionRunItem).all()
+    assert [(d.item_id, d.notes, d.checked_by) for d in details] == [(items[2].id, "Replaced", "sam")]
+
+    with pytest.raises(ValueError):
+        update_run_item(db, run, other.id, True)
+
+def test_runs_are_independent(catalog):
+    """Each vessel's run has its own state over the same item rows"""
+    db, boat, items, _ = catalog
+    first = create_run(db, "Sea Breeze", boat.id)
+    second = create_run(db, "Blue Horizon", boat.id)
+    update_run_item(db, first, items[0].id, True)
+
+    assert run_progress(db, first)["completed"] == 1
+    assert run_progress(db, second)["completed"] == 0
+    assert db.query(ChecklistItem).count() == 5
+
+def test_stale_update_is_retried_without_losing_bits(catalog, session_factory):
+    """Two sessions updating different items of one run both land"""
+    db, boat, items, _ = catalog
+    run_id = create_run(db, "Sea Breeze", boat.id).id
+
+    first_db, second_db = session_factory(), session_factory()
+    first_run, second_run = get_run(first_db, run_id), get_run(second_db, run_id)
+    update_run_item(first_db, first_run, items[0].id, True)
+    # second_run still holds version 0 and the empty bitset
+    update_run_item(second_db, second_run, items[1].id, True)
+
+    db.expire_all()
+    run = get_run(db, run_id)
+    assert ids_from_bitset(run.completed_bits) == [0, 1]
+    assert run.version == 2
+    first_db.close()
+    second_db.close()
+
+def test_bitsets_grow_with_the_template_not_the_catalog(catalog):
+    """A run's bitset is sized by its own checklist, however large item ids get"""
+    db, boat, items, other = catalog
+    db.add_all([ChecklistItem(description=f"Kill cord {i}", order=i, section=other.section) for i in range(2, 2000)])
+    db.commit()
+    last = ChecklistItem(description="Check 5", order=5, section=items[0].section)
+    db.add(last)
+    db.commit()
+    assert last.id > 2000
+
+    run = create_run(db, "Sea Breeze", boat.id)
+    update_run_item(db, run, last.id, True)
+    assert run.completed_bits == b"\x10"
+    assert run_progress(db, run) == {"completed": 1, "total": 5, "percent": 20.0}
+
+@pytest.mark.asyncio
+async def test_inspection_run_endpoints(catalog, session_factory, monkeypatch):
+    """Start a run, check items, read it back and finish it"""
+    db, boat, items, other = catalog
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/inspection-runs", json={"vessel": "Sea Breeze", "category_id": boat.id})
+        assert response.status_code == 201
+        run_id = response.json()["id"]
+
+        response = await client.post(
+            f"/api/inspection-runs/{run_id}/items/{items[1].id}",
+            json={"is_completed": True, "checked_by": "sam"}
+        )
+        assert response.json()["progress"]["completed"] == 1
+
+        response = await client.post(f"/api/inspection-runs/{run_id}/items/{other.id}", json={"is_completed": True})
+        assert response.status_code == 400
+
+        run = (await client.get(f"/api/inspection-runs/{run_id}")).json()
+        checked = [item for item in run["items"] if item["is_completed"]]
+        assert [(item["id"], item["checked_by"]) for item in checked] == [(items[1].id, "sam")]
+
+        response = await client.get("/api/inspection-runs", params={"vessel": "Sea Breeze"})
+        assert [r["id"] for r in response.json()] == [run_id]
+
+        response = await client.post(f"/api/inspection-runs/{run_id}/finish")
+        assert response.json()["finished_at"] is not None
+        response = await client.post(f"/api/inspection-runs/{run_id}/items/{items[0].id}", json={"is_completed": True})
+        assert response.status_code == 409
+
+        assert (await client.get("/api/inspection-runs/999")).status_code == 404
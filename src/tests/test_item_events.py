@@ -0,0 +1,145 @@
+"""
+Tests for the checklist item event log and its compaction
+"""
+import threading
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.inspection_runs import create_run, update_run_item
+from ..database.item_events import compact_item_events, item_history, record_item_event
+from ..database.models import Base, ChecklistItemEvent, ChecklistItemEventRollup
+
+@pytest.fixture
+def items(make_catalog):
+    _, _, (items,) = make_catalog("Catamaran", {"Deck": [f"Deck {i}" for i in range(3)]})
+    return items
+
+def test_events_are_written_in_one_batch_with_the_commit(engine, db, items):
+    """Queued events are inserted together, in the same transaction as the state change"""
+    inserts = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO checklist_item_events"):
+            inserts.append(len(parameters) if executemany else 1)
+
+    for item in items:
+        item.is_completed = True
+        record_item_event(db, item.id, "completed", source="chat")
+    assert db.query(ChecklistItemEvent).count() == 0
+    db.commit()
+
+    assert inserts == [3]
+    assert db.query(ChecklistItemEvent).count() == 3
+
+def test_rollback_discards_queued_events(db, items):
+    """Events for a change that is rolled back are never written"""
+    record_item_event(db, items[0].id, "completed")
+    db.rollback()
+    db.commit()
+
+    assert db.query(ChecklistItemEvent).count() == 0
+
+def test_run_updates_record_events(db, items):
+    """Checking an item in an inspection run logs who did it and in which run"""
+    run = create_run(db, "Sea Breeze", items[0].section.category_id)
+    update_run_item(db, run, items[1].id, True, checked_by="Alex")
+    update_run_item(db, run, items[1].id, False)
+
+    history = item_history(db, items[1].id)
+    assert [e["event"] for e in history["events"]] == ["uncompleted", "completed"]
+    assert history["events"][1]["actor"] == "Alex"
+    assert {e["run_id"] for e in history["events"]} == {run.id}
+
+def test_compaction_folds_old_days_into_rollups(db, items):
+    """Whole days before the cutoff become one rollup row per item and event"""
+    today = datetime(2024, 6, 10, 15, 0)
+    for hours in (0, 1, 2):
+        record_item_event(db, items[0].id, "completed", created_at=datetime(2024, 6, 1, 9 + hours))
+    record_item_event(db, items[0].id, "uncompleted", created_at=datetime(2024, 6, 1, 13))
+    record_item_event(db, items[0].id, "completed", created_at=datetime(2024, 6, 10, 8))
+    db.commit()
+
+    assert compact_item_events(db, today) == 4
+    # Compacting again finds nothing left to fold
+    assert compact_item_events(db, today) == 0
+
+    rollups = {(r.event, r.count) for r in db.query(ChecklistItemEventRollup)}
+    assert rollups == {("completed", 3), ("uncompleted", 1)}
+    completed = db.query(ChecklistItemEventRollup).filter_by(event="completed").one()
+    assert (completed.first_at, completed.last_at) == (datetime(2024, 6, 1, 9), datetime(2024, 6, 1, 11))
+    assert db.query(ChecklistItemEvent).count() == 1
+
+    # A late event for an already compacted day adds to its rollup
+    record_item_event(db, items[0].id, "completed", created_at=datetime(2024, 6, 1, 7))
+    db.commit()
+    compact_item_events(db, today)
+    completed = db.query(ChecklistItemEventRollup).filter_by(event="completed").one()
+    assert completed.count == 4
+    assert completed.first_at == datetime(2024, 6, 1, 7)
+
+def test_concurrent_compactors_fold_each_event_once(tmp_path):
+    """Compactors in two workers never count the same events twice"""
+    url = f"sqlite:///{tmp_path / 'events.db'}"
+    engines = [create_engine(url, connect_args={"check_same_thread": False}) for _ in range(2)]
+    Base.metadata.create_all(bind=engines[0])
+    db = sessionmaker(bind=engines[0])()
+    for minute in range(10):
+        record_item_event(db, 1, "completed", created_at=datetime(2024, 6, 1, 9, minute))
+    db.commit()
+    db.close()
+
+    barrier = threading.Barrier(2)
+    compacted = []
+
+    def compact(engine):
+        session = sessionmaker(bind=engine)()
+        barrier.wait()
+        compacted.append(compact_item_events(session, datetime(2024, 6, 10)))
+        session.close()
+
+    threads = [threading.Thread(target=compact, args=(engine,)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(compacted) == [0, 10]
+    db = sessionmaker(bind=engines[0])()
+    assert db.query(ChecklistItemEventRollup.count).scalar() == 10
+    db.close()
+    for engine in engines:
+        engine.dispose()
+
+def test_history_filters_by_time_range(db, items):
+    """Only events and rollups inside the requested range are returned"""
+    start = datetime(2024, 6, 1, 12)
+    for day in range(5):
+        record_item_event(db, items[0].id, "completed", created_at=start + timedelta(days=day))
+    record_item_event(db, items[1].id, "completed", created_at=start)
+    db.commit()
+    compact_item_events(db, start + timedelta(days=2))
+
+    history = item_history(db, items[0].id, since=start + timedelta(days=1), until=start + timedelta(days=4))
+    assert [e["created_at"] for e in history["events"]] == ["2024-06-04T12:00:00", "2024-06-03T12:00:00"]
+    assert [r["day"] for r in history["daily"]] == ["2024-06-02"]
+
+@pytest.mark.asyncio
+async def test_item_events_endpoint(db, items, monkeypatch):
+    """The endpoint returns an item's history and 404s for unknown items"""
+    record_item_event(db, items[0].id, "completed", source="chat")
+    db.commit()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/api/checklist/items/{items[0].id}/events")
+        assert response.status_code == 200
+        assert [e["source"] for e in response.json()["events"]] == ["chat"]
+
+        response = await client.get("/api/checklist/items/9999/events")
+        assert response.status_code == 404
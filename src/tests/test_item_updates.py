@@ -0,0 +1,129 @@
+"""
+Tests for compare-and-set checklist item updates
+"""
+import httpx
+import pytest
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.item_updates import ItemConflictError, update_item
+from ..database.models import ChecklistItem, ChecklistItemEvent
+
+@pytest.fixture
+def sessions(session_factory):
+    opened = []
+
+    def session():
+        opened.append(session_factory())
+        return opened[-1]
+
+    yield session
+    for db in opened:
+        db.close()
+
+@pytest.fixture
+def item(make_catalog):
+    _, _, ((item,),) = make_catalog("Catamaran", {"Deck": ["Check winches"]}, is_completed=False)
+    return item
+
+def test_updates_bump_the_version(db, item):
+    """Each effective change increments the version; no-op updates do not"""
+    updated = update_item(db, item.id, {"is_completed": True}, checked_by="Sam", source="api")
+    assert (updated.is_completed, updated.checked_by, updated.version) == (True, "Sam", 1)
+    assert updated.last_checked is not None
+
+    assert update_item(db, item.id, {"is_completed": True}).version == 1
+    assert update_item(db, item.id, {"notes": "Greased"}, expected_version=1).version == 2
+    assert update_item(db, 999, {"notes": "Missing"}) is None
+
+def test_concurrent_updates_to_other_fields_are_retried(sessions, item):
+    """A writer that lost the race retries when the winner changed other fields"""
+    first, second = sessions(), sessions()
+    stale = first.query(ChecklistItem).get(item.id)
+    assert stale.version == 0
+
+    update_item(second, item.id, {"notes": "Port winch stiff"})
+    updated = update_item(first, item.id, {"is_completed": True})
+    assert (updated.is_completed, updated.notes, updated.version) == (True, "Port winch stiff", 2)
+
+def test_concurrent_updates_to_the_same_field_conflict(sessions, item, monkeypatch):
+    """Losing the race on a field the winner set to something else is a conflict"""
+    from ..database import item_updates
+
+    first, second = sessions(), sessions()
+    load = item_updates._load
+
+    def racing_load(db, item_id):
+        # Another writer gets in right after our first read
+        loaded = load(db, item_id)
+        if db is first and loaded.version == 0:
+            update_item(second, item_id, {"notes": "Replace port winch"})
+        return loaded
+
+    monkeypatch.setattr(item_updates, "_load", racing_load)
+    with pytest.raises(ItemConflictError) as error:
+        update_item(first, item.id, {"notes": "All good"})
+    assert error.value.fields == ["notes"]
+    assert error.value.item["notes"] == "Replace port winch"
+    assert error.value.item["version"] == 1
+
+def test_stale_versions_only_conflict_on_different_values(db, item):
+    """Clients with an old version may still make changes that already hold"""
+    update_item(db, item.id, {"is_completed": True, "notes": "Done"})
+
+    assert update_item(db, item.id, {"is_completed": True}, expected_version=0).version == 1
+    with pytest.raises(ItemConflictError) as error:
+        update_item(db, item.id, {"is_completed": True, "notes": "Later"}, expected_version=0)
+    assert error.value.fields == ["notes"]
+
+def test_completion_changes_are_recorded(db, item):
+    """Completing and uncompleting an item appends to its event log"""
+    update_item(db, item.id, {"is_completed": True}, checked_by="Sam", source="api")
+    update_item(db, item.id, {"notes": "Greased"})
+    update_item(db, item.id, {"is_completed": False}, source="chat")
+
+    events = db.query(ChecklistItemEvent).order_by(ChecklistItemEvent.id).all()
+    assert [(e.event, e.actor, e.source) for e in events] == [
+        ("completed", "Sam", "api"), ("uncompleted", None, "chat")
+    ]
+
+def test_checked_by_is_saved_on_its_own(db, item):
+    """A new checked_by is written even when the requested state already holds"""
+    update_item(db, item.id, {"is_completed": True}, checked_by="Sam")
+    updated = update_item(db, item.id, {"is_completed": True}, checked_by="Alex")
+    assert (updated.checked_by, updated.version) == ("Alex", 2)
+    assert update_item(db, item.id, {"is_completed": True}, checked_by="Alex").version == 2
+
+def test_updates_can_share_one_commit(db, item):
+    """With commit=False the updates and their events are saved or dropped together"""
+    update_item(db, item.id, {"is_completed": True}, source="chat", commit=False)
+    db.rollback()
+    assert db.query(ChecklistItem.version).filter(ChecklistItem.id == item.id).scalar() == 0
+
+    update_item(db, item.id, {"is_completed": True}, source="chat", commit=False)
+    assert update_item(db, item.id, {"notes": "Greased"}, commit=False).version == 2
+    db.commit()
+    assert db.query(ChecklistItem.version).filter(ChecklistItem.id == item.id).scalar() == 2
+    assert [e.event for e in db.query(ChecklistItemEvent)] == ["completed"]
+
+@pytest.mark.asyncio
+async def test_item_update_endpoint(db, item, monkeypatch):
+    """The endpoint returns the new state, 404 for unknown items and 409 on conflicts"""
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/checklist/item", json={
+            "id": item.id, "is_completed": True, "checked_by": "User", "version": 0
+        })
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+
+        response = await client.post("/api/checklist/item", json={"id": item.id, "notes": "Ok", "version": 1})
+        assert response.json()["notes"] == "Ok"
+
+        response = await client.post("/api/checklist/item", json={"id": item.id, "is_completed": False, "version": 1})
+        assert response.status_code == 409
+        assert response.json()["detail"]["fields"] == ["is_completed"]
+        assert response.json()["detail"]["item"]["version"] == 2
+
+        response = await client.post("/api/checklist/item", json={"id": 999, "is_completed": True})
+        assert response.status_code == 404
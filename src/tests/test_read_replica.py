@@ -0,0 +1,88 @@
+"""
+Tests for the in-memory read replica
+"""
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.models import Base, ChecklistCategory, ChecklistSection, ChecklistItem, ConversationMessage
+from ..database.read_replica import ReadReplica
+from ..database.triggers import data_version_ddl
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "checklist.db")
+
+@pytest.fixture
+def db(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in data_version_ddl():
+            conn.execute(text(statement))
+    session = sessionmaker(bind=engine)()
+    category = ChecklistCategory(name="Catamaran")
+    deck = ChecklistSection(name="Deck", order=1, category=category)
+    db_item = ChecklistItem(description="Check winches", order=1, section=deck, is_completed=False)
+    session.add_all([category, deck, db_item])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def replica(db, path):
+    replica = ReadReplica(path)
+    yield replica
+    replica.close()
+
+def test_replica_is_refreshed_only_after_checklist_writes(db, replica):
+    """Reads reuse the copy until a checklist table is written"""
+    reader = replica.session()
+    assert reader.query(ChecklistItem.description).scalar() == "Check winches"
+    reader.close()
+    replica.session().close()
+    assert replica.stats == {"reads": 2, "refreshes": 1}
+
+    db.add(ConversationMessage(session_id="s1", role="user", content="Check the winches", created_at=datetime.utcnow()))
+    db.commit()
+    replica.session().close()
+    assert replica.stats["refreshes"] == 1
+
+    db.query(ChecklistItem).update({"is_completed": True, "version": 1})
+    db.commit()
+    reader = replica.session()
+    assert reader.query(ChecklistItem.is_completed).scalar() is True
+    reader.close()
+    assert replica.stats["refreshes"] == 2
+
+def test_replica_is_read_only(db, replica):
+    """Writes to the copy fail instead of being silently lost"""
+    reader = replica.session()
+    reader.add(ChecklistCategory(name="Monohull"))
+    with pytest.raises(OperationalError):
+        reader.commit()
+    reader.close()
+
+@pytest.mark.asyncio
+async def test_read_endpoints_use_the_replica(db, replica, monkeypatch):
+    """With a replica configured, read endpoints are served from it"""
+    from .. import main
+
+    empty = sessionmaker(bind=create_engine("sqlite://"))()
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: empty)
+    monkeypatch.setattr(main, "read_replica", replica)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/checklists")
+        assert response.status_code == 200
+        assert response.json()[0]["sections"][0]["items"][0]["description"] == "Check winches"
+
+        response = await client.get("/api/search", params={"q": "winch", "kind": "item"})
+        assert [r["title"] for r in response.json()["results"]] == ["Check winches"]
+    assert replica.stats["refreshes"] == 1
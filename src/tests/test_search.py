@@ -0,0 +1,121 @@
+"""
+Tests for full-text search
+"""
+import importlib.util
+import os
+import sys
+from datetime import datetime
+import httpx
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.models import ConversationMessage
+from ..database.search import like_snippet, search, search_terms
+
+DATABASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "database"))
+MIGRATION = os.path.join(DATABASE_DIR, "migrations", "versions", "005_search_index.py")
+
+def run_migration(engine, direction="upgrade"):
+    # Migrations import shared DDL as top-level modules, as under alembic's env.py
+    if DATABASE_DIR not in sys.path:
+        sys.path.insert(0, DATABASE_DIR)
+    spec = importlib.util.spec_from_file_location("search_index_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            getattr(migration, direction)()
+
+@pytest.fixture
+def catalog(db, make_catalog):
+    _, (safety, _), ((jackets,), (pump,)) = make_catalog(
+        "Catamaran", {"Safety Equipment": ["Life jackets for all passengers"], "Hull": ["Bilge pump functionality"]}
+    )
+    safety.description = "Required safety gear"
+    pump.notes = "Pump was slow; jackets stored nearby"
+    message = ConversationMessage(
+        session_id="abc", role="user", content="All the life jackets are on board", created_at=datetime(2024, 6, 1)
+    )
+    db.add(message)
+    db.commit()
+    return jackets, pump, message
+
+def test_search_terms_drop_operators():
+    """Query syntax is reduced to plain words"""
+    assert search_terms('life "jackets" OR -pump*') == ["life", "jackets", "or", "pump"]
+
+def test_like_snippet_highlights_matches():
+    """Snippets are a window around the first match"""
+    text = " ".join(f"w{i}" for i in range(30)) + " Jackets here"
+    assert like_snippet(text, ["jacket"], words=4) == "…w28 w29 <mark>Jacket</mark>s here"
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_snippets_escape_stored_text(engine, db, catalog, indexed):
+    """Stored text is HTML-escaped; only the highlight tags are markup"""
+    jackets, pump, message = catalog
+    jackets.description = "Life jackets <img src=x onerror=alert(1)> & flares"
+    db.commit()
+    if indexed:
+        run_migration(engine)
+
+    snippet = search(db, "jackets", kinds=["item"])["results"][0]["snippet"]
+    assert "<img" not in snippet
+    assert "&lt;img src=x onerror=alert(1)&gt; &amp; flares" in snippet
+    assert "<mark>jackets</mark>" in snippet
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_search_ranks_titles_above_notes(engine, db, catalog, indexed):
+    """Items, notes and messages match; an item named after the query ranks first"""
+    jackets, pump, message = catalog
+    if indexed:
+        run_migration(engine)
+
+    result = search(db, "jackets")
+
+    assert result["engine"] == ("fts5" if indexed else "like")
+    found = [(r["kind"], r["id"]) for r in result["results"]]
+    assert set(found) == {("item", jackets.id), ("item", pump.id), ("message", message.id)}
+    assert found[0] == ("item", jackets.id)
+    top = result["results"][0]
+    assert "<mark>jackets</mark>" in top["snippet"]
+    assert top["section"] == "Safety Equipment"
+    assert next(r for r in result["results"] if r["kind"] == "message")["session_id"] == "abc"
+
+def test_index_follows_changes(engine, db, catalog):
+    """Triggers keep the index in sync with inserts, updates and deletes"""
+    jackets, pump, message = catalog
+    run_migration(engine)
+
+    pump.notes = "Replaced impeller"
+    db.commit()
+    assert [r["id"] for r in search(db, "jackets", ["item"])["results"]] == [jackets.id]
+    assert [r["id"] for r in search(db, "impel")["results"]] == [pump.id]
+
+    db.delete(jackets)
+    db.commit()
+    assert search(db, "jackets", ["item"])["results"] == []
+
+    db.add(ConversationMessage(session_id="abc", role="assistant", content="Impeller noted", created_at=datetime.utcnow()))
+    db.commit()
+    assert {r["kind"] for r in search(db, "impeller")["results"]} == {"item", "message"}
+
+    run_migration(engine, "downgrade")
+    assert search(db, "impeller")["engine"] == "like"
+
+@pytest.mark.asyncio
+async def test_search_endpoint(engine, db, catalog, monkeypatch):
+    """The endpoint filters by kind and rejects empty queries"""
+    jackets, pump, message = catalog
+    run_migration(engine)
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/search", params={"q": "life jackets", "kind": "message"})
+        assert response.status_code == 200
+        assert [(r["kind"], r["id"]) for r in response.json()["results"]] == [("message", message.id)]
+
+        response = await client.get("/api/search", params={"q": "  "})
+        assert response.status_code == 400
@@ -0,0 +1,63 @@
+"""
+Tests for the crew task dependency graph
+"""
+import threading
+import time
+import pytest
+
+from ..agents.task_graph import TaskGraph
+
+def test_levels_group_independent_tasks():
+    """Tasks without dependencies share the first layer"""
+    graph = TaskGraph()
+    graph.add("analysis", lambda deps: "analysis")
+    graph.add("checklist", lambda deps: "checklist")
+    graph.add("summary", lambda deps: "summary", depends_on=("analysis", "checklist"))
+    assert graph.levels() == [["analysis", "checklist"], ["summary"]]
+
+def test_invalid_graphs_are_rejected():
+    """Unknown dependencies and cycles are reported before running"""
+    graph = TaskGraph().add("a", lambda deps: "a", depends_on=("missing",))
+    with pytest.raises(ValueError):
+        graph.levels()
+
+    graph = TaskGraph()
+    graph.add("a", lambda deps: "a", depends_on=("b",))
+    graph.add("b", lambda deps: "b", depends_on=("a",))
+    with pytest.raises(ValueError):
+        graph.run(lambda task: task)
+
+def test_independent_branches_run_concurrently():
+    """Two independent 0.2s tasks finish in roughly the time of one"""
+    graph = TaskGraph()
+    graph.add("analysis", lambda deps: ("analysis", 0.2))
+    graph.add("checklist", lambda deps: ("checklist", 0.2))
+
+    def execute(task):
+        name, duration = task
+        time.sleep(duration)
+        return f"{name} done on {threading.current_thread().name}"
+
+    start = time.perf_counter()
+    results = graph.run(execute)
+    elapsed = time.perf_counter() - start
+
+    assert set(results) == {"analysis", "checklist"}
+    assert elapsed < 0.35
+
+def test_dependent_tasks_receive_upstream_results():
+    """A node's builder sees the results of the nodes it depends on"""
+    graph = TaskGraph()
+    graph.add("items", lambda deps: 2)
+    graph.add("double", lambda deps: deps["items"] * 2, depends_on=("items",))
+    assert graph.run(lambda task: task) == {"items": 2, "double": 4}
+
+def test_failures_propagate():
+    """An exception in any task fails the whole run"""
+    graph = TaskGraph().add("boom", lambda deps: None)
+
+    def execute(task):
+        raise RuntimeError("crew failed")
+
+    with pytest.raises(RuntimeError):
+        graph.run(execute)
@@ -0,0 +1,165 @@
+"""
+Tests for versioned checklist templates and copy-on-write runs
+"""
+import httpx
+import pytest
+
+from ..main import app
+from ..database.connection import get_db
+from ..database.inspection_runs import create_run, run_progress, run_to_dict, update_run_item
+from ..database.models import ChecklistItem, ChecklistTemplateVersion, InspectionRunItem
+from ..database.templates import TemplateSnapshots, publish_template
+
+@pytest.fixture
+def catalog(make_catalog):
+    category, (deck,), (items,) = make_catalog("Catamaran", {"Deck": [f"Check {i}" for i in range(1, 4)]})
+    return category, deck, items
+
+def test_publishing_is_idempotent_until_the_template_changes(db, catalog):
+    """Unchanged templates reuse the latest version; edits publish a new one"""
+    category, deck, items = catalog
+    first = publish_template(db, category.id, note="Initial")
+    assert publish_template(db, category.id).id == first.id
+
+    items[0].description = "Check 1 (both hulls)"
+    db.commit()
+    second = publish_template(db, category.id)
+    assert (first.version, second.version) == (1, 2)
+    assert db.query(ChecklistTemplateVersion).count() == 2
+
+    with pytest.raises(ValueError):
+        publish_template(db, 999)
+
+def test_concurrent_publishes_return_the_winning_version(db, catalog, monkeypatch):
+    """A publish that loses the race for a version number returns the winner's version"""
+    from ..database import templates
+
+    category, deck, items = catalog
+    latest = templates.latest_version
+    calls = []
+
+    def stale_latest_version(db, category_id):
+        # The first read happens before the other request's version is committed
+        calls.append(category_id)
+        return None if len(calls) == 1 else latest(db, category_id)
+
+    winner = publish_template(db, category.id)
+    monkeypatch.setattr(templates, "latest_version", stale_latest_version)
+    assert publish_template(db, category.id).id == winner.id
+    assert db.query(ChecklistTemplateVersion).count() == 1
+
+def test_runs_reuse_the_current_version_until_the_catalog_changes(db, catalog, monkeypatch):
+    """Starting a run only hashes the template after the catalog changed"""
+    from ..database import templates
+
+    category, deck, items = catalog
+    content = templates.template_content
+    hashed = []
+
+    def counted_content(db, category_id):
+        hashed.append(category_id)
+        return content(db, category_id)
+
+    monkeypatch.setattr(templates, "template_content", counted_content)
+
+    runs = [create_run(db, f"Vessel {i}", category.id) for i in range(3)]
+    assert len(hashed) == 1
+    assert {run.template_version_id for run in runs} == {runs[0].template_version_id}
+
+    items[0].description = "Check 1 (both hulls)"
+    db.commit()
+    assert run_to_dict(db, create_run(db, "Sea Breeze", category.id))["template_version"] == 2
+    assert len(hashed) == 2
+
+def test_runs_keep_their_template_when_it_is_edited(db, catalog):
+    """Template edits after a run starts do not change what the run shows"""
+    category, deck, items = catalog
+    run = create_run(db, "Sea Breeze", category.id)
+    update_run_item(db, run, items[2].id, True, notes="OK")
+
+    items[0].description = "Renamed"
+    db.delete(items[2])
+    db.add(ChecklistItem(description="New check", order=9, section=deck))
+    db.commit()
+
+    view = run_to_dict(db, run, include_items=True)
+    assert view["template_version"] == 1
+    assert [item["description"] for item in view["items"]] == ["Check 1", "Check 2", "Check 3"]
+    assert view["items"][2]["is_completed"] and view["items"][2]["notes"] == "OK"
+    assert view["progress"] == {"completed": 1, "total": 3, "percent": 33.3}
+
+    new_run = create_run(db, "Blue Horizon", category.id)
+    view = run_to_dict(db, new_run, include_items=True)
+    assert view["template_version"] == 2
+    assert [item["description"] for item in view["items"]] == ["Renamed", "Check 2", "New check"]
+
+def test_runs_store_only_overrides(db, catalog):
+    """Items are only checked against the run's version; untouched items have no rows"""
+    category, deck, items = catalog
+    run = create_run(db, "Sea Breeze", category.id)
+    added = ChecklistItem(description="New check", order=9, section=deck)
+    db.add(added)
+    db.commit()
+
+    with pytest.raises(ValueError):
+        update_run_item(db, run, added.id, True)
+    update_run_item(db, run, items[0].id, True)
+    assert db.query(InspectionRunItem).count() == 0
+    assert run_progress(db, run)["completed"] == 1
+
+def test_snapshots_are_cached():
+    """Parsed versions are loaded once per database and evicted least recently used first"""
+    loads = []
+
+    class FakeQuery:
+        def __init__(self, *args):
+            pass
+        def filter(self, condition):
+            self.version_id = condition.right.value
+            return self
+        def first(self):
+            loads.append(self.version_id)
+            return type("Row", (), {"version": 1, "snapshot": '{"category": {}, "sections": []}'})
+
+    class FakeEngine:
+        pass
+
+    class FakeSession:
+        def __init__(self, engine):
+            self.engine = engine
+        def get_bind(self):
+            return self.engine
+        def query(self, *args):
+            return FakeQuery()
+
+    snapshots = TemplateSnapshots(max_entries=2)
+    first, second = FakeEngine(), FakeEngine()
+    for version_id in (1, 1, 2, 1, 3, 2):
+        snapshots.get(FakeSession(first), version_id)
+    assert loads == [1, 2, 3, 2]
+    # Another database has its own version ids
+    snapshots.get(FakeSession(second), 2)
+    assert loads == [1, 2, 3, 2, 2]
+
+@pytest.mark.asyncio
+async def test_template_version_endpoints(db, catalog, monkeypatch):
+    """Versions can be published, listed and read back"""
+    category, deck, items = catalog
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(f"/api/checklists/{category.id}/versions", json={"note": "Season start"})
+        assert response.status_code == 201
+        assert response.json()["version"] == 1
+
+        response = await client.post("/api/inspection-runs", json={"vessel": "Sea Breeze", "category_id": category.id})
+        assert response.json()["template_version"] == 1
+
+        response = await client.get(f"/api/checklists/{category.id}/versions")
+        assert [v["note"] for v in response.json()] == ["Season start"]
+
+        response = await client.get(f"/api/checklists/{category.id}/versions/1")
+        assert response.status_code == 200
+        assert [i["description"] for i in response.json()["sections"][0]["items"]] == ["Check 1", "Check 2", "Check 3"]
+
+        response = await client.get(f"/api/checklists/{category.id}/versions/5")
+        assert response.status_code == 404
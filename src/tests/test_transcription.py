@@ -0,0 +1,63 @@
+"""
+Tests for speech-to-text uploads
+"""
+import asyncio
+import os
+from types import SimpleNamespace
+import httpx
+import pytest
+
+from ..main import app, client as openai_client
+from ..services import transcription
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Replace Whisper with a stub that echoes the uploaded bytes"""
+    calls = []
+
+    async def create(model, file):
+        filename, fileobj, content_type = file
+        # Let other uploads interleave while this one is "transcribing"
+        await asyncio.sleep(0.01)
+        calls.append(filename)
+        return SimpleNamespace(text=fileobj.read().decode("utf-8"))
+
+    monkeypatch.setattr(openai_client.audio.transcriptions, "create", create)
+    return calls
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.mark.asyncio
+async def test_concurrent_uploads_do_not_collide(client, fake_whisper, tmp_path, monkeypatch):
+    """50 simultaneous uploads with the same filename each get their own transcript"""
+    monkeypatch.chdir(tmp_path)
+
+    async def upload(i):
+        response = await client.post(
+            "/api/speech-to-text",
+            files={"audio": ("recording.wav", f"utterance {i}".encode("utf-8"), "audio/wav")}
+        )
+        return response
+
+    responses = await asyncio.gather(*(upload(i) for i in range(50)))
+
+    assert [r.status_code for r in responses] == [200] * 50
+    assert [r.json()["text"] for r in responses] == [f"utterance {i}" for i in range(50)]
+    assert len(fake_whisper) == 50
+    # Nothing is written to the working directory
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected(client, fake_whisper, monkeypatch):
+    """Uploads over the size limit get a 413 and never reach Whisper"""
+    monkeypatch.setattr(transcription, "MAX_AUDIO_UPLOAD_BYTES", 10)
+
+    response = await client.post(
+        "/api/speech-to-text",
+        files={"audio": ("recording.wav", b"x" * 11, "audio/wav")}
+    )
+    assert response.status_code == 413
+    assert fake_whisper == []
@@ -0,0 +1,118 @@
+"""
+Tests for streamed text-to-speech
+"""
+import asyncio
+import json
+import logging
+import httpx
+import pytest
+
+from ..main import app, http_clients
+from ..services.tts import TTSUpstreamError, open_elevenlabs_speech, open_openai_speech, relay_stream
+
+class SlowSynthesis:
+    """Upstream stub that sends one chunk, then waits before finishing"""
+
+    def __init__(self):
+        self.finish = asyncio.Event()
+        self.finished = False
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        payload = json.loads(request.content)
+        if payload.get("input", payload.get("text")) == "fail":
+            return httpx.Response(400, json={"error": "bad input"})
+
+        async def body():
+            yield b"ID3-first-chunk"
+            await self.finish.wait()
+            yield b"-rest"
+            self.finished = True
+
+        return httpx.Response(200, content=body(), headers={"content-type": "audio/mpeg"})
+
+@pytest.fixture
+def upstream():
+    return SlowSynthesis()
+
+@pytest.fixture
+async def upstream_client(upstream):
+    # Base URL as registered for ElevenLabs; OpenAI calls use absolute URLs
+    client = httpx.AsyncClient(base_url="https://api.elevenlabs.io", transport=httpx.MockTransport(upstream.handler))
+    yield client
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_first_chunk_arrives_before_synthesis_finishes(upstream, upstream_client):
+    """Audio is relayed as soon as the provider sends it"""
+    response = await open_openai_speech(upstream_client, "sk-test", "Hello")
+    chunks = relay_stream(response)
+
+    first = await asyncio.wait_for(chunks.__anext__(), timeout=1)
+    assert first == b"ID3-first-chunk"
+    assert not upstream.finished
+
+    upstream.finish.set()
+    rest = [chunk async for chunk in chunks]
+    assert b"".join(rest) == b"-rest"
+    assert response.is_closed
+
+    request = upstream.requests[0]
+    assert request.headers["authorization"] == "Bearer sk-test"
+    assert json.loads(request.content)["model"] == "tts-1"
+
+@pytest.mark.asyncio
+async def test_upstream_errors_are_raised_before_streaming(upstream_client):
+    """Error statuses surface as exceptions, not as a broken audio stream"""
+    with pytest.raises(TTSUpstreamError) as error:
+        await open_openai_speech(upstream_client, "sk-test", "fail")
+    assert error.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_text_to_speech_endpoint_streams_audio(upstream, upstream_client, monkeypatch):
+    """The endpoint returns the synthesized audio without touching disk"""
+    upstream.finish.set()
+    monkeypatch.setattr(http_clients, "get", lambda name: upstream_client)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/text-to-speech", json={"content": "Hello"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.content == b"ID3-first-chunk-rest"
+
+        response = await client.post("/api/text-to-speech", json={"content": "fail"})
+        assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_elevenlabs_stream_stays_open_and_logs_ttfb(upstream, upstream_client, caplog):
+    """ElevenLabs audio is forwarded chunk by chunk over one open stream"""
+    caplog.set_level(logging.INFO, logger="src.services.tts")
+    response = await open_elevenlabs_speech(upstream_client, "xi-test", "voice-1", "Hello")
+    chunks = relay_stream(response, "elevenlabs-tts")
+
+    assert await asyncio.wait_for(chunks.__anext__(), timeout=1) == b"ID3-first-chunk"
+    assert not response.is_closed
+    assert "elevenlabs-tts time to first byte" in caplog.text
+
+    upstream.finish.set()
+    assert b"".join([chunk async for chunk in chunks]) == b"-rest"
+    assert response.is_closed
+
+    request = upstream.requests[0]
+    assert request.url.path == "/v1/text-to-speech/voice-1/stream"
+    assert request.headers["xi-api-key"] == "xi-test"
+
+@pytest.mark.asyncio
+async def test_elevenlabs_endpoint_passes_upstream_status(upstream, upstream_client, monkeypatch):
+    """Upstream errors keep their status code instead of becoming a 500"""
+    upstream.finish.set()
+    monkeypatch.setattr(http_clients, "get", lambda name: upstream_client)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/elevenlabs-tts", json={"content": "Hello"})
+        assert response.status_code == 200
+        assert response.content == b"ID3-first-chunk-rest"
+
+        response = await client.post("/api/elevenlabs-tts", json={"content": "fail"})
+        assert response.status_code == 400
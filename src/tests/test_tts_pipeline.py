@@ -0,0 +1,150 @@
+"""
+Tests for sentence-pipelined text-to-speech
+"""
+import asyncio
+import json
+import httpx
+import pytest
+
+from ..main import app, http_clients
+from ..services.audio_cache import AudioCache
+from ..services.tts import open_openai_speech
+from ..services.tts_pipeline import (
+    SegmentSynthesizer, SentenceBuffer, iter_sentences, prime_stream, split_sentences, synthesize_pipelined
+)
+
+REPLY = (
+    "Great, I have marked the life jackets as checked. "
+    "Next, inspect the fire extinguisher gauge. "
+    "Ok. "
+    "Then confirm the flares have not expired and are stored in a dry place."
+)
+
+def test_split_sentences_merges_short_and_splits_long():
+    """Short sentences are merged with the next one; long ones split at clauses"""
+    segments = split_sentences(REPLY)
+    assert segments == [
+        "Great, I have marked the life jackets as checked.",
+        "Next, inspect the fire extinguisher gauge.",
+        "Ok. Then confirm the flares have not expired and are stored in a dry place."
+    ]
+
+    long_sentence = ", ".join(["check the bilge pump float switch"] * 12) + "."
+    pieces = split_sentences(long_sentence, max_chars=80)
+    assert all(len(piece) <= 80 for piece in pieces)
+    assert " ".join(pieces) == long_sentence
+
+def test_sentence_buffer_releases_whole_sentences():
+    """Streamed deltas come out as sentences once they are complete"""
+    buffer = SentenceBuffer()
+    assert buffer.feed("Great, I have marked the life ") == []
+    assert buffer.feed("jackets as checked. Next, inspect") == ["Great, I have marked the life jackets as checked."]
+    assert buffer.feed(" the gauge") == []
+    assert buffer.flush() == ["Next, inspect the gauge"]
+
+@pytest.mark.asyncio
+async def test_iter_sentences_from_stream():
+    """A streamed reply is segmented the same way as the full text"""
+    async def deltas():
+        for i in range(0, len(REPLY), 7):
+            yield REPLY[i:i + 7]
+
+    assert [s async for s in iter_sentences(deltas())] == split_sentences(REPLY)
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_order_with_bounded_parallelism():
+    """Segments are synthesized concurrently, at most max_parallel at a time, and played in order"""
+    delays = {"one": 0.05, "two": 0.01, "three": 0.03, "four": 0.0, "five": 0.02}
+    running = 0
+    peak = 0
+
+    async def synthesize(text):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delays[text])
+        running -= 1
+        return text.encode()
+
+    chunks = [chunk async for chunk in synthesize_pipelined(list(delays), synthesize, max_parallel=2)]
+    assert chunks == [b"one", b"two", b"three", b"four", b"five"]
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_first_segment_plays_before_later_ones_finish():
+    """Audio for the first sentence is yielded while the rest are still being synthesized"""
+    release = asyncio.Event()
+
+    async def synthesize(text):
+        if text != "first":
+            await release.wait()
+        return text.encode()
+
+    chunks = synthesize_pipelined(["first", "second", "third"], synthesize)
+    assert await asyncio.wait_for(chunks.__anext__(), timeout=1) == b"first"
+
+    release.set()
+    assert [chunk async for chunk in chunks] == [b"second", b"third"]
+
+@pytest.mark.asyncio
+async def test_errors_surface_before_streaming():
+    """A failing first segment raises from prime_stream"""
+    async def synthesize(text):
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await prime_stream(synthesize_pipelined(["first", "second"], synthesize))
+
+class StubSpeech:
+    """Upstream stub that returns the requested text as audio"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["input"]
+        self.inputs.append(text)
+        if text.startswith("fail"):
+            return httpx.Response(400, json={"error": "bad input"})
+        return httpx.Response(200, content=f"<{text}>".encode(), headers={"content-type": "audio/mpeg"})
+
+@pytest.fixture
+def speech():
+    return StubSpeech()
+
+@pytest.fixture
+async def speech_client(speech):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(speech.handler))
+    yield client
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_segments_are_cached_individually(speech, speech_client, tmp_path):
+    """A sentence that recurs in another reply is served from the cache"""
+    synthesize = SegmentSynthesizer(
+        AudioCache(str(tmp_path)), "openai", "alloy", "tts-1",
+        lambda text: open_openai_speech(speech_client, "sk-test", text)
+    )
+    first = b"".join([c async for c in synthesize_pipelined(["Marked as complete.", "Next item."], synthesize)])
+    second = b"".join([c async for c in synthesize_pipelined(["Marked as complete.", "All done."], synthesize)])
+
+    assert first == b"<Marked as complete.><Next item.>"
+    assert second == b"<Marked as complete.><All done.>"
+    assert speech.inputs == ["Marked as complete.", "Next item.", "All done."]
+
+@pytest.mark.asyncio
+async def test_pipelined_endpoint(speech, speech_client, monkeypatch):
+    """The endpoint streams the reply's audio sentence by sentence"""
+    monkeypatch.setattr(http_clients, "get", lambda name: speech_client)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/text-to-speech/stream", json={"content": REPLY})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.content == b"".join(f"<{s}>".encode() for s in split_sentences(REPLY))
+
+        response = await client.post("/api/text-to-speech/stream", json={"content": "fail on the first sentence."})
+        assert response.status_code == 400
+
+        response = await client.post("/api/text-to-speech/stream", json={"content": "Hello.", "provider": "nope"})
+        assert response.status_code == 400
@@ -0,0 +1,110 @@
+"""
+Tests for the single round-trip voice turn endpoint
+"""
+import base64
+import json
+from types import SimpleNamespace
+import httpx
+import pytest
+
+from ..main import app, checklist_agent, client as openai_client, http_clients
+from ..database.models import ChecklistCategory, ChecklistSection, ChecklistItem
+
+REPLY = "Done, the life jackets are marked as checked. Next, inspect the fire extinguisher gauge."
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.fixture
+def seeded(test_db):
+    category = ChecklistCategory(name="Safety", description="Safety checks")
+    section = ChecklistSection(name="Deck", description="Deck equipment", order=1, category=category)
+    item = ChecklistItem(description="Life jackets", order=1, section=section, is_completed=False)
+    test_db.add_all([category, section, item])
+    test_db.commit()
+    return item
+
+@pytest.fixture
+def fake_turn(monkeypatch, seeded):
+    """Stub Whisper, the agent and the TTS provider"""
+    async def transcribe(model, file):
+        return SimpleNamespace(text=file[1].read().decode("utf-8"))
+
+    async def process_message(message, session_id, checklist_status, item_map):
+        return {"message": REPLY, "completed_items": [seeded.id]}
+
+    def speech(request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["text"]
+        if text.startswith("fail"):
+            return httpx.Response(500, json={"error": "synthesis failed"})
+        return httpx.Response(200, content=f"<{text}>".encode())
+
+    speech_client = httpx.AsyncClient(base_url="https://api.elevenlabs.io", transport=httpx.MockTransport(speech))
+    monkeypatch.setattr(openai_client.audio.transcriptions, "create", transcribe)
+    monkeypatch.setattr(checklist_agent, "process_message", process_message)
+    monkeypatch.setattr(http_clients, "get", lambda name: speech_client)
+    return seeded
+
+@pytest.fixture
+async def api():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.mark.asyncio
+async def test_voice_turn_streams_transcript_reply_and_audio(api, fake_turn, test_db):
+    """One request returns the transcript, the reply with checklist updates, and the spoken reply"""
+    response = await api.post(
+        "/api/voice/turn",
+        files={"audio": ("recording.wav", b"life jackets are checked", "audio/wav")},
+        data={"session_id": "boat-1"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["transcript", "reply", "audio", "audio", "done"]
+    assert events[0][1]["text"] == "life jackets are checked"
+
+    reply = events[1][1]
+    assert reply["messages"][0]["content"] == REPLY
+    assert "Life jackets" in reply["messages"][-1]["content"]
+    test_db.refresh(fake_turn)
+    assert fake_turn.is_completed
+
+    audio = [data for name, data in events if name == "audio"]
+    assert [a["seq"] for a in audio] == [0, 1]
+    assert b"".join(base64.b64decode(a["audio"]) for a in audio) == b"".join(f"<{a['text']}>".encode() for a in audio)
+    assert events[-1][1] == {"success": True}
+
+@pytest.mark.asyncio
+async def test_voice_turn_reports_tts_errors_as_events(api, fake_turn, monkeypatch):
+    """A TTS failure after the reply is sent becomes an error event, not a broken stream"""
+    async def process_message(message, session_id, checklist_status, item_map):
+        return {"message": "fail to speak this reply please."}
+
+    monkeypatch.setattr(checklist_agent, "process_message", process_message)
+    response = await api.post("/api/voice/turn", files={"audio": ("recording.wav", b"hello", "audio/wav")})
+
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["transcript", "reply", "error", "done"]
+    assert events[2][1]["status_code"] == 500
+
+@pytest.mark.asyncio
+async def test_voice_turn_with_silence_skips_chat(api, fake_turn):
+    """An empty transcript ends the turn without calling the agent"""
+    response = await api.post("/api/voice/turn", files={"audio": ("recording.wav", b"   ", "audio/wav")})
+    assert [name for name, _ in parse_events(response.text)] == ["transcript", "done"]
+
+@pytest.mark.asyncio
+async def test_voice_turn_rejects_unknown_provider(api, fake_turn):
+    """An unknown TTS provider is rejected before anything is transcribed"""
+    response = await api.post(
+        "/api/voice/turn",
+        files={"audio": ("recording.wav", b"hello", "audio/wav")},
+        data={"provider": "nope"}
+    )
+    assert response.status_code == 400
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
+from unittest.mock import MagicMock, patch
 from src.agents.checklist_agent import ChecklistAgent, ConversationMemory
 from crewai import Task, Process
 
@@ -7,11 +7,6 @@ from crewai import Task, Process
 def api_key():
     return "test-api-key"
 
-@pytest.fixture
-def mock_openai():
-    with patch('src.agents.checklist_agent.OpenAI') as mock:
-        yield mock
-
 @pytest.fixture
 def mock_async_openai():
     with patch('src.agents.checklist_agent.AsyncOpenAI') as mock:
@@ -19,26 +14,24 @@ def mock_async_openai():
 
 @pytest.fixture
 def mock_httpx_client():
-    with patch('src.agents.checklist_agent.httpx.AsyncClient') as mock:
+    with patch('src.services.http_clients.httpx.AsyncClient') as mock:
         yield mock
 
 @pytest.fixture
 def mock_crew():
-    with patch('src.agents.checklist_agent.Crew') as mock:
+    with patch('src.agents.checklist_crew.Crew') as mock:
         instance = mock.return_value
-        # Set up the mock to return an async function
-        instance.kickoff = AsyncMock(return_value="Analysis complete")
+        # Crew.kickoff blocks and returns the result directly
+        instance.kickoff.return_value = "Analysis complete"
         yield instance
 
 @pytest.fixture
-def checklist_agent(api_key, mock_openai, mock_async_openai, mock_httpx_client, mock_crew):
-    agent = ChecklistAgent(api_key)
-    # Replace the real crew with our mock
-    agent.crew = mock_crew
-    return agent
+def checklist_agent(api_key, mock_async_openai, mock_httpx_client, mock_crew):
+    # Every crew run constructs Crew(...), which returns our mock
+    return ChecklistAgent(api_key)
 
 @pytest.mark.asyncio
-async def test_create_checklist(checklist_agent):
+async def test_create_checklist(checklist_agent, mock_crew):
     # Test data
     title = "Test Checklist"
     description = "A test checklist"
@@ -55,12 +48,13 @@ async def test_create_checklist(checklist_agent):
     assert result["description"] == description
     assert result["items"] == items
     assert result["analysis"] == "Analysis complete"
+    assert result["checklist"] == "Analysis complete"
     
-    # Verify crew kickoff was called
-    checklist_agent.crew.kickoff.assert_called_once()
+    # Formatting and analysis run as two independent crews
+    assert mock_crew.kickoff.call_count == 2
 
 @pytest.mark.asyncio
-async def test_update_checklist(checklist_agent):
+async def test_update_checklist(checklist_agent, mock_crew):
     # Test data
     checklist_id = "test-123"
     updates = {
@@ -69,7 +63,7 @@ async def test_update_checklist(checklist_agent):
     }
     
     # Set up mock response
-    checklist_agent.crew.kickoff = AsyncMock(return_value="Update complete")
+    mock_crew.kickoff.return_value = "Update complete"
     
     # Call the method
     result = await checklist_agent.update_checklist(checklist_id, updates)
@@ -80,10 +74,10 @@ async def test_update_checklist(checklist_agent):
     assert result["result"] == "Update complete"
     
     # Verify crew kickoff was called
-    checklist_agent.crew.kickoff.assert_called_once()
+    mock_crew.kickoff.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_get_checklist_suggestions(checklist_agent):
+async def test_get_checklist_suggestions(checklist_agent, mock_crew):
     # Test data
     context = "Need a checklist for project planning"
     
@@ -92,7 +86,7 @@ async def test_get_checklist_suggestions(checklist_agent):
         {"name": "Define project scope", "description": "Outline project objectives and deliverables"},
         {"name": "Create timeline", "description": "Set project milestones and deadlines"}
     ]
-    checklist_agent.crew.kickoff = AsyncMock(return_value=expected_suggestions)
+    mock_crew.kickoff.return_value = expected_suggestions
     
     # Call the method
     result = await checklist_agent.get_checklist_suggestions(context)
@@ -101,7 +95,7 @@ async def test_get_checklist_suggestions(checklist_agent):
     assert result == expected_suggestions
     
     # Verify crew kickoff was called
-    checklist_agent.crew.kickoff.assert_called_once()
+    mock_crew.kickoff.assert_called_once()
 
 def test_conversation_memory():
     memory = ConversationMemory(max_history_age=24)